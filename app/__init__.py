@@ -14,6 +14,10 @@ def create_app(config_name=None):
                 static_url_path='/static')
     app.config.from_object(config[config_name])
     
+    # Registro en JSON escrito por un hilo aparte (reemplaza los print)
+    from app.utils.registro import init_registro
+    init_registro(app)
+    
     # Crear carpetas necesarias
     os.makedirs('instance', exist_ok=True)
     os.makedirs('app/static', exist_ok=True)
@@ -21,14 +25,60 @@ def create_app(config_name=None):
     os.makedirs('app/static/images/uploads', exist_ok=True)
     os.makedirs('app/static/images/productos', exist_ok=True)
     
+    # Pool de conexiones a la base de datos
+    from app.models import init_pool
+    init_pool(app)
+    
+    # Perfil de consultas por petición (cabeceras, log de lentas y /debug/queries)
+    from app.utils.perfilador import init_perfilador
+    init_perfilador(app)
+    
+    # Caché del catálogo
+    from app.utils.cache import cache_catalogo, cache_configuracion, cache_analitica
+    cache_catalogo.configurar(ttl=app.config['CATALOGO_CACHE_TTL'],
+                              max_entradas=app.config['CATALOGO_CACHE_MAX_ENTRADAS'])
+    cache_configuracion.configurar(ttl=app.config['CONFIGURACION_CACHE_TTL'])
+    cache_analitica.configurar(ttl=app.config['ANALITICA_CACHE_TTL'])
+    
+    # Recibos PDF
+    from app.utils.recibos import init_recibos
+    init_recibos(app)
+    
     # Registrar blueprints
     from app.routes import register_blueprints
     register_blueprints(app)
     
+    # Imágenes subidas y sus variantes WebP/JPEG
+    from app.utils.imagenes import init_imagenes
+    init_imagenes(app)
+    
+    # Placeholders SVG: caché LRU y archivos de los tamaños comunes
+    from app.utils.placeholders import init_placeholders
+    init_placeholders(app)
+    
+    # Estáticos con hash en la URL, Cache-Control immutable y versiones .gz/.br
+    # (después de los placeholders, que se escriben en static/)
+    from app.utils.estaticos import init_estaticos
+    init_estaticos(app)
+    
     # Inicializar base de datos
     from app.models import init_db
     with app.app_context():
         init_db()
+        
+        # Precargar la configuración del sitio que usan inicio e historia
+        from app.models.system_settings import SystemSettings
+        from app.models.historia_images import HistoriaImages
+        SystemSettings.get_all_settings()
+        HistoriaImages.get_all_images()
+    
+    # Cola de reportes PDF (necesita la tabla de trabajos ya migrada)
+    from app.utils.cola_reportes import init_cola_reportes
+    init_cola_reportes(app)
+    
+    # Carrito en la base de datos (contador en plantillas y limpieza de carritos de visitantes)
+    from app.utils.carrito import init_carrito
+    init_carrito(app)
     
     return app
 
@@ -1,128 +1,402 @@
 import sqlite3
 import os
+import time
+import threading
+from collections import deque
 from instance.config import InstanceConfig
 
+class PoolAgotadoError(sqlite3.OperationalError):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera"""
+
+def _es_bloqueo(error):
+    """Indica si un OperationalError se debe a que la base de datos está ocupada"""
+    mensaje = str(error).lower()
+    return 'locked' in mensaje or 'busy' in mensaje
+
+# Recibe cada sentencia ejecutada (ver app/utils/perfilador.py); None lo desactiva
+_perfilador = None
+
+def registrar_perfilador(perfilador):
+    """Instala (o con None quita) el perfilador de consultas de los cursores"""
+    global _perfilador
+    _perfilador = perfilador
+
+class RetryingCursor(sqlite3.Cursor):
+    """
+    Cursor que reintenta las sentencias que fallan por 'database is locked'.
+
+    Solo se reintenta cuando la sentencia fallida no dejó una transacción abierta:
+    en ese caso no hay trabajo previo que perder y repetirla es seguro. Dentro de una
+    transacción el error se propaga para que el llamador haga rollback.
+
+    Con un perfilador instalado cada sentencia se le informa con su tiempo, al que
+    se suma el de leer sus filas con fetchone/fetchmany/fetchall.
+    """
+
+    _consulta = None
+
+    def _con_reintentos(self, metodo, *args):
+        politica = self.connection._pool
+        intento = 0
+        while True:
+            try:
+                return metodo(*args)
+            except sqlite3.OperationalError as e:
+                if (not _es_bloqueo(e) or self.connection.in_transaction
+                        or intento >= politica.lock_retries):
+                    raise
+                time.sleep(politica.lock_retry_backoff * (2 ** intento))
+                intento += 1
+
+    def _medir(self, metodo, sql, parametros):
+        perfilador = _perfilador
+        if perfilador is None:
+            return self._con_reintentos(metodo, sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return self._con_reintentos(metodo, sql, parametros)
+        finally:
+            self._consulta = perfilador.registrar(sql, parametros, time.perf_counter() - inicio)
+
+    def _medir_lectura(self, metodo, *args):
+        if self._consulta is None or _perfilador is None:
+            return metodo(*args)
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            _perfilador.sumar(self._consulta, time.perf_counter() - inicio)
+
+    def execute(self, sql, parameters=()):
+        return self._medir(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._medir(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._medir_lectura(super().fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._medir_lectura(super().fetchmany)
+        return self._medir_lectura(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._medir_lectura(super().fetchall)
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Conexión SQLite administrada por el pool.
+
+    Los modelos siguen usando el patrón conn = get_db_connection() ... conn.close(),
+    pero close() ya no destruye la conexión: la devuelve al pool, o si la conexión
+    está ligada al contexto de la aplicación (una petición), solo libera la referencia
+    y la conexión se devuelve al pool al terminar la petición.
+
+    Igual que antes, cerrar con cambios sin confirmar los descarta (rollback).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._referencias = 0
+        self._ligada_a_contexto = False
+        self._en_pool = False
+        self._ultimo_uso = time.monotonic()
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or RetryingCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        """Confirma la transacción, reintentando si otro escritor tiene el lock"""
+        if _perfilador is None or not self.in_transaction:
+            return self._commit_con_reintentos()
+        inicio = time.perf_counter()
+        try:
+            return self._commit_con_reintentos()
+        finally:
+            _perfilador.registrar('COMMIT', (), time.perf_counter() - inicio)
+
+    def _commit_con_reintentos(self):
+        intento = 0
+        while True:
+            try:
+                return super().commit()
+            except sqlite3.OperationalError as e:
+                if not _es_bloqueo(e) or intento >= self._pool.lock_retries:
+                    raise
+                time.sleep(self._pool.lock_retry_backoff * (2 ** intento))
+                intento += 1
+
+    def close(self):
+        """Libera la conexión en lugar de cerrarla"""
+        if self._en_pool:
+            return
+        if self._referencias > 0:
+            self._referencias -= 1
+        if self._referencias > 0:
+            return
+
+        if self.in_transaction:
+            self.rollback()
+
+        if not self._ligada_a_contexto:
+            self._pool.release(self)
+
+    def cerrar_definitivamente(self):
+        """Cierra la conexión física con SQLite"""
+        sqlite3.Connection.close(self)
+
+class ConnectionPool:
+    """
+    Pool de conexiones SQLite compartido por todos los hilos del proceso.
+
+    - max_size: número máximo de conexiones abiertas a la vez
+    - timeout: segundos que se espera por una conexión libre antes de fallar
+    - healthcheck_interval: segundos de inactividad tras los cuales se verifica
+      la conexión con SELECT 1 antes de entregarla
+
+    Cada conexión nueva se abre con el busy_timeout y los PRAGMA configurados
+    (WAL, synchronous, mmap_size, cache_size, temp_store...). lock_retries y
+    lock_retry_backoff definen cuántas veces y con qué espera base (exponencial)
+    se reintenta una sentencia que falla con 'database is locked'.
+    """
+
+    def __init__(self, max_size=10, timeout=10.0, healthcheck_interval=30.0):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.pragmas = {}
+        self.busy_timeout_ms = 5000
+        self.lock_retries = 0
+        self.lock_retry_backoff = 0.05
+        self._libres = deque()
+        self._abiertas = 0
+        self._condicion = threading.Condition()
+        self._metricas = {
+            'checkouts': 0,
+            'conexiones_creadas': 0,
+            'conexiones_descartadas': 0,
+            'esperas': 0,
+            'espera_total_ms': 0.0,
+            'espera_max_ms': 0.0,
+            'timeouts': 0
+        }
+
+    def configure(self, max_size=None, timeout=None, healthcheck_interval=None,
+                  pragmas=None, busy_timeout_ms=None, lock_retries=None, lock_retry_backoff=None):
+        """
+        Actualiza los parámetros del pool. Si cambian los PRAGMA o el busy_timeout,
+        las conexiones libres se cierran para que las nuevas se abran con los valores nuevos.
+        """
+        with self._condicion:
+            if max_size is not None:
+                self.max_size = max_size
+            if timeout is not None:
+                self.timeout = timeout
+            if healthcheck_interval is not None:
+                self.healthcheck_interval = healthcheck_interval
+            if lock_retries is not None:
+                self.lock_retries = lock_retries
+            if lock_retry_backoff is not None:
+                self.lock_retry_backoff = lock_retry_backoff
+
+            almacenamiento_cambiado = False
+            if pragmas is not None and dict(pragmas) != self.pragmas:
+                self.pragmas = dict(pragmas)
+                almacenamiento_cambiado = True
+            if busy_timeout_ms is not None and busy_timeout_ms != self.busy_timeout_ms:
+                self.busy_timeout_ms = busy_timeout_ms
+                almacenamiento_cambiado = True
+            if almacenamiento_cambiado:
+                while self._libres:
+                    self._descartar(self._libres.pop())
+
+            self._condicion.notify_all()
+
+    def _crear_conexion(self):
+        """Abre una nueva conexión física y aplica la configuración de almacenamiento"""
+        conn = sqlite3.connect(InstanceConfig.DATABASE_PATH,
+                               timeout=self.busy_timeout_ms / 1000,
+                               factory=PooledConnection,
+                               check_same_thread=False)
+        conn._pool = self
+        aplicar_pragmas(conn, self.pragmas)
+        self._metricas['conexiones_creadas'] += 1
+        return conn
+
+    def _conexion_sana(self, conn):
+        """Verifica una conexión que lleva tiempo inactiva"""
+        if time.monotonic() - conn._ultimo_uso < self.healthcheck_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Entrega una conexión libre, creando una nueva si hay capacidad"""
+        inicio = time.perf_counter()
+        esperó = False
+
+        with self._condicion:
+            while True:
+                while self._libres:
+                    conn = self._libres.pop()
+                    if self._conexion_sana(conn):
+                        break
+                    self._descartar(conn)
+                else:
+                    conn = None
+
+                if conn is None and self._abiertas < self.max_size:
+                    self._abiertas += 1
+                    try:
+                        conn = self._crear_conexion()
+                    except Exception:
+                        self._abiertas -= 1
+                        raise
+
+                if conn is not None:
+                    break
+
+                restante = self.timeout - (time.perf_counter() - inicio)
+                if restante <= 0:
+                    self._metricas['timeouts'] += 1
+                    raise PoolAgotadoError(
+                        f'No hay conexiones libres en el pool (máximo {self.max_size})')
+                esperó = True
+                self._condicion.wait(restante)
+
+            espera_ms = (time.perf_counter() - inicio) * 1000
+            self._metricas['checkouts'] += 1
+            if esperó:
+                self._metricas['esperas'] += 1
+            self._metricas['espera_total_ms'] += espera_ms
+            self._metricas['espera_max_ms'] = max(self._metricas['espera_max_ms'], espera_ms)
+
+        conn._en_pool = False
+        conn._referencias = 1
+        return conn
+
+    def release(self, conn):
+        """Devuelve una conexión al pool"""
+        conn._referencias = 0
+        conn._ligada_a_contexto = False
+        conn._en_pool = True
+        conn._ultimo_uso = time.monotonic()
+
+        with self._condicion:
+            if self._abiertas > self.max_size:
+                self._descartar(conn)
+            else:
+                self._libres.append(conn)
+            self._condicion.notify()
+
+    def _descartar(self, conn):
+        """Cierra una conexión y libera su cupo (requiere tener el lock)"""
+        self._abiertas -= 1
+        self._metricas['conexiones_descartadas'] += 1
+        try:
+            conn.cerrar_definitivamente()
+        except sqlite3.Error:
+            pass
+
+    def dispose(self):
+        """Cierra todas las conexiones libres (por ejemplo, después de un fork)"""
+        with self._condicion:
+            while self._libres:
+                self._descartar(self._libres.pop())
+
+    def stats(self):
+        """Métricas del pool: uso, conexiones y tiempo de espera por checkout"""
+        with self._condicion:
+            metricas = dict(self._metricas)
+            metricas['abiertas'] = self._abiertas
+            metricas['libres'] = len(self._libres)
+            metricas['en_uso'] = self._abiertas - len(self._libres)
+            metricas['max_size'] = self.max_size
+        checkouts = metricas['checkouts']
+        metricas['espera_promedio_ms'] = metricas['espera_total_ms'] / checkouts if checkouts else 0.0
+        return metricas
+
+def aplicar_pragmas(conn, pragmas):
+    """
+    Aplica los PRAGMA de ajuste a una conexión recién abierta.
+    journal_mode va primero porque cambiarlo requiere que no haya otra sentencia activa.
+    """
+    for nombre, valor in sorted(pragmas.items(), key=lambda item: item[0] != 'journal_mode'):
+        conn.execute(f'PRAGMA {nombre} = {valor}').fetchall()
+
+_pool = ConnectionPool()
+
 def get_db_connection():
-    """Obtiene una conexión a la base de datos"""
-    return sqlite3.connect(InstanceConfig.DATABASE_PATH)
+    """
+    Obtiene una conexión a la base de datos.
+
+    Dentro de un contexto de aplicación Flask todas las llamadas comparten la misma
+    conexión, que se devuelve al pool al cerrar el contexto aunque haya una excepción.
+    Fuera de él (scripts) cada llamada toma una conexión del pool y solo close() la
+    devuelve; por eso las tareas en segundo plano (reportes, recibos, imágenes) corren
+    dentro de app.app_context().
+    """
+    from flask import g, has_app_context
+
+    if not has_app_context():
+        return _pool.acquire()
+
+    conn = g.get('_db_conn')
+    if conn is None:
+        conn = _pool.acquire()
+        conn._ligada_a_contexto = True
+        conn._referencias = 0
+        g._db_conn = conn
+
+    conn._referencias += 1
+    return conn
+
+def release_db_connection(exception=None):
+    """Devuelve al pool la conexión ligada al contexto actual"""
+    from flask import g
+
+    conn = g.pop('_db_conn', None)
+    if conn is None:
+        return
+
+    if conn.in_transaction:
+        conn.rollback()
+    _pool.release(conn)
+
+def init_pool(app):
+    """Configura el pool con los valores de la aplicación y lo liga a su ciclo de vida"""
+    _pool.configure(max_size=app.config.get('DB_POOL_SIZE'),
+                    timeout=app.config.get('DB_POOL_TIMEOUT'),
+                    healthcheck_interval=app.config.get('DB_POOL_HEALTHCHECK_INTERVAL'),
+                    pragmas=app.config.get('SQLITE_PRAGMAS'),
+                    busy_timeout_ms=app.config.get('SQLITE_BUSY_TIMEOUT_MS'),
+                    lock_retries=app.config.get('SQLITE_LOCK_RETRIES'),
+                    lock_retry_backoff=app.config.get('SQLITE_LOCK_RETRY_BACKOFF'))
+    app.teardown_appcontext(release_db_connection)
+
+def get_pool_stats():
+    """Métricas actuales del pool de conexiones"""
+    return _pool.stats()
+
+def dispose_pool():
+    """Cierra las conexiones libres del pool"""
+    _pool.dispose()
 
 def init_db():
-    """Inicializa la base de datos con todas las tablas"""
-    from .usuario import Usuario
-    from .categoria import Categoria
-    from .producto import Producto
-    from .venta import Venta
-    from .detalle_venta import DetalleVenta
-    from .insumo import Insumo
-    from .roles import Roles
-    from .cliente import Cliente
-    from .movimientos_inventario import MovimientoInventario
-    from .system_settings import SystemSettings
-    from .historia_images import HistoriaImages
-    
-    # Crear todas las tablas
-    Usuario.create_table()
-    Categoria.create_table()
-    Producto.create_table()
-    Venta.create_table()
-    DetalleVenta.create_table()
-    Insumo.create_table()
-    Roles.create_table()
-    Cliente.create_table()
-    MovimientoInventario.create_table()
-    SystemSettings.create_table()
-    HistoriaImages.create_table()
-    
-    # Insertar datos iniciales
-    _seed_initial_data()
-
-def _seed_initial_data():
-    """Inserta datos iniciales en la base de datos"""
-    from .usuario import Usuario
-    from .categoria import Categoria
-    from .producto import Producto
-    from .insumo import Insumo
-    
-    # Crear usuario administrador si no existe
-    if not Usuario.find_by_email('admin@migasdeoro.com'):
-        Usuario.create({
-            'nombre': 'Administrador',
-            'email': 'admin@migasdeoro.com',
-            'password': 'admin123',
-            'rol': 'admin'
-        })
-    
-    # Crear usuario vendedor si no existe
-    if not Usuario.find_by_email('vendedor@migasdeoro.com'):
-        Usuario.create({
-            'nombre': 'Vendedor',
-            'email': 'vendedor@migasdeoro.com',
-            'password': 'vendedor123',
-            'telefono': '555-0123',
-            'direccion': 'Tienda Principal',
-            'rol': 'vendedor'
-        })
-    
-    # Crear usuario cliente de prueba si no existe
-    if not Usuario.find_by_email('cliente@test.com'):
-        Usuario.create({
-            'nombre': 'Cliente Test',
-            'email': 'cliente@test.com',
-            'password': 'cliente123',
-            'telefono': '555-0456',
-            'direccion': 'Dirección de prueba',
-            'rol': 'cliente'
-        })
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM categorias')
-    categoria_count = cursor.fetchone()[0]
-    
-    if categoria_count == 0:
-        # Crear categorías iniciales
-        categorias = [
-            {"nombre": "Panes", "descripcion": "Variedad de panes frescos"},
-            {"nombre": "Pasteles", "descripcion": "Pasteles y tortas para ocasiones especiales"},
-            {"nombre": "Galletas", "descripcion": "Galletas artesanales"},
-            {"nombre": "Bebidas", "descripcion": "Bebidas calientes y frías"},
-            {"nombre": "Desayunos", "descripcion": "Opciones para el desayuno"}
-        ]
-        
-        for categoria in categorias:
-            Categoria.create(categoria)
-    
-    cursor.execute('SELECT COUNT(*) FROM productos')
-    producto_count = cursor.fetchone()[0]
-    
-    if producto_count == 0:
-        # Crear productos iniciales
-        productos = [
-            {"nombre": "Pan Francés", "descripcion": "Pan francés tradicional recién horneado", "precio": 2.50, "categoria_id": 1, "stock": 50},
-            {"nombre": "Croissant", "descripcion": "Croissant de mantequilla artesanal", "precio": 3.00, "categoria_id": 1, "stock": 30},
-            {"nombre": "Torta de Chocolate", "descripcion": "Deliciosa torta de chocolate con cobertura", "precio": 25.00, "categoria_id": 2, "stock": 10},
-            {"nombre": "Galletas de Avena", "descripcion": "Galletas caseras de avena con pasas", "precio": 1.50, "categoria_id": 3, "stock": 40},
-            {"nombre": "Café Americano", "descripcion": "Café americano recién preparado", "precio": 2.00, "categoria_id": 4, "stock": 100},
-            {"nombre": "Sandwich de Jamón", "descripcion": "Sandwich de jamón y queso en pan artesanal", "precio": 5.50, "categoria_id": 5, "stock": 25}
-        ]
-        
-        for producto in productos:
-            Producto.create(producto)
-    
-    cursor.execute('SELECT COUNT(*) FROM insumos')
-    insumo_count = cursor.fetchone()[0]
-    
-    if insumo_count == 0:
-        # Crear insumos iniciales
-        insumos = [
-            {"nombre": "Harina de Trigo", "descripcion": "Harina de trigo para panificación", "cantidad_actual": 50.0, "cantidad_minima": 10.0, "unidad_medida": "kg", "precio_compra": 1.20, "proveedor": "Molinos del Sur"},
-            {"nombre": "Azúcar", "descripcion": "Azúcar blanca refinada", "cantidad_actual": 25.0, "cantidad_minima": 5.0, "unidad_medida": "kg", "precio_compra": 0.80, "proveedor": "Azucarera Nacional"},
-            {"nombre": "Mantequilla", "descripcion": "Mantequilla sin sal para repostería", "cantidad_actual": 10.0, "cantidad_minima": 2.0, "unidad_medida": "kg", "precio_compra": 4.50, "proveedor": "Lácteos Premium"},
-            {"nombre": "Huevos", "descripcion": "Huevos frescos de granja", "cantidad_actual": 200.0, "cantidad_minima": 50.0, "unidad_medida": "unidades", "precio_compra": 0.15, "proveedor": "Granja San José"},
-            {"nombre": "Levadura", "descripcion": "Levadura fresca para pan", "cantidad_actual": 5.0, "cantidad_minima": 1.0, "unidad_medida": "kg", "precio_compra": 3.00, "proveedor": "Levaduras Industriales"}
-        ]
-        
-        for insumo in insumos:
-            Insumo.create(insumo)
-    
-    conn.close()
+    """
+    Lleva el esquema de la base de datos a la última versión.
+    Las tablas, índices y datos iniciales se definen en app/models/migraciones.
+    """
+    from .migraciones import migrar
+    return migrar()
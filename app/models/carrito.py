@@ -1,42 +1,167 @@
-import sqlite3
 from . import get_db_connection
 
 class Carrito:
+    """
+    Carrito de compras guardado en la base de datos.
+
+    Cada carrito se identifica con una clave: 'u:<usuario_id>' para usuarios
+    con sesión iniciada y 's:<token>' para visitantes (ver app/utils/carrito.py).
+    La tabla carritos guarda la cantidad total de items de cada carrito y se
+    actualiza en la misma transacción que los items, así contar es una sola
+    lectura. Los métodos que modifican el carrito retornan ese total.
+    """
+
     @staticmethod
-    def agregar_item(user_id, producto_id, cantidad):
+    def _actualizar_resumen(cursor, clave):
+        """Recalcula el total de items del carrito (dentro de la transacción abierta)"""
+        cursor.execute('''
+            INSERT INTO carritos (clave, items, fecha_actualizacion)
+            SELECT ?, COALESCE(SUM(cantidad), 0), CURRENT_TIMESTAMP
+            FROM carrito_items
+            WHERE clave = ?
+            ON CONFLICT (clave) DO UPDATE SET
+                items = excluded.items,
+                fecha_actualizacion = excluded.fecha_actualizacion
+        ''', (clave, clave))
+        cursor.execute('SELECT items FROM carritos WHERE clave = ?', (clave,))
+        return cursor.fetchone()[0]
+
+    @classmethod
+    def agregar_item(cls, clave, producto_id, cantidad, maximo=None):
+        """
+        Suma cantidad al producto en el carrito. Con maximo (el stock) la
+        cantidad final nunca lo supera.
+        """
+        inicial = min(cantidad, maximo) if maximo is not None else cantidad
+
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Verificar si ya existe el item
         cursor.execute('''
-            SELECT id, cantidad FROM carrito 
-            WHERE usuario_id = ? AND producto_id = ?
-        ''', (user_id, producto_id))
-        
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Actualizar cantidad
-            nueva_cantidad = existing[1] + cantidad
-            cursor.execute('''
-                UPDATE carrito SET cantidad = ? 
-                WHERE id = ?
-            ''', (nueva_cantidad, existing[0]))
-        else:
-            # Crear nuevo item
+            INSERT INTO carrito_items (clave, producto_id, cantidad)
+            VALUES (?, ?, ?)
+            ON CONFLICT (clave, producto_id) DO UPDATE SET
+                cantidad = MIN(cantidad + excluded.cantidad, COALESCE(?, cantidad + excluded.cantidad))
+        ''', (clave, producto_id, inicial, maximo))
+        total = cls._actualizar_resumen(cursor, clave)
+        conn.commit()
+        conn.close()
+        return total
+
+    @classmethod
+    def actualizar_item(cls, clave, producto_id, cantidad):
+        """Fija la cantidad de un producto; con cantidad 0 lo quita del carrito"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        if cantidad > 0:
             cursor.execute('''
-                INSERT INTO carrito (usuario_id, producto_id, cantidad)
+                INSERT INTO carrito_items (clave, producto_id, cantidad)
                 VALUES (?, ?, ?)
-            ''', (user_id, producto_id, cantidad))
-        
+                ON CONFLICT (clave, producto_id) DO UPDATE SET cantidad = excluded.cantidad
+            ''', (clave, producto_id, cantidad))
+        else:
+            cursor.execute('DELETE FROM carrito_items WHERE clave = ? AND producto_id = ?',
+                           (clave, producto_id))
+        total = cls._actualizar_resumen(cursor, clave)
+        conn.commit()
+        conn.close()
+        return total
+
+    @classmethod
+    def eliminar_item(cls, clave, producto_id):
+        """Quita un producto del carrito"""
+        return cls.actualizar_item(clave, producto_id, 0)
+
+    @staticmethod
+    def vaciar(clave):
+        """Elimina todos los items del carrito"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM carrito_items WHERE clave = ?', (clave,))
+        cursor.execute('DELETE FROM carritos WHERE clave = ?', (clave,))
         conn.commit()
         conn.close()
-    
+        return 0
+
     @staticmethod
-    def get_count(user_id):
+    def get_items(clave):
+        """Productos del carrito como diccionario {producto_id: cantidad}"""
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT SUM(cantidad) FROM carrito WHERE usuario_id = ?', (user_id,))
+        cursor.execute('''
+            SELECT producto_id, cantidad FROM carrito_items
+            WHERE clave = ?
+            ORDER BY fecha_agregado, producto_id
+        ''', (clave,))
+        rows = cursor.fetchall()
+        conn.close()
+        return dict(rows)
+
+    @staticmethod
+    def get_count(clave):
+        """Cantidad total de items del carrito"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT items FROM carritos WHERE clave = ?', (clave,))
         result = cursor.fetchone()
         conn.close()
-        return result[0] if result[0] else 0
+        return result[0] if result else 0
+
+    @classmethod
+    def importar(cls, clave, items):
+        """Suma al carrito los items de un diccionario {producto_id: cantidad}"""
+        filas = [(clave, int(producto_id), int(cantidad)) for producto_id, cantidad in items.items() if int(cantidad) > 0]
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO carrito_items (clave, producto_id, cantidad)
+            VALUES (?, ?, ?)
+            ON CONFLICT (clave, producto_id) DO UPDATE SET cantidad = cantidad + excluded.cantidad
+        ''', filas)
+        total = cls._actualizar_resumen(cursor, clave)
+        conn.commit()
+        conn.close()
+        return total
+
+    @classmethod
+    def fusionar(cls, clave_origen, clave_destino):
+        """
+        Pasa los items de un carrito a otro (el de un visitante al de su
+        cuenta al iniciar sesión), sumando cantidades, y borra el de origen.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO carrito_items (clave, producto_id, cantidad)
+            SELECT ?, producto_id, cantidad
+            FROM carrito_items
+            WHERE clave = ?
+            ON CONFLICT (clave, producto_id) DO UPDATE SET cantidad = cantidad + excluded.cantidad
+        ''', (clave_destino, clave_origen))
+        cursor.execute('DELETE FROM carrito_items WHERE clave = ?', (clave_origen,))
+        cursor.execute('DELETE FROM carritos WHERE clave = ?', (clave_origen,))
+        total = cls._actualizar_resumen(cursor, clave_destino)
+        conn.commit()
+        conn.close()
+        return total
+
+    @staticmethod
+    def purgar_anonimos(dias):
+        """Elimina los carritos de visitantes sin cambios en los últimos 'dias' días"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        limite = f'-{int(dias)} days'
+        cursor.execute('''
+            DELETE FROM carrito_items WHERE clave IN (
+                SELECT clave FROM carritos
+                WHERE clave LIKE 's:%' AND fecha_actualizacion < datetime('now', ?)
+            )
+        ''', (limite,))
+        cursor.execute('''
+            DELETE FROM carritos
+            WHERE clave LIKE 's:%' AND fecha_actualizacion < datetime('now', ?)
+        ''', (limite,))
+        total = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return total
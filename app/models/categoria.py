@@ -1,5 +1,6 @@
 from datetime import datetime
 from . import get_db_connection
+from app.utils.cache import cache_catalogo
 
 class Categoria:
     def __init__(self, id=None, nombre=None, descripcion=None, activo=True):
@@ -38,31 +39,41 @@ class Categoria:
         categoria_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        cache_catalogo.invalidar('categorias')
         return categoria_id
     
     @classmethod
     def get_all(cls):
         """Obtiene todas las categorías activas"""
+        rows = cache_catalogo.obtener(('categorias', 'lista'), cls._get_all_rows)
+        return [cls(*row) for row in rows]
+    
+    @staticmethod
+    def _get_all_rows():
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM categorias WHERE activo = 1 ORDER BY nombre')
-        rows = cursor.fetchall()
+        rows = tuple(cursor.fetchall())
         conn.close()
-        
-        return [cls(*row) for row in rows]
+        return rows
     
     @classmethod
     def find_by_id(cls, categoria_id):
         """Busca una categoría por ID"""
+        row = cache_catalogo.obtener(('categorias', 'id', str(categoria_id)),
+                                     lambda: cls._find_row(categoria_id))
+        if row:
+            return cls(*row)
+        return None
+    
+    @staticmethod
+    def _find_row(categoria_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM categorias WHERE id = ? AND activo = 1', (categoria_id,))
         row = cursor.fetchone()
         conn.close()
-        
-        if row:
-            return cls(*row)
-        return None
+        return row
     
     def update(self, data):
         """Actualiza los datos de la categoría"""
@@ -81,6 +92,7 @@ class Categoria:
             values.append(self.id)
             cursor.execute(f'UPDATE categorias SET {", ".join(fields)} WHERE id = ?', values)
             conn.commit()
+            cache_catalogo.invalidar('categorias')
         
         conn.close()
     
@@ -91,4 +103,5 @@ class Categoria:
         cursor.execute('UPDATE categorias SET activo = 0 WHERE id = ?', (self.id,))
         conn.commit()
         conn.close()
+        cache_catalogo.invalidar('categorias')
         self.activo = False
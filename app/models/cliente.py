@@ -1,10 +1,14 @@
 from datetime import datetime
 from . import get_db_connection
 from .usuario import Usuario
+from .filas import cursor_filas
+from app.utils.fechas import rango_mes, hoy_utc
 
 class Cliente(Usuario):
     """Clase Cliente que extiende Usuario con funcionalidades específicas"""
     
+    __slots__ = ('total_gastado', 'ultimo_pedido', 'promedio_pedido')
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
     
@@ -14,9 +18,19 @@ class Cliente(Usuario):
         Usuario.create_table()
     
     @classmethod
-    def get_all_clientes(cls):
+    def get_all_clientes(cls, limit=None):
         """Obtiene todos los usuarios con rol de cliente"""
-        return Usuario.get_all(role='cliente')
+        return cls.get_all(role='cliente', limit=limit)
+    
+    @classmethod
+    def get_pagina_clientes(cls, limite=20, cursor=None):
+        """Una página de clientes en orden alfabético (ver Usuario.get_pagina)"""
+        return cls.get_pagina(role='cliente', limite=limite, cursor=cursor)
+    
+    @classmethod
+    def contar_clientes(cls):
+        """Cantidad de clientes activos"""
+        return cls.count_by_role('cliente')
     
     @classmethod
     def get_estadisticas_clientes(cls):
@@ -50,12 +64,13 @@ class Cliente(Usuario):
         top_cliente = cursor.fetchone()
         
         # Nuevos clientes este mes
+        hoy = hoy_utc()
         cursor.execute('''
             SELECT COUNT(*) 
             FROM usuarios 
             WHERE rol = "cliente" 
-            AND strftime('%Y-%m', fecha_registro) = strftime('%Y-%m', 'now')
-        ''')
+            AND fecha_registro >= ? AND fecha_registro < ?
+        ''', rango_mes(hoy.year, hoy.month))
         nuevos_este_mes = cursor.fetchone()[0]
         
         conn.close()
@@ -75,7 +90,7 @@ class Cliente(Usuario):
     def get_clientes_con_estadisticas(cls):
         """Obtiene clientes con sus estadísticas de compra"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         
         cursor.execute('''
             SELECT u.*, 
@@ -93,14 +108,12 @@ class Cliente(Usuario):
         rows = cursor.fetchall()
         conn.close()
         
-        clientes = []
-        for row in rows:
-            cliente = cls(*row[:9])  # Los primeros 9 campos son del usuario
-            cliente.total_pedidos = row[9]
-            cliente.total_gastado = row[10]
-            cliente.ultimo_pedido = row[11]
-            cliente.promedio_pedido = row[12] if row[12] else 0
-            clientes.append(cliente)
+        clientes = cls.from_rows(rows)
+        for cliente, row in zip(clientes, rows):
+            cliente.total_pedidos = row['total_pedidos']
+            cliente.total_gastado = row['total_gastado']
+            cliente.ultimo_pedido = row['ultimo_pedido']
+            cliente.promedio_pedido = row['promedio_pedido'] or 0
         
         return clientes
     
@@ -109,17 +122,22 @@ class Cliente(Usuario):
         from .venta import Venta
         return Venta.get_all(estado=estado, usuario_id=self.id)
     
+    @property
+    def clave_carrito(self):
+        """Clave del carrito del cliente (ver app/models/carrito.py)"""
+        return f'u:{self.id}'
+    
     def get_carrito(self):
         """Obtiene los productos en el carrito del cliente"""
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT c.*, p.nombre, p.precio, p.imagen
-            FROM carrito c
+            FROM carrito_items c
             JOIN productos p ON c.producto_id = p.id
-            WHERE c.usuario_id = ?
+            WHERE c.clave = ?
             ORDER BY c.fecha_agregado DESC
-        ''', (self.id,))
+        ''', (self.clave_carrito,))
         rows = cursor.fetchall()
         conn.close()
         return rows
@@ -141,28 +159,8 @@ class Cliente(Usuario):
     
     def agregar_al_carrito(self, producto_id, cantidad=1):
         """Agrega un producto al carrito"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar si el producto ya está en el carrito
-        cursor.execute('SELECT id, cantidad FROM carrito WHERE usuario_id = ? AND producto_id = ?', 
-                      (self.id, producto_id))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Actualizar cantidad
-            nueva_cantidad = existing[1] + cantidad
-            cursor.execute('UPDATE carrito SET cantidad = ? WHERE id = ?', 
-                          (nueva_cantidad, existing[0]))
-        else:
-            # Agregar nuevo item
-            cursor.execute('''
-                INSERT INTO carrito (usuario_id, producto_id, cantidad)
-                VALUES (?, ?, ?)
-            ''', (self.id, producto_id, cantidad))
-        
-        conn.commit()
-        conn.close()
+        from .carrito import Carrito
+        return Carrito.agregar_item(self.clave_carrito, producto_id, cantidad)
     
     def agregar_a_favoritos(self, producto_id):
         """Agrega un producto a favoritos"""
@@ -193,11 +191,8 @@ class Cliente(Usuario):
     
     def vaciar_carrito(self):
         """Vacía el carrito del cliente"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM carrito WHERE usuario_id = ?', (self.id,))
-        conn.commit()
-        conn.close()
+        from .carrito import Carrito
+        Carrito.vaciar(self.clave_carrito)
     
     def get_total_carrito(self):
         """Calcula el total del carrito"""
@@ -205,22 +200,18 @@ class Cliente(Usuario):
         cursor = conn.cursor()
         cursor.execute('''
             SELECT SUM(c.cantidad * p.precio)
-            FROM carrito c
+            FROM carrito_items c
             JOIN productos p ON c.producto_id = p.id
-            WHERE c.usuario_id = ?
-        ''', (self.id,))
+            WHERE c.clave = ?
+        ''', (self.clave_carrito,))
         result = cursor.fetchone()[0]
         conn.close()
         return result or 0
     
     def contar_items_carrito(self):
         """Cuenta los items en el carrito"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT SUM(cantidad) FROM carrito WHERE usuario_id = ?', (self.id,))
-        result = cursor.fetchone()[0]
-        conn.close()
-        return result or 0
+        from .carrito import Carrito
+        return Carrito.get_count(self.clave_carrito)
     
     def escribir_resena(self, producto_id, calificacion, comentario):
         """Escribe una reseña para un producto"""
@@ -55,6 +55,8 @@ class DetalleVenta:
         ''', (data['pedido_id'], data['producto_id'], data['cantidad'], data['precio_unitario']))
         
         detalle_id = cursor.lastrowid
+        cls._acumular_resumenes(cursor, data)
+        
         conn.commit()
         conn.close()
         return detalle_id
@@ -62,20 +64,46 @@ class DetalleVenta:
     @classmethod
     def create_multiple(cls, detalles):
         """
-        Crea múltiples detalles de venta en una sola transacción.
+        Crea múltiples detalles de venta en una sola transacción, junto con
+        los resúmenes de ventas (igual que create).
         Cada detalle debe incluir el precio_unitario capturado al momento de la venta.
         """
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        for detalle in detalles:
-            cursor.execute('''
-                INSERT INTO detalle_pedidos (pedido_id, producto_id, cantidad, precio_unitario)
-                VALUES (?, ?, ?, ?)
-            ''', (detalle['pedido_id'], detalle['producto_id'], detalle['cantidad'], detalle['precio_unitario']))
-        
-        conn.commit()
-        conn.close()
+        try:
+            for detalle in detalles:
+                cursor.execute('''
+                    INSERT INTO detalle_pedidos (pedido_id, producto_id, cantidad, precio_unitario)
+                    VALUES (?, ?, ?, ?)
+                ''', (detalle['pedido_id'], detalle['producto_id'], detalle['cantidad'], detalle['precio_unitario']))
+                cls._acumular_resumenes(cursor, detalle)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _acumular_resumenes(cursor, data):
+        """
+        Suma un item a ventas_diarias y producto_ventas_mensuales, en la misma
+        transacción que lo inserta en detalle_pedidos.
+        """
+        cursor.execute('''
+            UPDATE ventas_diarias SET items = items + ?
+            WHERE (fecha, estado) = (SELECT DATE(fecha_pedido), estado FROM pedidos WHERE id = ?)
+        ''', (data['cantidad'], data['pedido_id']))
+        cursor.execute('''
+            INSERT INTO producto_ventas_mensuales (mes, producto_id, unidades, ingresos)
+            SELECT strftime('%Y-%m', fecha_pedido), ?, ?, ? * ?
+            FROM pedidos
+            WHERE id = ? AND estado != 'cancelado'
+            ON CONFLICT (mes, producto_id) DO UPDATE SET
+                unidades = unidades + excluded.unidades,
+                ingresos = ingresos + excluded.ingresos
+        ''', (data['producto_id'], data['cantidad'], data['cantidad'], data['precio_unitario'], data['pedido_id']))
     
     @classmethod
     def get_by_pedido(cls, pedido_id):
@@ -0,0 +1,77 @@
+"""
+Construcción de modelos a partir de filas sqlite3.Row.
+
+Los modelos declaran en CAMPOS las columnas de su tabla (los argumentos del
+constructor) y usan __slots__, así cada instancia ocupa menos memoria que con
+un __dict__. Las filas se leen por nombre de columna: el orden del SELECT deja
+de importar y las columnas calculadas (alias) se leen aparte con fila['alias'].
+Las posiciones de los campos se resuelven una vez por consulta, no por fila.
+"""
+import sqlite3
+
+from app.utils.fechas import texto_a_fecha
+
+class FechaPerezosa:
+    """
+    Atributo de fecha que guarda el texto de SQLite y lo convierte a datetime
+    recién la primera vez que se lee; los listados que no muestran la fecha
+    no pagan la conversión. El valor se guarda en el slot '_<nombre>'.
+    """
+
+    def __set_name__(self, dueño, nombre):
+        self.slot = f'_{nombre}'
+
+    def __get__(self, instancia, dueño=None):
+        if instancia is None:
+            return self
+        valor = getattr(instancia, self.slot)
+        if isinstance(valor, str):
+            valor = texto_a_fecha(valor)
+            setattr(instancia, self.slot, valor)
+        return valor
+
+    def __set__(self, instancia, valor):
+        setattr(instancia, self.slot, valor)
+
+class ModeloFila:
+    """Base de los modelos que se construyen desde filas de la base de datos"""
+
+    __slots__ = ()
+    CAMPOS = ()
+
+    @classmethod
+    def _constructor(cls, columnas):
+        """
+        Función fila -> instancia para las columnas de una consulta. Con
+        SELECT * en el orden de la tabla los campos son un prefijo de la fila;
+        si no, cada campo presente se pasa por nombre (los que faltan quedan
+        con el valor por defecto del constructor).
+        """
+        columnas = [columna.lower() for columna in columnas]
+        n = len(cls.CAMPOS)
+        if columnas[:n] == list(cls.CAMPOS):
+            return lambda fila: cls(*fila[:n])
+
+        posiciones = [(campo, columnas.index(campo)) for campo in cls.CAMPOS if campo in columnas]
+        return lambda fila: cls(**{campo: fila[i] for campo, i in posiciones})
+
+    @classmethod
+    def from_row(cls, fila):
+        """Instancia a partir de una fila sqlite3.Row (None si la fila es None)"""
+        if fila is None:
+            return None
+        return cls._constructor(fila.keys())(fila)
+
+    @classmethod
+    def from_rows(cls, filas):
+        """Lista de instancias a partir de las filas de una misma consulta"""
+        if not filas:
+            return []
+        construir = cls._constructor(filas[0].keys())
+        return [construir(fila) for fila in filas]
+
+def cursor_filas(conn):
+    """Cursor de la conexión cuyas filas son sqlite3.Row"""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    return cursor
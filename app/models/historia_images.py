@@ -1,4 +1,6 @@
 from . import get_db_connection
+from app.utils.cache import cache_configuracion
+from app.utils.imagenes import variante_url, srcset
 
 class HistoriaImages:
     """Modelo para gestionar las imágenes de la página de historia"""
@@ -19,16 +21,27 @@ class HistoriaImages:
         ''')
         conn.commit()
         conn.close()
+        cache_configuracion.invalidar('historia_images')
+    
+    @staticmethod
+    def _get_rows():
+        """Todas las filas de la tabla; se leen una vez y se sirven desde la caché"""
+        def cargar():
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT setting_key, image_url, description FROM historia_images')
+            rows = tuple(cursor.fetchall())
+            conn.close()
+            return rows
+        return cache_configuracion.obtener(('historia_images',), cargar)
     
     @staticmethod
     def get_image(key):
         """Obtiene la URL de una imagen por su clave"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT image_url FROM historia_images WHERE setting_key = ?', (key,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        for row in HistoriaImages._get_rows():
+            if row[0] == key:
+                return row[1]
+        return None
     
     @staticmethod
     def set_image(key, url, description=''):
@@ -45,20 +58,23 @@ class HistoriaImages:
         ''', (key, url, description))
         conn.commit()
         conn.close()
+        cache_configuracion.invalidar('historia_images')
     
     @staticmethod
     def get_all_images():
-        """Obtiene todas las imágenes configuradas"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT setting_key, image_url, description FROM historia_images')
-        results = cursor.fetchall()
-        conn.close()
+        """
+        Obtiene todas las imágenes configuradas. 'url' es la guardada; para
+        mostrarlas, 'src' es la variante hero de las imágenes subidas y
+        'srcset' sus variantes WebP (vacío si es externa o aún no las tiene).
+        """
+        results = HistoriaImages._get_rows()
         
         images = {}
         for row in results:
             images[row[0]] = {
                 'url': row[1],
+                'src': variante_url(row[1], 'hero'),
+                'srcset': srcset(row[1]),
                 'description': row[2]
             }
         return images
@@ -1,7 +1,14 @@
 from datetime import datetime
 from . import get_db_connection
+from .filas import ModeloFila, FechaPerezosa, cursor_filas
 
-class Insumo:
+class Insumo(ModeloFila):
+    CAMPOS = ('id', 'nombre', 'descripcion', 'cantidad_actual', 'cantidad_minima', 'unidad_medida', 'precio_compra',
+              'proveedor', 'fecha_actualizacion')
+    __slots__ = CAMPOS[:-1] + ('_fecha_actualizacion',)
+    
+    fecha_actualizacion = FechaPerezosa()
+    
     def __init__(self, id=None, nombre=None, descripcion=None, cantidad_actual=0, cantidad_minima=0, unidad_medida='kg', precio_compra=None, proveedor=None, fecha_actualizacion=None):
         self.id = id
         self.nombre = nombre
@@ -56,36 +63,34 @@ class Insumo:
     def get_all(cls):
         """Obtiene todos los insumos"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM insumos ORDER BY nombre')
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return cls.from_rows(rows)
     
     @classmethod
     def get_low_stock(cls):
         """Obtiene insumos con stock bajo"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM insumos WHERE cantidad_actual <= cantidad_minima ORDER BY nombre')
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return cls.from_rows(rows)
     
     @classmethod
     def find_by_id(cls, insumo_id):
         """Busca un insumo por ID"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM insumos WHERE id = ?', (insumo_id,))
         row = cursor.fetchone()
         conn.close()
         
-        if row:
-            return cls(*row)
-        return None
+        return cls.from_row(row)
     
     def update_cantidad(self, nueva_cantidad):
         """Actualiza la cantidad del insumo"""
@@ -0,0 +1,175 @@
+"""
+Esquema inicial: todas las tablas que antes creaba init_db con los
+create_table de cada modelo. Usa IF NOT EXISTS para poder aplicarse sobre
+bases de datos creadas antes de existir las migraciones.
+"""
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            telefono TEXT,
+            direccion TEXT,
+            rol TEXT DEFAULT 'cliente' CHECK(rol IN ('cliente', 'admin', 'vendedor', 'chef')),
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activo BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            activo BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            precio DECIMAL(10,2) NOT NULL,
+            categoria_id INTEGER,
+            stock INTEGER DEFAULT 0,
+            imagen TEXT,
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS carrito (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            producto_id INTEGER,
+            cantidad INTEGER DEFAULT 1,
+            fecha_agregado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+            FOREIGN KEY (producto_id) REFERENCES productos (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS favoritos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            producto_id INTEGER,
+            fecha_agregado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+            FOREIGN KEY (producto_id) REFERENCES productos (id),
+            UNIQUE(usuario_id, producto_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resenas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            producto_id INTEGER,
+            calificacion INTEGER CHECK(calificacion >= 1 AND calificacion <= 5),
+            comentario TEXT,
+            fecha_resena TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id),
+            FOREIGN KEY (producto_id) REFERENCES productos (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mensajes_chat (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            mensaje TEXT NOT NULL,
+            respuesta TEXT,
+            fecha_mensaje TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            total DECIMAL(10,2) NOT NULL,
+            estado TEXT DEFAULT 'pendiente' CHECK(estado IN ('pendiente', 'preparando', 'listo', 'entregado', 'cancelado')),
+            fecha_pedido TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            direccion_entrega TEXT,
+            telefono_contacto TEXT,
+            notas TEXT,
+            metodo_pago TEXT DEFAULT 'efectivo',
+            fecha_entrega TEXT,
+            hora_entrega TEXT,
+            comprobante_pago TEXT,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS detalle_pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pedido_id INTEGER,
+            producto_id INTEGER,
+            cantidad INTEGER NOT NULL,
+            precio_unitario DECIMAL(10,2) NOT NULL,
+            FOREIGN KEY (pedido_id) REFERENCES pedidos (id),
+            FOREIGN KEY (producto_id) REFERENCES productos (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS insumos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            cantidad_actual DECIMAL(10,2) DEFAULT 0,
+            cantidad_minima DECIMAL(10,2) DEFAULT 0,
+            unidad_medida TEXT DEFAULT 'kg',
+            precio_compra DECIMAL(10,2),
+            proveedor TEXT,
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS movimientos_inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            insumo_id INTEGER,
+            tipo_movimiento TEXT CHECK(tipo_movimiento IN ('entrada', 'salida')),
+            cantidad DECIMAL(10,2) NOT NULL,
+            motivo TEXT,
+            usuario_id INTEGER,
+            fecha_movimiento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (insumo_id) REFERENCES insumos (id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS system_settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            value TEXT,
+            description TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO system_settings (key, value, description)
+        VALUES (?, ?, ?)
+    ''', ('hero_background_url', '/placeholder.svg?height=600&width=1200', 'URL de la imagen de fondo del hero en la página de inicio'))
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historia_images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            setting_key TEXT UNIQUE NOT NULL,
+            image_url TEXT NOT NULL,
+            description TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
@@ -0,0 +1,20 @@
+"""
+Columnas de pedidos que se agregaron después de crear la tabla. Reemplaza a
+scripts/add_metodo_pago_column.py, scripts/agregar_columnas_faltantes.py y
+scripts/complete_migration.py para bases de datos antiguas.
+"""
+
+COLUMNAS = [
+    ('metodo_pago', "TEXT DEFAULT 'efectivo'"),
+    ('fecha_entrega', 'TEXT'),
+    ('hora_entrega', 'TEXT'),
+    ('comprobante_pago', 'TEXT')
+]
+
+def upgrade(cursor):
+    cursor.execute('PRAGMA table_info(pedidos)')
+    existentes = {columna[1] for columna in cursor.fetchall()}
+
+    for nombre, tipo in COLUMNAS:
+        if nombre not in existentes:
+            cursor.execute(f'ALTER TABLE pedidos ADD COLUMN {nombre} {tipo}')
@@ -0,0 +1,19 @@
+"""
+Índices secundarios para las consultas más frecuentes.
+favoritos(usuario_id, producto_id) ya está cubierto por su restricción UNIQUE.
+"""
+
+INDICES = [
+    ('idx_pedidos_usuario_fecha', 'pedidos', 'usuario_id, fecha_pedido'),
+    ('idx_pedidos_estado_fecha', 'pedidos', 'estado, fecha_pedido'),
+    ('idx_pedidos_fecha', 'pedidos', 'fecha_pedido'),
+    ('idx_detalle_pedidos_pedido', 'detalle_pedidos', 'pedido_id'),
+    ('idx_detalle_pedidos_producto', 'detalle_pedidos', 'producto_id'),
+    ('idx_movimientos_insumo_fecha', 'movimientos_inventario', 'insumo_id, fecha_movimiento'),
+    ('idx_carrito_usuario_producto', 'carrito', 'usuario_id, producto_id'),
+    ('idx_resenas_producto', 'resenas', 'producto_id')
+]
+
+def upgrade(cursor):
+    for nombre, tabla, columnas in INDICES:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas})')
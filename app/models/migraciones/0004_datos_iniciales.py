@@ -0,0 +1,73 @@
+"""
+Datos iniciales: usuarios de prueba, categorías, productos e insumos.
+Solo inserta lo que falta, igual que el antiguo _seed_initial_data.
+
+Usa SQL directo sobre el cursor de la migración (los métodos create de los
+modelos abren su propia transacción y confirmarían la migración a medias).
+"""
+from app.models.usuario import Usuario
+
+USUARIOS = [
+    {'nombre': 'Administrador', 'email': 'admin@migasdeoro.com', 'password': 'admin123',
+     'telefono': None, 'direccion': None, 'rol': 'admin'},
+    {'nombre': 'Vendedor', 'email': 'vendedor@migasdeoro.com', 'password': 'vendedor123',
+     'telefono': '555-0123', 'direccion': 'Tienda Principal', 'rol': 'vendedor'},
+    {'nombre': 'Cliente Test', 'email': 'cliente@test.com', 'password': 'cliente123',
+     'telefono': '555-0456', 'direccion': 'Dirección de prueba', 'rol': 'cliente'}
+]
+
+CATEGORIAS = [
+    ('Panes', 'Variedad de panes frescos'),
+    ('Pasteles', 'Pasteles y tortas para ocasiones especiales'),
+    ('Galletas', 'Galletas artesanales'),
+    ('Bebidas', 'Bebidas calientes y frías'),
+    ('Desayunos', 'Opciones para el desayuno')
+]
+
+# (nombre, descripcion, precio, categoria_id, stock)
+PRODUCTOS = [
+    ('Pan Francés', 'Pan francés tradicional recién horneado', 2.50, 1, 50),
+    ('Croissant', 'Croissant de mantequilla artesanal', 3.00, 1, 30),
+    ('Torta de Chocolate', 'Deliciosa torta de chocolate con cobertura', 25.00, 2, 10),
+    ('Galletas de Avena', 'Galletas caseras de avena con pasas', 1.50, 3, 40),
+    ('Café Americano', 'Café americano recién preparado', 2.00, 4, 100),
+    ('Sandwich de Jamón', 'Sandwich de jamón y queso en pan artesanal', 5.50, 5, 25)
+]
+
+# (nombre, descripcion, cantidad_actual, cantidad_minima, unidad_medida, precio_compra, proveedor)
+INSUMOS = [
+    ('Harina de Trigo', 'Harina de trigo para panificación', 50.0, 10.0, 'kg', 1.20, 'Molinos del Sur'),
+    ('Azúcar', 'Azúcar blanca refinada', 25.0, 5.0, 'kg', 0.80, 'Azucarera Nacional'),
+    ('Mantequilla', 'Mantequilla sin sal para repostería', 10.0, 2.0, 'kg', 4.50, 'Lácteos Premium'),
+    ('Huevos', 'Huevos frescos de granja', 200.0, 50.0, 'unidades', 0.15, 'Granja San José'),
+    ('Levadura', 'Levadura fresca para pan', 5.0, 1.0, 'kg', 3.00, 'Levaduras Industriales')
+]
+
+def _tabla_vacia(cursor, tabla):
+    cursor.execute(f'SELECT COUNT(*) FROM {tabla}')
+    return cursor.fetchone()[0] == 0
+
+def upgrade(cursor):
+    for usuario in USUARIOS:
+        cursor.execute('SELECT 1 FROM usuarios WHERE email = ?', (usuario['email'],))
+        if not cursor.fetchone():
+            cursor.execute('''
+                INSERT INTO usuarios (nombre, email, password, telefono, direccion, rol)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (usuario['nombre'], usuario['email'], Usuario.hash_password(usuario['password']),
+                  usuario['telefono'], usuario['direccion'], usuario['rol']))
+
+    if _tabla_vacia(cursor, 'categorias'):
+        cursor.executemany('INSERT INTO categorias (nombre, descripcion) VALUES (?, ?)', CATEGORIAS)
+
+    if _tabla_vacia(cursor, 'productos'):
+        cursor.executemany('''
+            INSERT INTO productos (nombre, descripcion, precio, categoria_id, stock)
+            VALUES (?, ?, ?, ?, ?)
+        ''', PRODUCTOS)
+
+    if _tabla_vacia(cursor, 'insumos'):
+        cursor.executemany('''
+            INSERT INTO insumos (nombre, descripcion, cantidad_actual, cantidad_minima, unidad_medida, precio_compra, proveedor)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', INSUMOS)
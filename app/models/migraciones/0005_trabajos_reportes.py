@@ -0,0 +1,23 @@
+"""
+Cola de trabajos de reportes PDF (ver app/utils/cola_reportes.py).
+"""
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trabajos_reportes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            parametros TEXT NOT NULL DEFAULT '{}',
+            estado TEXT DEFAULT 'pendiente' CHECK(estado IN ('pendiente', 'en_proceso', 'completado', 'error')),
+            usuario_id INTEGER,
+            archivo TEXT,
+            error TEXT,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_inicio TIMESTAMP,
+            fecha_fin TIMESTAMP,
+            espera_ms REAL,
+            duracion_ms REAL,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_trabajos_reportes_estado ON trabajos_reportes (estado, id)')
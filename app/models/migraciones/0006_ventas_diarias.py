@@ -0,0 +1,31 @@
+"""
+Resumen diario de ventas por estado (ventas_diarias), mantenido por el modelo
+Venta en la misma transacción que modifica cada pedido. Se llena con el
+historial existente; scripts/recalcular_resumenes_ventas.py lo reconstruye.
+"""
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            fecha TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            pedidos INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            items INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, estado)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('DELETE FROM ventas_diarias')
+    cursor.execute('''
+        INSERT INTO ventas_diarias (fecha, estado, pedidos, total, items)
+        SELECT DATE(p.fecha_pedido), p.estado, COUNT(*), COALESCE(SUM(p.total), 0), COALESCE(SUM(d.items), 0)
+        FROM pedidos p
+        LEFT JOIN (
+            SELECT pedido_id, SUM(cantidad) as items
+            FROM detalle_pedidos
+            GROUP BY pedido_id
+        ) d ON d.pedido_id = p.id
+        WHERE p.fecha_pedido IS NOT NULL
+        GROUP BY DATE(p.fecha_pedido), p.estado
+    ''')
@@ -0,0 +1,31 @@
+"""
+Unidades e ingresos por producto y mes (producto_ventas_mensuales), sin contar
+pedidos cancelados. Lo mantiene el modelo Venta al crear o cancelar pedidos y
+sirve el ranking de Producto.get_mas_vendidos_mes con una consulta top-K.
+"""
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS producto_ventas_mensuales (
+            mes TEXT NOT NULL,
+            producto_id INTEGER NOT NULL,
+            unidades INTEGER NOT NULL DEFAULT 0,
+            ingresos REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (mes, producto_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_producto_ventas_mes_unidades
+        ON producto_ventas_mensuales (mes, unidades DESC)
+    ''')
+
+    cursor.execute('DELETE FROM producto_ventas_mensuales')
+    cursor.execute('''
+        INSERT INTO producto_ventas_mensuales (mes, producto_id, unidades, ingresos)
+        SELECT strftime('%Y-%m', p.fecha_pedido), dp.producto_id,
+               SUM(dp.cantidad), SUM(dp.cantidad * dp.precio_unitario)
+        FROM pedidos p
+        JOIN detalle_pedidos dp ON dp.pedido_id = p.id
+        WHERE p.fecha_pedido IS NOT NULL AND p.estado != 'cancelado'
+        GROUP BY strftime('%Y-%m', p.fecha_pedido), dp.producto_id
+    ''')
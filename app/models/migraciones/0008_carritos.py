@@ -0,0 +1,44 @@
+"""
+Carrito de compras en la base de datos (ver app/models/carrito.py).
+
+carrito_items guarda los productos de cada carrito y carritos la cantidad
+total de items, para que el contador sea una sola lectura por clave primaria.
+La clave es 'u:<usuario_id>' con sesión iniciada o 's:<token>' para
+visitantes. Los items de la tabla carrito anterior pasan a los carritos de
+sus usuarios.
+"""
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS carrito_items (
+            clave TEXT NOT NULL,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL CHECK(cantidad > 0),
+            fecha_agregado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (clave, producto_id),
+            FOREIGN KEY (producto_id) REFERENCES productos (id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS carritos (
+            clave TEXT PRIMARY KEY,
+            items INTEGER NOT NULL DEFAULT 0,
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_carritos_fecha ON carritos (fecha_actualizacion)')
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO carrito_items (clave, producto_id, cantidad)
+        SELECT 'u:' || usuario_id, producto_id, SUM(cantidad)
+        FROM carrito
+        WHERE usuario_id IS NOT NULL AND producto_id IS NOT NULL
+        GROUP BY usuario_id, producto_id
+        HAVING SUM(cantidad) > 0
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO carritos (clave, items)
+        SELECT clave, SUM(cantidad)
+        FROM carrito_items
+        GROUP BY clave
+    ''')
@@ -0,0 +1,74 @@
+"""
+Índices de texto completo (FTS5) para buscar productos y recetas.
+
+productos_fts y recetas_fts son tablas de contenido externo: guardan solo el
+índice y leen el texto de productos y recetas. Los triggers las mantienen al
+día con cada INSERT, UPDATE y DELETE. El tokenizador unicode61 con
+remove_diacritics 2 ignora mayúsculas y tildes ("frances" encuentra
+"Francés"), y los índices de prefijo de 2 y 3 letras aceleran la búsqueda
+mientras se escribe (ver app/utils/busqueda.py).
+
+La tabla recetas (Receta.create_table) no estaba en el esquema inicial; se
+crea aquí para poder indexarla.
+"""
+
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+# tabla -> columnas indexadas
+INDICES = {
+    'productos': ('nombre', 'descripcion'),
+    'recetas': ('nombre', 'descripcion', 'ingredientes')
+}
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recetas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            ingredientes TEXT,
+            instrucciones TEXT,
+            tiempo_preparacion INTEGER,
+            porciones INTEGER,
+            dificultad TEXT,
+            imagen TEXT,
+            categoria_id INTEGER,
+            activo BOOLEAN DEFAULT 1,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+        )
+    ''')
+
+    for tabla, columnas in INDICES.items():
+        fts = f'{tabla}_fts'
+        lista = ', '.join(columnas)
+        nuevas = ', '.join(f'new.{columna}' for columna in columnas)
+        viejas = ', '.join(f'old.{columna}' for columna in columnas)
+
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {lista},
+                content='{tabla}', content_rowid='id',
+                tokenize='{TOKENIZADOR}', prefix='2 3'
+            )
+        ''')
+
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabla}_fts_insert AFTER INSERT ON {tabla} BEGIN
+                INSERT INTO {fts} (rowid, {lista}) VALUES (new.id, {nuevas});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabla}_fts_delete AFTER DELETE ON {tabla} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejas});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabla}_fts_update AFTER UPDATE OF {lista} ON {tabla} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejas});
+                INSERT INTO {fts} (rowid, {lista}) VALUES (new.id, {nuevas});
+            END
+        ''')
+
+        # Indexar las filas existentes
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
@@ -0,0 +1,17 @@
+"""
+Índices para los listados paginados por cursor (app/utils/paginacion.py): cada
+uno cubre el filtro y el orden de un listado, así la página se lee del índice
+sin ordenar la tabla. Los índices de SQLite terminan en el rowid, que hace de
+desempate (id) en el orden.
+"""
+
+INDICES = [
+    ('idx_productos_activo_fecha', 'productos', 'activo, fecha_creacion'),
+    ('idx_productos_categoria_fecha', 'productos', 'categoria_id, activo, fecha_creacion'),
+    ('idx_usuarios_rol_nombre', 'usuarios', 'activo, rol, nombre'),
+    ('idx_movimientos_fecha', 'movimientos_inventario', 'fecha_movimiento')
+]
+
+def upgrade(cursor):
+    for nombre, tabla, columnas in INDICES:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas})')
@@ -0,0 +1,101 @@
+"""
+Migraciones versionadas del esquema de la base de datos.
+
+Cada archivo NNNN_descripcion.py de este paquete define upgrade(cursor) y se
+aplica una sola vez, en orden de número. Las versiones aplicadas quedan en la
+tabla schema_version, así que al iniciar la aplicación basta una consulta para
+saber si el esquema está al día.
+
+Para cambiar el esquema se agrega un archivo con el número siguiente; una
+migración ya publicada nunca se modifica.
+"""
+import importlib
+import pkgutil
+import re
+import sqlite3
+from .. import get_db_connection
+
+_PATRON_MIGRACION = re.compile(r'^(\d{4})_\w+$')
+
+def listar_migraciones():
+    """Retorna [(version, nombre_modulo)] de todas las migraciones, en orden"""
+    migraciones = []
+    for modulo in pkgutil.iter_modules(__path__):
+        coincidencia = _PATRON_MIGRACION.match(modulo.name)
+        if coincidencia:
+            migraciones.append((int(coincidencia.group(1)), modulo.name))
+    migraciones.sort()
+
+    versiones = [version for version, _ in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise RuntimeError('Hay dos migraciones con el mismo número de versión')
+    return migraciones
+
+def version_actual(cursor):
+    """Última versión aplicada (0 si la base de datos nunca se migró)"""
+    try:
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+    except sqlite3.OperationalError as e:
+        if 'no such table' in str(e):
+            return 0
+        raise
+    return cursor.fetchone()[0]
+
+def migrar():
+    """
+    Aplica las migraciones pendientes y retorna los nombres de las aplicadas.
+
+    Cada migración corre en su propia transacción BEGIN IMMEDIATE junto con su
+    registro en schema_version: si falla no queda a medias, y si varios procesos
+    arrancan a la vez solo uno la aplica (los demás ven la versión nueva al
+    obtener el bloqueo).
+    """
+    migraciones = listar_migraciones()
+    ultima = migraciones[-1][0] if migraciones else 0
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    aplicadas = []
+
+    try:
+        # Verificación rápida: con el esquema al día no se ejecuta nada más
+        if version_actual(cursor) >= ultima:
+            return aplicadas
+
+        for version, nombre in migraciones:
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        nombre TEXT NOT NULL,
+                        fecha_aplicacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                if version <= version_actual(cursor):
+                    conn.rollback()
+                    continue
+
+                modulo = importlib.import_module(f'{__name__}.{nombre}')
+                modulo.upgrade(cursor)
+                cursor.execute('INSERT INTO schema_version (version, nombre) VALUES (?, ?)',
+                               (version, nombre))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            aplicadas.append(nombre)
+
+        if aplicadas:
+            # Estadísticas para el planificador después de crear tablas e índices
+            cursor.execute('PRAGMA optimize')
+    finally:
+        conn.close()
+
+    if aplicadas:
+        # Las migraciones pueden haber insertado datos directamente con SQL
+        from app.utils.cache import cache_catalogo, cache_configuracion
+        cache_catalogo.invalidar()
+        cache_configuracion.invalidar()
+
+    return aplicadas
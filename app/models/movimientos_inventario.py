@@ -1,5 +1,6 @@
 from datetime import datetime
 from . import get_db_connection
+from app.utils.paginacion import Pagina, decodificar_cursor, condicion_cursor
 
 class MovimientoInventario:
     def __init__(self, id=None, insumo_id=None, tipo_movimiento=None, cantidad=None, motivo=None, usuario_id=None, fecha_movimiento=None):
@@ -67,9 +68,29 @@ class MovimientoInventario:
             
             insumo.update_cantidad(nueva_cantidad)
     
+    @staticmethod
+    def _filtros(insumo_id, tipo_movimiento):
+        """Condiciones WHERE y parámetros comunes a los listados de movimientos"""
+        params = []
+        conditions = []
+        
+        if insumo_id:
+            conditions.append('m.insumo_id = ?')
+            params.append(insumo_id)
+        
+        if tipo_movimiento:
+            conditions.append('m.tipo_movimiento = ?')
+            params.append(tipo_movimiento)
+        
+        return conditions, params
+    
     @classmethod
-    def get_all(cls, insumo_id=None, tipo_movimiento=None, limit=None):
-        """Obtiene todos los movimientos, opcionalmente filtrados"""
+    def get_all(cls, insumo_id=None, tipo_movimiento=None, limit=None, despues=None):
+        """
+        Obtiene todos los movimientos (los más recientes primero), opcionalmente
+        filtrados. despues son los valores (fecha_movimiento, id) de la última
+        fila ya mostrada; ver get_pagina.
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
         
@@ -79,21 +100,16 @@ class MovimientoInventario:
             JOIN insumos i ON m.insumo_id = i.id
             LEFT JOIN usuarios u ON m.usuario_id = u.id
         '''
-        params = []
-        conditions = []
-        
-        if insumo_id:
-            conditions.append('m.insumo_id = ?')
-            params.append(insumo_id)
+        conditions, params = cls._filtros(insumo_id, tipo_movimiento)
         
-        if tipo_movimiento:
-            conditions.append('m.tipo_movimiento = ?')
-            params.append(tipo_movimiento)
+        if despues:
+            conditions.append(condicion_cursor(('m.fecha_movimiento', 'm.id')))
+            params.extend(despues)
         
         if conditions:
             query += ' WHERE ' + ' AND '.join(conditions)
         
-        query += ' ORDER BY m.fecha_movimiento DESC'
+        query += ' ORDER BY m.fecha_movimiento DESC, m.id DESC'
         
         if limit:
             query += ' LIMIT ?'
@@ -105,6 +121,35 @@ class MovimientoInventario:
         
         return rows
     
+    @classmethod
+    def get_pagina(cls, insumo_id=None, tipo_movimiento=None, limite=20, cursor=None):
+        """
+        Una página de movimientos continuando desde el cursor de la página
+        anterior (ver app/utils/paginacion.py). Las filas son las mismas que
+        retorna get_all. Lanza ValueError si el cursor no es válido.
+        """
+        rows = cls.get_all(insumo_id=insumo_id, tipo_movimiento=tipo_movimiento,
+                           limit=limite + 1, despues=decodificar_cursor(cursor, 2))
+        return Pagina.desde_filas(rows, limite, lambda row: (row[6], row[0]), list)
+    
+    @classmethod
+    def contar(cls, insumo_id=None, tipo_movimiento=None):
+        """Cantidad de movimientos, con los mismos filtros que get_all"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        query = 'SELECT COUNT(*) FROM movimientos_inventario m'
+        conditions, params = cls._filtros(insumo_id, tipo_movimiento)
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        cursor.execute(query, params)
+        total = cursor.fetchone()[0]
+        conn.close()
+        
+        return total
+    
     @classmethod
     def get_resumen_movimientos(cls, fecha_inicio=None, fecha_fin=None):
         """Obtiene un resumen de movimientos por período"""
@@ -1,7 +1,12 @@
 from datetime import datetime
 from . import get_db_connection
+from .filas import ModeloFila, FechaPerezosa, cursor_filas
+from app.utils.cache import cache_catalogo
+from app.utils.busqueda import expresion_fts
+from app.utils.paginacion import Pagina, decodificar_cursor, condicion_cursor
+from app.utils.imagenes import es_subida, variante_url, srcset
 
-class Producto:
+class Producto(ModeloFila):
     """
     Modelo para productos del catálogo.
     
@@ -16,6 +21,11 @@ class Producto:
     y queda congelado permanentemente para ese pedido específico.
     """
     
+    CAMPOS = ('id', 'nombre', 'descripcion', 'precio', 'categoria_id', 'stock', 'imagen', 'activo', 'fecha_creacion')
+    __slots__ = CAMPOS[:-1] + ('_fecha_creacion', 'total_vendido')
+    
+    fecha_creacion = FechaPerezosa()
+    
     def __init__(self, id=None, nombre=None, descripcion=None, precio=None, categoria_id=None, stock=0, imagen=None, activo=True, fecha_creacion=None):
         self.id = id
         self.nombre = nombre
@@ -29,13 +39,20 @@ class Producto:
     
     @property
     def imagen_url(self):
-        """Retorna la URL de la imagen del producto"""
+        """Retorna la URL de la imagen del producto (la variante de tarjeta si es una imagen subida)"""
         if self.imagen and self.imagen.startswith('http'):
             return self.imagen
+        elif es_subida(self.imagen):
+            return variante_url(self.imagen, 'tarjeta')
         else:
             # Generate placeholder with product name for better visual identification
             return f'/placeholder.svg?height=200&width=300'
     
+    @property
+    def imagen_srcset(self):
+        """srcset WebP de la imagen subida, vacío si es externa o aún no tiene variantes"""
+        return srcset(self.imagen)
+    
     @staticmethod
     def create_table():
         """Crea la tabla de productos"""
@@ -123,13 +140,20 @@ class Producto:
         producto_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        cache_catalogo.invalidar('productos')
         return producto_id
     
     @classmethod
     def get_all(cls, categoria_id=None, limit=None):
         """Obtiene todos los productos, opcionalmente filtrados por categoría"""
+        rows = cache_catalogo.obtener(('productos', 'lista', categoria_id, limit),
+                                      lambda: cls._get_all_rows(categoria_id, limit))
+        return cls.from_rows(rows)
+    
+    @staticmethod
+    def _get_all_rows(categoria_id, limit):
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         
         query = 'SELECT * FROM productos WHERE activo = 1'
         params = []
@@ -138,74 +162,248 @@ class Producto:
             query += ' AND categoria_id = ?'
             params.append(categoria_id)
         
-        query += ' ORDER BY fecha_creacion DESC'
+        query += ' ORDER BY fecha_creacion DESC, id DESC'
         
         if limit:
             query += ' LIMIT ?'
             params.append(limit)
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
+        rows = tuple(cursor.fetchall())
+        conn.close()
+        
+        return rows
+    
+    @classmethod
+    def get_pagina(cls, categoria_id=None, limite=24, cursor=None):
+        """
+        Una página del catálogo en el mismo orden que get_all (más nuevos
+        primero), continuando desde el cursor de la página anterior (ver
+        app/utils/paginacion.py). Lanza ValueError si el cursor no es válido.
+        """
+        despues = decodificar_cursor(cursor, 2)
+        rows = cache_catalogo.obtener(('productos', 'pagina', categoria_id, limite, cursor),
+                                      lambda: cls._get_pagina_rows(categoria_id, limite, despues))
+        return Pagina.desde_filas(rows, limite, lambda row: (row['fecha_creacion'], row['id']), cls.from_rows)
+    
+    @staticmethod
+    def _get_pagina_rows(categoria_id, limite, despues):
+        conn = get_db_connection()
+        cursor = cursor_filas(conn)
+        
+        query = 'SELECT * FROM productos WHERE activo = 1'
+        params = []
+        
+        if categoria_id:
+            query += ' AND categoria_id = ?'
+            params.append(categoria_id)
+        
+        if despues:
+            query += ' AND ' + condicion_cursor(('fecha_creacion', 'id'))
+            params.extend(despues)
+        
+        query += ' ORDER BY fecha_creacion DESC, id DESC LIMIT ?'
+        params.append(limite + 1)
+        
+        cursor.execute(query, params)
+        rows = tuple(cursor.fetchall())
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return rows
+    
+    @classmethod
+    def contar(cls, categoria_id=None):
+        """Cantidad de productos activos, opcionalmente de una categoría"""
+        return cache_catalogo.obtener(('productos', 'total', categoria_id),
+                                      lambda: cls._contar(categoria_id))
+    
+    @staticmethod
+    def _contar(categoria_id):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        if categoria_id:
+            cursor.execute('SELECT COUNT(*) FROM productos WHERE activo = 1 AND categoria_id = ?', (categoria_id,))
+        else:
+            cursor.execute('SELECT COUNT(*) FROM productos WHERE activo = 1')
+        total = cursor.fetchone()[0]
+        conn.close()
+        return total
+    
+    @staticmethod
+    def get_resumen_stock(stock_bajo=10, stock_alto=50):
+        """Conteos para la gestión de productos: activos, inactivos y por nivel de stock"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COALESCE(SUM(activo = 1), 0),
+                   COALESCE(SUM(activo = 0), 0),
+                   COALESCE(SUM(activo = 1 AND stock <= ?), 0),
+                   COALESCE(SUM(activo = 1 AND stock > ?), 0)
+            FROM productos
+        ''', (stock_bajo, stock_alto))
+        activos, inactivos, bajo, alto = cursor.fetchone()
+        conn.close()
+        return {'activos': activos, 'inactivos': inactivos, 'stock_bajo': bajo, 'stock_alto': alto}
     
     @classmethod
     def find_by_id(cls, producto_id):
         """Busca un producto por ID"""
+        try:
+            producto_id = int(producto_id)
+        except (TypeError, ValueError):
+            return None
+        
+        row = cache_catalogo.obtener(('productos', 'id', producto_id),
+                                     lambda: cls._find_row(producto_id))
+        return cls.from_row(row)
+    
+    @staticmethod
+    def _find_row(producto_id):
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM productos WHERE id = ? AND activo = 1', (producto_id,))
         row = cursor.fetchone()
         conn.close()
+        return row
+    
+    @classmethod
+    def find_many(cls, producto_ids):
+        """
+        Busca varios productos activos; los que no están en caché se piden en
+        una sola consulta. Retorna un diccionario {id: Producto}; los IDs que
+        no existen (o están inactivos) simplemente no aparecen.
+        """
+        claves = {('productos', 'id', int(producto_id)) for producto_id in producto_ids}
+        if not claves:
+            return {}
+        
+        rows = cache_catalogo.obtener_varios(claves, cls._find_many_rows)
+        return {clave[2]: cls.from_row(row) for clave, row in rows.items() if row}
+    
+    @staticmethod
+    def _find_many_rows(claves):
+        ids = [clave[2] for clave in claves]
+        conn = get_db_connection()
+        cursor = cursor_filas(conn)
         
-        if row:
-            return cls(*row)
-        return None
+        rows = {}
+        # Por lotes para no superar el límite de parámetros de SQLite
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            placeholders = ','.join('?' * len(lote))
+            cursor.execute(f'SELECT * FROM productos WHERE id IN ({placeholders}) AND activo = 1', lote)
+            for row in cursor.fetchall():
+                rows[('productos', 'id', row['id'])] = row
+        
+        conn.close()
+        return rows
     
     @classmethod
-    def search(cls, query):
-        """Busca productos por nombre o descripción"""
+    def search(cls, query, categoria_id=None, limite=None, offset=0):
+        """
+        Busca productos activos por nombre o descripción en productos_fts,
+        los más relevantes primero (BM25, el nombre pesa más que la
+        descripción). Ignora tildes y mayúsculas y cada palabra se busca como
+        prefijo (ver app/utils/busqueda.py).
+        """
+        expresion = expresion_fts(query)
+        if not expresion:
+            return []
+        
+        rows = cache_catalogo.obtener(('productos', 'busqueda', expresion, categoria_id, limite, offset),
+                                      lambda: cls._search_rows(expresion, categoria_id, limite, offset))
+        return cls.from_rows(rows)
+    
+    @staticmethod
+    def _search_rows(expresion, categoria_id, limite, offset):
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM productos 
-            WHERE (nombre LIKE ? OR descripcion LIKE ?) AND activo = 1
-            ORDER BY nombre
-        ''', (f'%{query}%', f'%{query}%'))
-        rows = cursor.fetchall()
+        cursor = cursor_filas(conn)
+        
+        query = '''
+            SELECT p.* FROM productos_fts
+            JOIN productos p ON p.id = productos_fts.rowid
+            WHERE productos_fts MATCH ? AND p.activo = 1
+        '''
+        params = [expresion]
+        
+        if categoria_id:
+            query += ' AND p.categoria_id = ?'
+            params.append(categoria_id)
+        
+        query += ' ORDER BY bm25(productos_fts, 10.0, 1.0), p.nombre LIMIT ? OFFSET ?'
+        params.extend([limite if limite else -1, offset])
+        
+        cursor.execute(query, params)
+        rows = tuple(cursor.fetchall())
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return rows
     
     @classmethod
-    def get_mas_vendidos_mes(cls, año, mes):
-        """Obtiene los productos más vendidos del mes"""
+    def contar_busqueda(cls, query, categoria_id=None):
+        """Cantidad de productos activos que coinciden con la búsqueda (para paginar)"""
+        expresion = expresion_fts(query)
+        if not expresion:
+            return 0
+        
+        return cache_catalogo.obtener(('productos', 'busqueda_total', expresion, categoria_id),
+                                      lambda: cls._contar_busqueda(expresion, categoria_id))
+    
+    @staticmethod
+    def _contar_busqueda(expresion, categoria_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT p.*, COALESCE(SUM(dp.cantidad), 0) as total_vendido
-            FROM productos p
-            LEFT JOIN detalle_pedidos dp ON p.id = dp.producto_id
-            LEFT JOIN pedidos pe ON dp.pedido_id = pe.id
-                AND strftime('%Y', pe.fecha_pedido) = ? 
-                AND strftime('%m', pe.fecha_pedido) = ?
-                AND pe.estado != 'cancelado'
-            WHERE p.activo = 1
-            GROUP BY p.id
-            ORDER BY total_vendido DESC
-            LIMIT 10
-        ''', (str(año), f"{mes:02d}"))
+        query = '''
+            SELECT COUNT(*) FROM productos_fts
+            JOIN productos p ON p.id = productos_fts.rowid
+            WHERE productos_fts MATCH ? AND p.activo = 1
+        '''
+        params = [expresion]
+        
+        if categoria_id:
+            query += ' AND p.categoria_id = ?'
+            params.append(categoria_id)
         
+        cursor.execute(query, params)
+        total = cursor.fetchone()[0]
+        conn.close()
+        
+        return total
+    
+    @classmethod
+    def get_mas_vendidos_mes(cls, año, mes, limite=10):
+        """
+        Obtiene los productos más vendidos del mes desde producto_ventas_mensuales.
+        Si se vendieron menos de 'limite' productos, la lista se completa con
+        otros productos activos en 0 vendidos.
+        """
+        conn = get_db_connection()
+        cursor = cursor_filas(conn)
+        
+        # Top-K: el índice (mes, unidades DESC) entrega el ranking ya ordenado
+        cursor.execute('''
+            SELECT p.*, v.unidades as total_vendido
+            FROM producto_ventas_mensuales v
+            JOIN productos p ON p.id = v.producto_id
+            WHERE v.mes = ? AND v.unidades > 0 AND p.activo = 1
+            ORDER BY v.unidades DESC
+            LIMIT ?
+        ''', (f'{año:04d}-{mes:02d}', limite))
         rows = cursor.fetchall()
+        
+        if len(rows) < limite:
+            vendidos = [row['id'] for row in rows]
+            excluir = f"AND id NOT IN ({','.join('?' * len(vendidos))})" if vendidos else ''
+            cursor.execute(f'SELECT *, 0 as total_vendido FROM productos WHERE activo = 1 {excluir} ORDER BY id LIMIT ?',
+                           vendidos + [limite - len(rows)])
+            rows += cursor.fetchall()
+        
         conn.close()
         
-        productos = []
-        for row in rows:
-            producto = cls(*row[:9])  # Los primeros 9 campos son del producto
-            producto.total_vendido = row[9]
-            productos.append(producto)
+        productos = cls.from_rows(rows)
+        for producto, row in zip(productos, rows):
+            producto.total_vendido = row['total_vendido']
         
         return productos
     
@@ -240,6 +438,7 @@ class Producto:
         cursor.execute('UPDATE productos SET stock = stock + ? WHERE id = ?', (cantidad, self.id))
         conn.commit()
         conn.close()
+        cache_catalogo.invalidar('productos')
         self.stock += cantidad
     
     def update(self, data):
@@ -265,5 +464,6 @@ class Producto:
             values.append(self.id)
             cursor.execute(f'UPDATE productos SET {", ".join(fields)} WHERE id = ?', values)
             conn.commit()
+            cache_catalogo.invalidar('productos')
         
         conn.close()
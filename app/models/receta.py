@@ -1,5 +1,7 @@
 from datetime import datetime
 from . import get_db_connection
+from app.utils.busqueda import expresion_fts
+from app.utils.imagenes import es_subida, variante_url, srcset
 
 class Receta:
     """
@@ -25,12 +27,19 @@ class Receta:
     
     @property
     def imagen_url(self):
-        """Retorna la URL de la imagen de la receta"""
+        """Retorna la URL de la imagen de la receta (la variante de tarjeta si es una imagen subida)"""
         if self.imagen and self.imagen.startswith('http'):
             return self.imagen
+        elif es_subida(self.imagen):
+            return variante_url(self.imagen, 'tarjeta')
         else:
             return f'/placeholder.svg?height=200&width=300'
     
+    @property
+    def imagen_srcset(self):
+        """srcset WebP de la imagen subida, vacío si es externa o aún no tiene variantes"""
+        return srcset(self.imagen)
+    
     @staticmethod
     def create_table():
         """Crea la tabla de recetas"""
@@ -122,20 +131,48 @@ class Receta:
         return None
     
     @classmethod
-    def search(cls, query):
-        """Busca recetas por nombre o descripción"""
+    def search(cls, query, limite=None, offset=0):
+        """
+        Busca recetas activas por nombre, descripción o ingredientes en
+        recetas_fts, las más relevantes primero (ver app/utils/busqueda.py)
+        """
+        expresion = expresion_fts(query)
+        if not expresion:
+            return []
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT * FROM recetas 
-            WHERE (nombre LIKE ? OR descripcion LIKE ?) AND activo = 1
-            ORDER BY nombre
-        ''', (f'%{query}%', f'%{query}%'))
+            SELECT r.* FROM recetas_fts
+            JOIN recetas r ON r.id = recetas_fts.rowid
+            WHERE recetas_fts MATCH ? AND r.activo = 1
+            ORDER BY bm25(recetas_fts, 10.0, 2.0, 1.0), r.nombre
+            LIMIT ? OFFSET ?
+        ''', (expresion, limite if limite else -1, offset))
         rows = cursor.fetchall()
         conn.close()
         
         return [cls(*row) for row in rows]
     
+    @staticmethod
+    def contar_busqueda(query):
+        """Cantidad de recetas activas que coinciden con la búsqueda (para paginar)"""
+        expresion = expresion_fts(query)
+        if not expresion:
+            return 0
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM recetas_fts
+            JOIN recetas r ON r.id = recetas_fts.rowid
+            WHERE recetas_fts MATCH ? AND r.activo = 1
+        ''', (expresion,))
+        total = cursor.fetchone()[0]
+        conn.close()
+        
+        return total
+    
     def update(self, data):
         """Actualiza los datos de la receta"""
         conn = get_db_connection()
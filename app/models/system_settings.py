@@ -1,4 +1,5 @@
 from . import get_db_connection
+from app.utils.cache import cache_configuracion
 
 class SystemSettings:
     """Modelo para configuraciones del sistema"""
@@ -27,19 +28,27 @@ class SystemSettings:
         
         conn.commit()
         conn.close()
+        cache_configuracion.invalidar('system_settings')
+    
+    @staticmethod
+    def _get_rows():
+        """Todas las filas de la tabla; se leen una vez y se sirven desde la caché"""
+        def cargar():
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT key, value, description FROM system_settings')
+            rows = tuple(cursor.fetchall())
+            conn.close()
+            return rows
+        return cache_configuracion.obtener(('system_settings',), cargar)
     
     @staticmethod
     def get_setting(key):
         """Obtiene el valor de una configuración"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT value FROM system_settings WHERE key = ?', (key,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        
-        return result[0] if result else None
+        for row in SystemSettings._get_rows():
+            if row[0] == key:
+                return row[1]
+        return None
     
     @staticmethod
     def set_setting(key, value, description=None):
@@ -67,18 +76,13 @@ class SystemSettings:
         
         conn.commit()
         conn.close()
+        cache_configuracion.invalidar('system_settings')
         
         return True
     
     @staticmethod
     def get_all_settings():
         """Obtiene todas las configuraciones"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT key, value, description FROM system_settings')
-        results = cursor.fetchall()
-        
-        conn.close()
+        results = SystemSettings._get_rows()
         
         return {row[0]: {'value': row[1], 'description': row[2]} for row in results}
@@ -0,0 +1,196 @@
+import json
+from . import get_db_connection
+
+class TrabajoReporte:
+    """
+    Trabajo de la cola de reportes PDF.
+
+    Estados: pendiente -> en_proceso -> completado | error.
+    espera_ms es el tiempo en cola y duracion_ms el tiempo de generación.
+    """
+
+    def __init__(self, id=None, tipo=None, parametros='{}', estado='pendiente', usuario_id=None, archivo=None, error=None, fecha_creacion=None, fecha_inicio=None, fecha_fin=None, espera_ms=None, duracion_ms=None):
+        self.id = id
+        self.tipo = tipo
+        self.parametros = json.loads(parametros) if isinstance(parametros, str) else (parametros or {})
+        self.estado = estado
+        self.usuario_id = usuario_id
+        self.archivo = archivo
+        self.error = error
+        self.fecha_creacion = fecha_creacion
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.espera_ms = espera_ms
+        self.duracion_ms = duracion_ms
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'parametros': self.parametros,
+            'estado': self.estado,
+            'error': self.error,
+            'fecha_creacion': self.fecha_creacion,
+            'fecha_inicio': self.fecha_inicio,
+            'fecha_fin': self.fecha_fin,
+            'espera_ms': self.espera_ms,
+            'duracion_ms': self.duracion_ms
+        }
+
+    @classmethod
+    def create(cls, tipo, parametros, usuario_id=None):
+        """Registra un trabajo pendiente y retorna su id"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO trabajos_reportes (tipo, parametros, usuario_id, fecha_creacion)
+            VALUES (?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        ''', (tipo, json.dumps(parametros, sort_keys=True), usuario_id))
+        trabajo_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return trabajo_id
+
+    @classmethod
+    def find_by_id(cls, trabajo_id):
+        """Busca un trabajo por ID"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM trabajos_reportes WHERE id = ?', (trabajo_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return cls(*row)
+        return None
+
+    @classmethod
+    def find_activo(cls, tipo, parametros):
+        """Trabajo pendiente o en proceso con el mismo tipo y parámetros, si existe"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM trabajos_reportes
+            WHERE estado IN ('pendiente', 'en_proceso') AND tipo = ? AND parametros = ?
+            ORDER BY id DESC
+            LIMIT 1
+        ''', (tipo, json.dumps(parametros, sort_keys=True)))
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return cls(*row)
+        return None
+
+    @classmethod
+    def get_pendientes(cls):
+        """Trabajos que todavía no empezaron, en orden de llegada"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM trabajos_reportes WHERE estado = 'pendiente' ORDER BY id")
+        rows = cursor.fetchall()
+        conn.close()
+        return [cls(*row) for row in rows]
+
+    @classmethod
+    def contar_activos(cls):
+        """Cantidad de trabajos pendientes o en proceso"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM trabajos_reportes WHERE estado IN ('pendiente', 'en_proceso')")
+        total = cursor.fetchone()[0]
+        conn.close()
+        return total
+
+    @classmethod
+    def tomar(cls, trabajo_id):
+        """
+        Marca el trabajo como en proceso solo si sigue pendiente.
+        Retorna False si otro hilo o proceso ya lo tomó.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE trabajos_reportes
+            SET estado = 'en_proceso',
+                fecha_inicio = strftime('%Y-%m-%d %H:%M:%f', 'now'),
+                espera_ms = (julianday('now') - julianday(fecha_creacion)) * 86400000.0
+            WHERE id = ? AND estado = 'pendiente'
+        ''', (trabajo_id,))
+        tomado = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        return tomado
+
+    @classmethod
+    def marcar_completado(cls, trabajo_id, archivo, duracion_ms):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE trabajos_reportes
+            SET estado = 'completado', archivo = ?, duracion_ms = ?,
+                fecha_fin = strftime('%Y-%m-%d %H:%M:%f', 'now')
+            WHERE id = ?
+        ''', (archivo, duracion_ms, trabajo_id))
+        conn.commit()
+        conn.close()
+
+    @classmethod
+    def marcar_error(cls, trabajo_id, error, duracion_ms=None):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE trabajos_reportes
+            SET estado = 'error', error = ?, duracion_ms = ?,
+                fecha_fin = strftime('%Y-%m-%d %H:%M:%f', 'now')
+            WHERE id = ?
+        ''', (error, duracion_ms, trabajo_id))
+        conn.commit()
+        conn.close()
+
+    @classmethod
+    def marcar_interrumpidos(cls, segundos):
+        """Pasa a error los trabajos que llevan más de 'segundos' en proceso (proceso caído)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE trabajos_reportes
+            SET estado = 'error', error = 'Interrumpido',
+                fecha_fin = strftime('%Y-%m-%d %H:%M:%f', 'now')
+            WHERE estado = 'en_proceso'
+            AND fecha_inicio < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)
+        ''', (f'-{int(segundos)} seconds',))
+        total = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return total
+
+    @classmethod
+    def get_metricas(cls):
+        """Tiempos de espera y generación por tipo de reporte, y trabajos por estado"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT estado, COUNT(*) FROM trabajos_reportes GROUP BY estado')
+        por_estado = dict(cursor.fetchall())
+
+        cursor.execute('''
+            SELECT tipo, COUNT(*), AVG(espera_ms), MAX(espera_ms), AVG(duracion_ms), MAX(duracion_ms)
+            FROM trabajos_reportes
+            WHERE estado = 'completado'
+            GROUP BY tipo
+        ''')
+        por_tipo = {
+            row[0]: {
+                'completados': row[1],
+                'espera_promedio_ms': row[2],
+                'espera_max_ms': row[3],
+                'duracion_promedio_ms': row[4],
+                'duracion_max_ms': row[5]
+            }
+            for row in cursor.fetchall()
+        }
+
+        conn.close()
+
+        return {'por_estado': por_estado, 'por_tipo': por_tipo}
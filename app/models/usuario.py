@@ -1,8 +1,23 @@
 import hashlib
 from datetime import datetime
 from . import get_db_connection
+from app.utils.fechas import rango_mes
+from app.utils.cache import cache_analitica
+from app.utils.paginacion import Pagina, decodificar_cursor, condicion_cursor
+from .filas import ModeloFila, FechaPerezosa, cursor_filas
+from .venta import CONDICION_VENTAS_VENDEDOR
+import logging
 
-class Usuario:
+logger = logging.getLogger(__name__)
+
+class Usuario(ModeloFila):
+    CAMPOS = ('id', 'nombre', 'email', 'password', 'telefono', 'direccion', 'rol', 'fecha_registro', 'activo')
+    # Además de las columnas, los totales que agregan los reportes del personal
+    __slots__ = ('id', 'nombre', 'email', 'password', 'telefono', 'direccion', 'rol', '_fecha_registro', 'activo',
+                 'total_pedidos', 'total_ventas', 'ventas_mes', 'pedidos_mes', 'pedidos_preparados_mes')
+    
+    fecha_registro = FechaPerezosa()
+    
     def __init__(self, id=None, nombre=None, email=None, password=None, telefono=None, direccion=None, rol='cliente', fecha_registro=None, activo=True):
         self.id = id
         self.nombre = nombre
@@ -57,49 +72,88 @@ class Usuario:
         user_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        # Cuenta en los nuevos clientes de la analítica de ventas
+        cache_analitica.invalidar('analitica')
         return user_id
     
     @classmethod
     def find_by_email(cls, email):
         """Busca un usuario por email"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM usuarios WHERE email = ? AND activo = 1', (email,))
         row = cursor.fetchone()
         conn.close()
         
-        if row:
-            return cls(*row)
-        return None
+        return cls.from_row(row)
     
     @classmethod
     def find_by_id(cls, user_id):
         """Busca un usuario por ID"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM usuarios WHERE id = ? AND activo = 1', (user_id,))
         row = cursor.fetchone()
         conn.close()
         
-        if row:
-            return cls(*row)
-        return None
+        return cls.from_row(row)
     
     @classmethod
-    def get_all(cls, role=None):
+    def get_all(cls, role=None, limit=None):
         """Obtiene todos los usuarios, opcionalmente filtrados por rol"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
+        
+        query = 'SELECT * FROM usuarios WHERE activo = 1'
+        params = []
         
         if role:
-            cursor.execute('SELECT * FROM usuarios WHERE rol = ? AND activo = 1 ORDER BY nombre', (role,))
-        else:
-            cursor.execute('SELECT * FROM usuarios WHERE activo = 1 ORDER BY nombre')
+            query += ' AND rol = ?'
+            params.append(role)
+        
+        query += ' ORDER BY nombre, id'
+        
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
         
+        cursor.execute(query, params)
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return cls.from_rows(rows)
+    
+    @classmethod
+    def get_pagina(cls, role=None, limite=20, cursor=None):
+        """
+        Una página de usuarios en orden alfabético, continuando desde el
+        cursor de la página anterior (ver app/utils/paginacion.py).
+        Lanza ValueError si el cursor no es válido.
+        """
+        despues = decodificar_cursor(cursor, 2)
+        
+        conn = get_db_connection()
+        db_cursor = cursor_filas(conn)
+        
+        query = 'SELECT * FROM usuarios WHERE activo = 1'
+        params = []
+        
+        if role:
+            query += ' AND rol = ?'
+            params.append(role)
+        
+        if despues:
+            query += ' AND ' + condicion_cursor(('nombre', 'id'), descendente=False)
+            params.extend(despues)
+        
+        query += ' ORDER BY nombre, id LIMIT ?'
+        params.append(limite + 1)
+        
+        db_cursor.execute(query, params)
+        rows = db_cursor.fetchall()
+        conn.close()
+        
+        return Pagina.desde_filas(rows, limite, lambda row: (row['nombre'], row['id']), cls.from_rows)
     
     @classmethod
     def get_by_role(cls, role):
@@ -110,30 +164,25 @@ class Usuario:
     def get_vendedores_top_mes(cls, año, mes):
         """Obtiene los vendedores con mejores ventas del mes"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT u.*, COUNT(p.id) as total_pedidos, COALESCE(SUM(p.total), 0) as total_ventas
             FROM usuarios u
-            LEFT JOIN pedidos p ON u.id = p.usuario_id 
-                AND strftime('%Y', p.fecha_pedido) = ? 
-                AND strftime('%m', p.fecha_pedido) = ?
-                AND p.estado != 'cancelado'
+            LEFT JOIN pedidos p ON {CONDICION_VENTAS_VENDEDOR}
             WHERE u.rol = 'vendedor' AND u.activo = 1
             GROUP BY u.id
             ORDER BY total_ventas DESC
             LIMIT 5
-        ''', (str(año), f"{mes:02d}"))
+        ''', rango_mes(año, mes))
         
         rows = cursor.fetchall()
         conn.close()
         
-        vendedores = []
-        for row in rows:
-            vendedor = cls(*row[:9])  # Los primeros 9 campos son del usuario
-            vendedor.total_pedidos = row[9]
-            vendedor.total_ventas = row[10]
-            vendedores.append(vendedor)
+        vendedores = cls.from_rows(rows)
+        for vendedor, row in zip(vendedores, rows):
+            vendedor.total_pedidos = row['total_pedidos']
+            vendedor.total_ventas = row['total_ventas']
         
         return vendedores
     
@@ -212,6 +261,6 @@ class Usuario:
             conn.close()
             return True
         except Exception as e:
-            print(f"[v0] Error guardando usuario: {e}")
+            logger.exception('Error guardando usuario')
             conn.close()
             return False
@@ -1,22 +1,40 @@
 from datetime import datetime
 from . import get_db_connection
+from app.utils.fechas import rango_mes, rango_dia, hoy_utc
+from app.utils.cache import cache_catalogo, cache_analitica
+from app.utils.paginacion import Pagina, decodificar_cursor, condicion_cursor
+from .filas import ModeloFila, FechaPerezosa, cursor_filas
 
-class Venta:
+# Ventas de un vendedor: los pedidos no cancelados registrados con su usuario
+# (pedidos.usuario_id); los pedidos no guardan otro vendedor. Es la condición
+# del JOIN entre usuarios u y pedidos p y recibe el rango [inicio, fin).
+CONDICION_VENTAS_VENDEDOR = """p.usuario_id = u.id
+            AND p.fecha_pedido >= ? AND p.fecha_pedido < ?
+            AND p.estado != 'cancelado'"""
+
+class StockInsuficienteError(Exception):
+    """Se lanza cuando un producto no tiene stock suficiente para el pedido"""
+    
+    def __init__(self, producto_id, nombre, solicitado, disponible):
+        super().__init__(f'Stock insuficiente para {nombre}. Disponible: {disponible}')
+        self.producto_id = producto_id
+        self.nombre = nombre
+        self.solicitado = solicitado
+        self.disponible = disponible
+
+class Venta(ModeloFila):
+    CAMPOS = ('id', 'usuario_id', 'total', 'estado', 'fecha_pedido', 'direccion_entrega', 'telefono_contacto',
+              'notas', 'metodo_pago', 'fecha_entrega', 'hora_entrega', 'comprobante_pago')
+    __slots__ = tuple(campo for campo in CAMPOS if campo != 'fecha_pedido') + ('_fecha_pedido', 'cliente_nombre')
+    
+    fecha_pedido = FechaPerezosa()
+    
     def __init__(self, id=None, usuario_id=None, total=None, estado='pendiente', fecha_pedido=None, direccion_entrega=None, telefono_contacto=None, notas=None, metodo_pago='efectivo', fecha_entrega=None, hora_entrega=None, comprobante_pago=None):
         self.id = id
         self.usuario_id = usuario_id
         self.total = total
         self.estado = estado
-        if isinstance(fecha_pedido, str):
-            try:
-                self.fecha_pedido = datetime.strptime(fecha_pedido, '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                try:
-                    self.fecha_pedido = datetime.strptime(fecha_pedido, '%Y-%m-%d %H:%M:%S.%f')
-                except ValueError:
-                    self.fecha_pedido = datetime.now()
-        else:
-            self.fecha_pedido = fecha_pedido or datetime.now()
+        self.fecha_pedido = fecha_pedido or datetime.now()
         self.direccion_entrega = direccion_entrega
         self.telefono_contacto = telefono_contacto
         self.notas = notas
@@ -64,17 +82,188 @@ class Venta:
               data.get('fecha_entrega'), data.get('hora_entrega'), data.get('comprobante_pago')))
         
         venta_id = cursor.lastrowid
+        cls._acumular_ventas_diarias(cursor, venta_id)
         conn.commit()
         conn.close()
+        cache_analitica.invalidar('analitica')
         return venta_id
     
+    @staticmethod
+    def _acumular_ventas_diarias(cursor, pedido_id, signo=1):
+        """
+        Suma (signo=1) o resta (signo=-1) el pedido en su fila de ventas_diarias,
+        según su fecha y estado actuales. Debe ejecutarse en la misma
+        transacción que modifica el pedido.
+        """
+        cursor.execute('''
+            INSERT INTO ventas_diarias (fecha, estado, pedidos, total, items)
+            SELECT DATE(p.fecha_pedido), p.estado, ?, ? * p.total,
+                   ? * COALESCE((SELECT SUM(cantidad) FROM detalle_pedidos WHERE pedido_id = p.id), 0)
+            FROM pedidos p
+            WHERE p.id = ?
+            ON CONFLICT (fecha, estado) DO UPDATE SET
+                pedidos = pedidos + excluded.pedidos,
+                total = total + excluded.total,
+                items = items + excluded.items
+        ''', (signo, signo, signo, pedido_id))
+    
+    @staticmethod
+    def _acumular_productos_mes(cursor, pedido_id, signo=1):
+        """
+        Suma (signo=1) o resta (signo=-1) los detalles del pedido en
+        producto_ventas_mensuales. Se llama al crear el pedido y al cancelarlo
+        (o reactivarlo), en la misma transacción.
+        """
+        cursor.execute('''
+            INSERT INTO producto_ventas_mensuales (mes, producto_id, unidades, ingresos)
+            SELECT strftime('%Y-%m', p.fecha_pedido), dp.producto_id,
+                   ? * SUM(dp.cantidad), ? * SUM(dp.cantidad * dp.precio_unitario)
+            FROM pedidos p
+            JOIN detalle_pedidos dp ON dp.pedido_id = p.id
+            WHERE p.id = ?
+            GROUP BY dp.producto_id
+            ON CONFLICT (mes, producto_id) DO UPDATE SET
+                unidades = unidades + excluded.unidades,
+                ingresos = ingresos + excluded.ingresos
+        ''', (signo, signo, pedido_id))
+    
     @classmethod
-    def get_all(cls, estado=None, usuario_id=None):
-        """Obtiene todas las ventas, opcionalmente filtradas"""
+    def recalcular_resumenes(cls):
+        """
+        Reconstruye ventas_diarias y producto_ventas_mensuales desde pedidos.
+        Retorna la cantidad de filas de cada tabla.
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
+        filas = {}
         
-        query = 'SELECT * FROM pedidos'
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('DELETE FROM ventas_diarias')
+            cursor.execute('''
+                INSERT INTO ventas_diarias (fecha, estado, pedidos, total, items)
+                SELECT DATE(p.fecha_pedido), p.estado, COUNT(*), COALESCE(SUM(p.total), 0), COALESCE(SUM(d.items), 0)
+                FROM pedidos p
+                LEFT JOIN (
+                    SELECT pedido_id, SUM(cantidad) as items
+                    FROM detalle_pedidos
+                    GROUP BY pedido_id
+                ) d ON d.pedido_id = p.id
+                WHERE p.fecha_pedido IS NOT NULL
+                GROUP BY DATE(p.fecha_pedido), p.estado
+            ''')
+            filas['ventas_diarias'] = cursor.rowcount
+            
+            cursor.execute('DELETE FROM producto_ventas_mensuales')
+            cursor.execute('''
+                INSERT INTO producto_ventas_mensuales (mes, producto_id, unidades, ingresos)
+                SELECT strftime('%Y-%m', p.fecha_pedido), dp.producto_id,
+                       SUM(dp.cantidad), SUM(dp.cantidad * dp.precio_unitario)
+                FROM pedidos p
+                JOIN detalle_pedidos dp ON dp.pedido_id = p.id
+                WHERE p.fecha_pedido IS NOT NULL AND p.estado != 'cancelado'
+                GROUP BY strftime('%Y-%m', p.fecha_pedido), dp.producto_id
+            ''')
+            filas['producto_ventas_mensuales'] = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        cache_analitica.invalidar('analitica')
+        return filas
+    
+    @classmethod
+    def crear_desde_carrito(cls, data, carrito):
+        """
+        Crea el pedido a partir del carrito en una sola transacción.
+        
+        carrito es un diccionario {producto_id: cantidad}. Dentro de un
+        BEGIN IMMEDIATE se cargan todos los productos con una consulta, se
+        descuenta el stock con un UPDATE condicional (stock >= cantidad), se
+        inserta el pedido con todos sus detalles y se confirma una sola vez.
+        Los productos que ya no existen o fueron eliminados (activo = 0) se
+        omiten, igual que en el carrito.
+        
+        El precio_unitario de cada detalle se toma de la base de datos en este
+        momento y queda congelado en detalle_pedidos.
+        
+        Retorna el id del pedido. Lanza StockInsuficienteError si algún
+        producto no alcanza (sin modificar nada) y ValueError si no queda
+        ningún producto válido.
+        """
+        cantidades = {}
+        for producto_id, cantidad in carrito.items():
+            if int(cantidad) > 0:
+                cantidades[int(producto_id)] = int(cantidad)
+        if not cantidades:
+            raise ValueError('El carrito está vacío')
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Tomar el bloqueo de escritura desde el inicio: nadie más puede
+            # modificar el stock entre la verificación y el descuento
+            cursor.execute('BEGIN IMMEDIATE')
+            
+            placeholders = ','.join('?' * len(cantidades))
+            cursor.execute(f'SELECT id, nombre, precio, stock FROM productos WHERE id IN ({placeholders}) AND activo = 1',
+                           list(cantidades))
+            productos = {row[0]: row for row in cursor.fetchall()}
+            
+            items = []
+            total = 0
+            for producto_id, cantidad in cantidades.items():
+                producto = productos.get(producto_id)
+                if not producto:
+                    continue
+                _, nombre, precio, stock = producto
+                if cantidad > stock:
+                    raise StockInsuficienteError(producto_id, nombre, cantidad, stock)
+                items.append((producto_id, cantidad, precio))
+                total += precio * cantidad
+            
+            if not items:
+                raise ValueError('El carrito está vacío')
+            
+            cursor.executemany('UPDATE productos SET stock = stock - ? WHERE id = ? AND stock >= ?',
+                               [(cantidad, producto_id, cantidad) for producto_id, cantidad, _ in items])
+            if cursor.rowcount != len(items):
+                raise RuntimeError('El stock cambió durante el pedido')
+            
+            cursor.execute('''
+                INSERT INTO pedidos (usuario_id, total, direccion_entrega, telefono_contacto, notas, metodo_pago, fecha_entrega, hora_entrega, comprobante_pago)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (data['usuario_id'], total, data.get('direccion_entrega'),
+                  data.get('telefono_contacto'), data.get('notas'), data.get('metodo_pago', 'efectivo'),
+                  data.get('fecha_entrega'), data.get('hora_entrega'), data.get('comprobante_pago')))
+            venta_id = cursor.lastrowid
+            
+            cursor.executemany('''
+                INSERT INTO detalle_pedidos (pedido_id, producto_id, cantidad, precio_unitario)
+                VALUES (?, ?, ?, ?)
+            ''', [(venta_id, producto_id, cantidad, precio) for producto_id, cantidad, precio in items])
+            
+            cls._acumular_ventas_diarias(cursor, venta_id)
+            cls._acumular_productos_mes(cursor, venta_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        # El stock cambió: el catálogo en caché ya no es válido
+        cache_catalogo.invalidar('productos')
+        cache_analitica.invalidar('analitica')
+        return venta_id
+    
+    @staticmethod
+    def _filtros(estado, usuario_id):
+        """Condiciones WHERE y parámetros comunes a los listados de pedidos"""
         params = []
         conditions = []
         
@@ -86,29 +275,91 @@ class Venta:
             conditions.append('usuario_id = ?')
             params.append(usuario_id)
         
+        return conditions, params
+    
+    @classmethod
+    def get_all(cls, estado=None, usuario_id=None, limit=None):
+        """Obtiene todas las ventas (las más recientes primero), opcionalmente filtradas"""
+        conn = get_db_connection()
+        cursor = cursor_filas(conn)
+        
+        query = 'SELECT * FROM pedidos'
+        conditions, params = cls._filtros(estado, usuario_id)
+        
         if conditions:
             query += ' WHERE ' + ' AND '.join(conditions)
         
-        query += ' ORDER BY fecha_pedido DESC'
+        query += ' ORDER BY fecha_pedido DESC, id DESC'
+        
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
         
         cursor.execute(query, params)
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return cls.from_rows(rows)
+    
+    @classmethod
+    def get_pagina(cls, estado=None, usuario_id=None, limite=20, cursor=None):
+        """
+        Una página de pedidos en el orden de get_all, continuando desde el
+        cursor de la página anterior (ver app/utils/paginacion.py).
+        Lanza ValueError si el cursor no es válido.
+        """
+        despues = decodificar_cursor(cursor, 2)
+        
+        conn = get_db_connection()
+        db_cursor = cursor_filas(conn)
+        
+        query = 'SELECT * FROM pedidos'
+        conditions, params = cls._filtros(estado, usuario_id)
+        
+        if despues:
+            conditions.append(condicion_cursor(('fecha_pedido', 'id')))
+            params.extend(despues)
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        query += ' ORDER BY fecha_pedido DESC, id DESC LIMIT ?'
+        params.append(limite + 1)
+        
+        db_cursor.execute(query, params)
+        rows = db_cursor.fetchall()
+        conn.close()
+        
+        return Pagina.desde_filas(rows, limite, lambda row: (row['fecha_pedido'], row['id']), cls.from_rows)
+    
+    @classmethod
+    def contar(cls, estado=None, usuario_id=None):
+        """Cantidad de pedidos, con los mismos filtros que get_all"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        query = 'SELECT COUNT(*) FROM pedidos'
+        conditions, params = cls._filtros(estado, usuario_id)
+        
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        
+        cursor.execute(query, params)
+        total = cursor.fetchone()[0]
+        conn.close()
+        
+        return total
     
     @classmethod
     def find_by_id(cls, venta_id):
         """Busca una venta por ID"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         cursor.execute('SELECT * FROM pedidos WHERE id = ?', (venta_id,))
         row = cursor.fetchone()
         conn.close()
         
-        if row:
-            return cls(*row)
-        return None
+        return cls.from_row(row)
     
     def get_detalles(self):
         """Obtiene los detalles de la venta"""
@@ -125,41 +376,65 @@ class Venta:
         return rows
     
     def update_estado(self, nuevo_estado):
-        """Actualiza el estado de la venta"""
+        """
+        Actualiza el estado de la venta, la mueve de fila en ventas_diarias y,
+        si se cancela o se reactiva, ajusta producto_ventas_mensuales
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute('UPDATE pedidos SET estado = ? WHERE id = ?', (nuevo_estado, self.id))
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT estado FROM pedidos WHERE id = ?', (self.id,))
+            row = cursor.fetchone()
+            estado_anterior = row[0] if row else None
+            
+            self._acumular_ventas_diarias(cursor, self.id, -1)
+            cursor.execute('UPDATE pedidos SET estado = ? WHERE id = ?', (nuevo_estado, self.id))
+            self._acumular_ventas_diarias(cursor, self.id, 1)
+            
+            if estado_anterior and estado_anterior != 'cancelado' and nuevo_estado == 'cancelado':
+                self._acumular_productos_mes(cursor, self.id, -1)
+            elif estado_anterior == 'cancelado' and nuevo_estado != 'cancelado':
+                self._acumular_productos_mes(cursor, self.id, 1)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        cache_analitica.invalidar('analitica')
         self.estado = nuevo_estado
     
     @classmethod
     def get_estadisticas(cls):
-        """Obtiene estadísticas de ventas"""
+        """Obtiene estadísticas de ventas (desde el resumen ventas_diarias)"""
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        hoy = hoy_utc()
+        
         # Total de ventas del día
         cursor.execute('''
-            SELECT COUNT(*), COALESCE(SUM(total), 0)
-            FROM pedidos 
-            WHERE DATE(fecha_pedido) = DATE('now')
-        ''')
+            SELECT COALESCE(SUM(pedidos), 0), COALESCE(SUM(total), 0)
+            FROM ventas_diarias
+            WHERE fecha = ?
+        ''', (hoy.isoformat(),))
         ventas_hoy = cursor.fetchone()
         
         # Total de ventas del mes
         cursor.execute('''
-            SELECT COUNT(*), COALESCE(SUM(total), 0)
-            FROM pedidos 
-            WHERE strftime('%Y-%m', fecha_pedido) = strftime('%Y-%m', 'now')
-        ''')
+            SELECT COALESCE(SUM(pedidos), 0), COALESCE(SUM(total), 0)
+            FROM ventas_diarias
+            WHERE fecha >= ? AND fecha < ?
+        ''', rango_mes(hoy.year, hoy.month))
         ventas_mes = cursor.fetchone()
         
         # Pedidos por estado
         cursor.execute('''
-            SELECT estado, COUNT(*)
-            FROM pedidos
+            SELECT estado, SUM(pedidos)
+            FROM ventas_diarias
             GROUP BY estado
+            HAVING SUM(pedidos) > 0
         ''')
         pedidos_por_estado = cursor.fetchall()
         
@@ -173,42 +448,87 @@ class Venta:
     
     @classmethod
     def get_ventas_by_vendedor_mes(cls, vendedor_id, año, mes):
-        """Obtiene las ventas de un vendedor específico en un mes"""
+        """Obtiene las ventas de un vendedor específico en un mes (criterio de CONDICION_VENTAS_VENDEDOR)"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT p.* FROM pedidos p
-            JOIN usuarios u ON p.usuario_id = u.id
-            WHERE strftime('%Y', p.fecha_pedido) = ? 
-            AND strftime('%m', p.fecha_pedido) = ?
-            AND p.estado != 'cancelado'
+            JOIN usuarios u ON {CONDICION_VENTAS_VENDEDOR}
+            WHERE u.id = ?
+            ORDER BY p.fecha_pedido DESC
+        ''', (*rango_mes(año, mes), vendedor_id))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return cls.from_rows(rows)
+    
+    @classmethod
+    def get_reporte_ventas_mes(cls, vendedor_id, año, mes):
+        """
+        Ventas del mes de un vendedor (criterio de CONDICION_VENTAS_VENDEDOR)
+        para su reporte, con el nombre del cliente en la misma consulta (cada
+        venta trae el atributo cliente_nombre)
+        """
+        conn = get_db_connection()
+        cursor = cursor_filas(conn)
+        
+        cursor.execute(f'''
+            SELECT p.*, u.nombre AS cliente_nombre FROM pedidos p
+            JOIN usuarios u ON {CONDICION_VENTAS_VENDEDOR}
+            WHERE u.id = ?
             ORDER BY p.fecha_pedido DESC
-        ''', (str(año), f"{mes:02d}"))
+        ''', (*rango_mes(año, mes), vendedor_id))
         
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(*row) for row in rows]
+        ventas = cls.from_rows(rows)
+        for venta, row in zip(ventas, rows):
+            venta.cliente_nombre = row['cliente_nombre']
+        return ventas
+    
+    @classmethod
+    def get_resumen_vendedores_mes(cls, año, mes):
+        """
+        Pedidos y total vendido del mes por vendedor en una sola consulta:
+        {vendedor_id: {'pedidos': n, 'total': t}}, con el criterio de
+        CONDICION_VENTAS_VENDEDOR. Los vendedores sin ventas no aparecen.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT u.id, COUNT(*), SUM(p.total)
+            FROM pedidos p
+            JOIN usuarios u ON {CONDICION_VENTAS_VENDEDOR}
+            WHERE u.rol = 'vendedor'
+            GROUP BY u.id
+        ''', rango_mes(año, mes))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {row[0]: {'pedidos': row[1], 'total': row[2]} for row in rows}
     
     @classmethod
     def get_pedidos_preparados_by_chef_mes(cls, chef_id, año, mes):
         """Obtiene los pedidos preparados por un chef en un mes"""
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = cursor_filas(conn)
         
         cursor.execute('''
             SELECT * FROM pedidos 
-            WHERE strftime('%Y', fecha_pedido) = ? 
-            AND strftime('%m', fecha_pedido) = ?
+            WHERE fecha_pedido >= ? AND fecha_pedido < ?
             AND estado IN ('listo', 'entregado')
             ORDER BY fecha_pedido DESC
-        ''', (str(año), f"{mes:02d}"))
+        ''', rango_mes(año, mes))
         
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(*row) for row in rows]
+        return cls.from_rows(rows)
     
     @classmethod
     def get_ventas_diarias_mes(cls, año, mes):
@@ -217,14 +537,14 @@ class Venta:
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT DATE(fecha_pedido) as fecha, COUNT(*) as pedidos, SUM(total) as total
-            FROM pedidos 
-            WHERE strftime('%Y', fecha_pedido) = ? 
-            AND strftime('%m', fecha_pedido) = ?
+            SELECT fecha, SUM(pedidos) as pedidos, SUM(total) as total
+            FROM ventas_diarias
+            WHERE fecha >= ? AND fecha < ?
             AND estado != 'cancelado'
-            GROUP BY DATE(fecha_pedido)
+            GROUP BY fecha
+            HAVING SUM(pedidos) > 0
             ORDER BY fecha
-        ''', (str(año), f"{mes:02d}"))
+        ''', rango_mes(año, mes))
         
         rows = cursor.fetchall()
         conn.close()
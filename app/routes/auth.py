@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app.models.usuario import Usuario
 from app.utils.decorators import login_required
+from app.utils.carrito import fusionar_carrito_anonimo
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -21,6 +22,7 @@ def login():
             session['user_id'] = usuario.id
             session['user_name'] = usuario.nombre
             session['user_role'] = usuario.rol
+            fusionar_carrito_anonimo(usuario.id)
             flash(f'¡Bienvenido {usuario.nombre}!', 'success')
             
             # Redirigir según el rol
@@ -81,6 +83,7 @@ def register():
             session['user_id'] = user_id
             session['user_name'] = nombre
             session['user_role'] = 'cliente'
+            fusionar_carrito_anonimo(user_id)
             
             flash('¡Registro exitoso! Bienvenido a Migas de oro Dorè', 'success')
             return redirect(url_for('dashboard.cliente'))
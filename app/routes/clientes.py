@@ -1,7 +1,9 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 from app.models.cliente import Cliente
 from app.models.usuario import Usuario
 from app.utils.decorators import login_required, admin_required
+from app.utils.carrito import contar_carrito
+from app.utils.paginacion import parametros_pagina
 from datetime import datetime
 
 clientes_bp = Blueprint('clientes', __name__, url_prefix='/clientes')
@@ -9,9 +11,14 @@ clientes_bp = Blueprint('clientes', __name__, url_prefix='/clientes')
 @clientes_bp.route('/')
 @admin_required
 def index():
-    """Lista todos los clientes"""
-    clientes = Cliente.get_all_clientes()
-    return render_template('clientes/index.html', clientes=clientes)
+    """Lista los clientes, paginados por cursor"""
+    limite, cursor = parametros_pagina(current_app.config['LISTADOS_POR_PAGINA'])
+    try:
+        clientes = Cliente.get_pagina_clientes(limite=limite, cursor=cursor)
+    except ValueError:
+        clientes = Cliente.get_pagina_clientes(limite=limite)
+    return render_template('clientes/index.html', clientes=clientes,
+                           total_clientes=Cliente.contar_clientes())
 
 @clientes_bp.route('/crear', methods=['GET', 'POST'])
 @admin_required
@@ -136,8 +143,7 @@ def chatbot():
     """Página del chatbot"""
     from app.models.usuario import Usuario
     usuario = Usuario.find_by_id(session['user_id'])
-    cliente = Cliente.find_by_id(session['user_id'])
-    carrito_count = cliente.contar_items_carrito() if cliente else 0
+    carrito_count = contar_carrito()
     
     return render_template('chatbot.html',
                          usuario=usuario,
@@ -6,15 +6,21 @@ from app.models.insumo import Insumo
 from app.models.system_settings import SystemSettings
 from app.models.historia_images import HistoriaImages
 from app.utils.decorators import login_required, role_required, admin_required
+from app.utils.carrito import contar_carrito
+from app.utils.imagenes import guardar_imagen, ImagenNoValidaError
 from datetime import datetime
 import secrets
 import string
 import os
 from werkzeug.utils import secure_filename
+import logging
+
+logger = logging.getLogger(__name__)
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
 UPLOAD_FOLDER = 'static/comprobantes'
+PEDIDOS_POR_ESTADO = 20  # pedidos listados por estado en el dashboard del vendedor
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 def allowed_file(filename):
@@ -36,8 +42,7 @@ def get_current_user():
 
 def get_cart_count():
     """Obtiene el número de items en el carrito"""
-    carrito = session.get('carrito', {})
-    return sum(carrito.values())
+    return contar_carrito()
 
 def generar_password_temporal():
     """Genera una contraseña temporal de 8 caracteres"""
@@ -56,7 +61,7 @@ def cliente():
     
     # Obtener pedidos recientes del usuario usando get_all con filtro usuario_id
     try:
-        pedidos_recientes = Venta.get_all(usuario_id=session['user_id'])[:5]
+        pedidos_recientes = Venta.get_all(usuario_id=session['user_id'], limit=5)
     except Exception as e:
         pedidos_recientes = []
     
@@ -79,7 +84,7 @@ def admin():
     total_usuarios = Usuario.count()
     
     from app.models.producto import Producto
-    total_productos = len(Producto.get_all())
+    total_productos = Producto.contar()
     
     estadisticas.update({
         'total_usuarios': total_usuarios,
@@ -91,10 +96,8 @@ def admin():
     fecha_actual = datetime.now().strftime('%d/%m/%Y %H:%M')
     
     try:
-        SystemSettings.create_table()  # Asegurar que la tabla existe
         hero_background_url = SystemSettings.get_setting('hero_background_url') or '/placeholder.svg?height=600&width=1200'
         
-        HistoriaImages.create_table()
         historia_images_data = HistoriaImages.get_all_images()
         
         # Convert to simple dict with just URLs
@@ -107,7 +110,7 @@ def admin():
             'valores_image': historia_images_data.get('valores_image', {}).get('url', '/placeholder.svg?height=400&width=600')
         }
     except Exception as e:
-        print(f"[v0] Error loading settings: {e}")
+        logger.exception('Error cargando la configuración del sitio')
         hero_background_url = '/placeholder.svg?height=600&width=1200'
         historia_images = {
             'inicios_image': '/placeholder.svg?height=400&width=600',
@@ -170,7 +173,7 @@ def crear_empleado():
             return jsonify({'success': False, 'message': 'Error al crear el empleado'})
             
     except Exception as e:
-        print(f"[v0] Error creando empleado: {e}")
+        logger.exception('Error creando empleado')
         return jsonify({'success': False, 'message': 'Error interno del servidor'})
 
 @dashboard_bp.route('/administrador')
@@ -187,24 +190,25 @@ def vendedor():
     
     estadisticas = Venta.get_estadisticas()
     
-    pedidos_pendientes = Venta.get_all(estado='pendiente')
-    pedidos_preparando = Venta.get_all(estado='preparando')
-    pedidos_listos = Venta.get_all(estado='listo')
+    # Listas acotadas; los totales salen de consultas COUNT
+    pedidos_pendientes = Venta.get_all(estado='pendiente', limit=PEDIDOS_POR_ESTADO)
+    pedidos_preparando = Venta.get_all(estado='preparando', limit=PEDIDOS_POR_ESTADO)
+    pedidos_listos = Venta.get_all(estado='listo', limit=PEDIDOS_POR_ESTADO)
     
-    clientes_recientes = Cliente.get_all()[:10]
+    clientes_recientes = Cliente.get_all_clientes(limit=10)
     
     from app.models.producto import Producto
-    productos = Producto.get_all()[:5]
+    productos = Producto.get_all(limit=5)
     
     total_usuarios = Usuario.count()
-    total_clientes = len(Cliente.get_all())
+    total_clientes = Cliente.contar_clientes()
     
     estadisticas.update({
         'total_usuarios': total_usuarios,
         'total_clientes': total_clientes,
-        'pedidos_pendientes': len(pedidos_pendientes),
-        'pedidos_preparando': len(pedidos_preparando),
-        'pedidos_listos': len(pedidos_listos)
+        'pedidos_pendientes': Venta.contar(estado='pendiente'),
+        'pedidos_preparando': Venta.contar(estado='preparando'),
+        'pedidos_listos': Venta.contar(estado='listo')
     })
     
     fecha_actual = datetime.now().strftime('%d/%m/%Y %H:%M')
@@ -291,7 +295,7 @@ def pedidos_nequi():
         })
         
     except Exception as e:
-        print(f"[v0] Error obteniendo pedidos Nequi: {e}")
+        logger.exception('Error obteniendo pedidos Nequi')
         return jsonify({'success': False, 'message': 'Error al obtener pedidos'})
 
 @dashboard_bp.route('/subir-comprobante', methods=['POST'])
@@ -331,7 +335,7 @@ def subir_comprobante():
         return jsonify({'success': False, 'message': 'Tipo de archivo no permitido'})
         
     except Exception as e:
-        print(f"[v0] Error subiendo comprobante: {e}")
+        logger.exception('Error subiendo comprobante')
         return jsonify({'success': False, 'message': 'Error al subir comprobante'})
 
 @dashboard_bp.route('/ver-comprobante/<int:pedido_id>')
@@ -347,7 +351,7 @@ def ver_comprobante(pedido_id):
             return "Comprobante no encontrado", 404
             
     except Exception as e:
-        print(f"[v0] Error mostrando comprobante: {e}")
+        logger.exception('Error mostrando comprobante')
         return "Error al mostrar comprobante", 500
 
 @dashboard_bp.route('/chef')
@@ -391,7 +395,7 @@ def actualizar_configuracion():
         })
         
     except Exception as e:
-        print(f"[v0] Error actualizando configuración: {e}")
+        logger.exception('Error actualizando configuración')
         return jsonify({'success': False, 'message': 'Error interno del servidor'})
 
 @dashboard_bp.route('/actualizar_historia_images', methods=['POST'])
@@ -418,6 +422,15 @@ def actualizar_historia_images():
         
         for key in image_keys:
             url = request.form.get(key)
+            
+            # Una imagen subida reemplaza la URL; sus variantes se generan en segundo plano
+            archivo = request.files.get(f'{key}_archivo')
+            if archivo and archivo.filename:
+                try:
+                    url = guardar_imagen(archivo)
+                except ImagenNoValidaError as e:
+                    return jsonify({'success': False, 'message': f'{e} ({key})'})
+            
             if url:
                 # Validar que sea una URL válida
                 if not (url.startswith('http://') or 
@@ -435,7 +448,5 @@ def actualizar_historia_images():
         })
         
     except Exception as e:
-        print(f"[v0] Error actualizando imágenes de historia: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Error actualizando imágenes de historia')
         return jsonify({'success': False, 'message': 'Error interno del servidor'})
@@ -0,0 +1,28 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from app.models import get_pool_stats
+from app.utils.decorators import admin_required
+from app.utils.cache import cache_catalogo, cache_configuracion, cache_analitica, cache_placeholders
+from app.utils import perfilador
+
+debug_bp = Blueprint('debug', __name__, url_prefix='/debug')
+
+@debug_bp.route('/queries')
+@admin_required
+def consultas():
+    """Consultas SQL de las últimas peticiones, consultas lentas, posibles N+1, pool y cachés"""
+    datos = perfilador.resumen()
+    datos['pool'] = get_pool_stats()
+    datos['caches'] = [cache.stats() for cache in (cache_catalogo, cache_configuracion,
+                                                   cache_analitica, cache_placeholders)]
+
+    if request.args.get('formato') == 'json':
+        return jsonify({'success': True, **datos})
+    return render_template('debug/consultas.html', **datos)
+
+@debug_bp.route('/queries/limpiar', methods=['POST'])
+@admin_required
+def limpiar_consultas():
+    """Vacía el historial de consultas"""
+    perfilador.limpiar()
+    flash('Historial de consultas vaciado', 'success')
+    return redirect(url_for('debug.consultas'))
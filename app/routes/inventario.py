@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 from app.models.insumo import Insumo
 from app.models.movimientos_inventario import MovimientoInventario
 from app.utils.decorators import login_required, role_required
+from app.utils.paginacion import parametros_pagina
 from datetime import datetime
 
 inventario_bp = Blueprint('inventario', __name__, url_prefix='/inventario')
@@ -26,12 +27,17 @@ def detalle(insumo_id):
         flash('Insumo no encontrado', 'error')
         return redirect(url_for('inventario.index'))
     
-    # Obtener movimientos recientes del insumo
-    movimientos = MovimientoInventario.get_all(insumo_id=insumo_id, limit=20)
+    # Movimientos del insumo, los más recientes primero y paginados por cursor
+    limite, cursor = parametros_pagina(20)
+    try:
+        movimientos = MovimientoInventario.get_pagina(insumo_id=insumo_id, limite=limite, cursor=cursor)
+    except ValueError:
+        movimientos = MovimientoInventario.get_pagina(insumo_id=insumo_id, limite=limite)
     
     return render_template('inventario/detalle.html', 
                          insumo=insumo,
-                         movimientos=movimientos)
+                         movimientos=movimientos,
+                         total_movimientos=MovimientoInventario.contar(insumo_id=insumo_id))
 
 @inventario_bp.route('/entrada', methods=['GET', 'POST'])
 @role_required('chef')
@@ -128,3 +134,40 @@ def alertas_stock():
         'alertas': alertas,
         'total_alertas': len(alertas)
     })
+
+@inventario_bp.route('/api/movimientos')
+@role_required('chef')
+def api_movimientos():
+    """
+    API de movimientos de inventario paginada por cursor.
+    Parámetros: insumo_id, tipo ('entrada' o 'salida'), limite y cursor (el
+    campo 'siguiente' de la respuesta anterior).
+    """
+    insumo_id = request.args.get('insumo_id', type=int)
+    tipo_movimiento = request.args.get('tipo')
+    limite, cursor = parametros_pagina(current_app.config['LISTADOS_POR_PAGINA'])
+    
+    try:
+        pagina = MovimientoInventario.get_pagina(insumo_id=insumo_id, tipo_movimiento=tipo_movimiento,
+                                                 limite=limite, cursor=cursor)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    movimientos = [{
+        'id': fila[0],
+        'insumo_id': fila[1],
+        'tipo_movimiento': fila[2],
+        'cantidad': fila[3],
+        'motivo': fila[4],
+        'usuario_id': fila[5],
+        'fecha_movimiento': fila[6],
+        'insumo_nombre': fila[7],
+        'usuario_nombre': fila[8]
+    } for fila in pagina]
+    
+    return jsonify({
+        'success': True,
+        'movimientos': movimientos,
+        'siguiente': pagina.siguiente,
+        'total': MovimientoInventario.contar(insumo_id=insumo_id, tipo_movimiento=tipo_movimiento)
+    })
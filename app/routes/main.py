@@ -1,30 +1,23 @@
-from flask import Blueprint, render_template, send_file
-import io
-import base64
+from flask import Blueprint, Response, make_response, request
+from app.utils.placeholders import normalizar, obtener_placeholder, max_age
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/placeholder.svg')
 def placeholder_svg():
-    """Genera SVGs placeholder dinámicos"""
-    from flask import request
+    """
+    Placeholder SVG del tamaño pedido (?width, ?height y ?query opcional).
+    Sale de la caché LRU y se sirve con ETag y Cache-Control de larga duración.
+    """
+    ancho, alto, texto = normalizar(request.args.get('width'), request.args.get('height'),
+                                    request.args.get('query'))
+    contenido, etag = obtener_placeholder(ancho, alto, texto)
     
-    width = request.args.get('width', 300, type=int)
-    height = request.args.get('height', 200, type=int)
-    query = request.args.get('query', 'Imagen')
-    
-    # Crear SVG simple con texto
-    svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
-    <rect width="100%" height="100%" fill="#f8f9fa" stroke="#dee2e6" stroke-width="2"/>
-    <text x="50%" y="50%" font-family="Arial, sans-serif" font-size="16" 
-          text-anchor="middle" dominant-baseline="middle" fill="#6c757d">
-        {query}
-    </text>
-    <text x="50%" y="65%" font-family="Arial, sans-serif" font-size="12" 
-          text-anchor="middle" dominant-baseline="middle" fill="#adb5bd">
-        {width} × {height}
-    </text>
-</svg>'''
-    
-    return svg_content, 200, {'Content-Type': 'image/svg+xml'}
+    # El navegador ya tiene este placeholder
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = Response(contenido, mimetype='image/svg+xml')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={max_age()}'
+    return response
@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 from app.models.producto import Producto
 from app.models.categoria import Categoria
 from app.models.cliente import Cliente
 from app.models.favorito import Favorito
 from app.utils.decorators import login_required, admin_or_vendedor_required
+from app.utils.carrito import contar_carrito
+from app.utils.busqueda import Paginacion
+from app.utils.paginacion import parametros_pagina
+from app.utils.imagenes import guardar_imagen, ImagenNoValidaError
 
 productos_bp = Blueprint('productos', __name__)
 
@@ -16,10 +20,7 @@ def get_current_user():
 
 def get_cart_count():
     """Obtiene el número de items en el carrito"""
-    if 'user_id' not in session:
-        return 0
-    cliente = Cliente.find_by_id(session['user_id'])
-    return cliente.contar_items_carrito() if cliente else 0
+    return contar_carrito()
 
 def get_user_favorites():
     """Obtiene la lista de IDs de productos favoritos del usuario actual"""
@@ -56,14 +57,26 @@ def get_user_favorites():
 def catalogo():
     """Página de catálogo de productos"""
     categoria_id = request.args.get('categoria', type=int)
-    busqueda = request.args.get('q', '')
+    busqueda = request.args.get('q', '').strip()
+    pagina = request.args.get('pagina', 1, type=int)
     
     categorias = Categoria.get_all()
     
+    paginacion = None
+    total_productos = None
     if busqueda:
-        productos_lista = Producto.search(busqueda)
+        paginacion = Paginacion(pagina, current_app.config['BUSQUEDA_POR_PAGINA'],
+                                Producto.contar_busqueda(busqueda, categoria_id=categoria_id))
+        productos_lista = Producto.search(busqueda, categoria_id=categoria_id,
+                                          limite=paginacion.por_pagina, offset=paginacion.offset)
     else:
-        productos_lista = Producto.get_all(categoria_id=categoria_id)
+        try:
+            productos_lista = Producto.get_pagina(categoria_id=categoria_id, cursor=request.args.get('cursor'),
+                                                  limite=current_app.config['CATALOGO_POR_PAGINA'])
+        except ValueError:
+            productos_lista = Producto.get_pagina(categoria_id=categoria_id,
+                                                  limite=current_app.config['CATALOGO_POR_PAGINA'])
+        total_productos = Producto.contar(categoria_id=categoria_id)
     
     categoria_actual = None
     if categoria_id:
@@ -78,6 +91,8 @@ def catalogo():
                          categorias=categorias,
                          categoria_actual=categoria_actual,
                          busqueda=busqueda,
+                         paginacion=paginacion,
+                         total_productos=total_productos,
                          usuario=usuario,
                          carrito_count=carrito_count,
                          favoritos_ids=favoritos_ids)
@@ -110,11 +125,16 @@ def detalle(producto_id):
 @admin_or_vendedor_required
 def gestionar_productos():
     """Página de gestión de productos para admin y vendedor"""
-    productos_lista = Producto.get_all()
+    limite, cursor = parametros_pagina(current_app.config['LISTADOS_POR_PAGINA'])
+    try:
+        productos_lista = Producto.get_pagina(limite=limite, cursor=cursor)
+    except ValueError:
+        productos_lista = Producto.get_pagina(limite=limite)
     categorias = Categoria.get_all()
     
     return render_template('productos/gestionar.html', 
                          productos=productos_lista,
+                         resumen=Producto.get_resumen_stock(),
                          categorias=categorias)
 
 @productos_bp.route('/admin/productos/nuevo', methods=['GET', 'POST'])
@@ -132,10 +152,17 @@ def crear_producto():
                 'imagen': request.form.get('imagen', '')
             }
             
+            # Una imagen subida reemplaza la URL; sus variantes se generan en segundo plano
+            archivo = request.files.get('imagen_archivo')
+            if archivo and archivo.filename:
+                data['imagen'] = guardar_imagen(archivo)
+            
             producto_id = Producto.create(data)
             flash(f'Producto "{data["nombre"]}" creado exitosamente.', 'success')
             return redirect(url_for('productos.gestionar_productos'))
             
+        except ImagenNoValidaError as e:
+            flash(str(e), 'error')
         except ValueError as e:
             flash('Error en los datos del producto. Verifica precio y stock.', 'error')
         except Exception as e:
@@ -164,10 +191,17 @@ def editar_producto(producto_id):
                 'imagen': request.form.get('imagen', '')
             }
             
+            # Una imagen subida reemplaza la URL; sus variantes se generan en segundo plano
+            archivo = request.files.get('imagen_archivo')
+            if archivo and archivo.filename:
+                data['imagen'] = guardar_imagen(archivo)
+            
             producto.update(data)
             flash(f'Producto "{data["nombre"]}" actualizado exitosamente.', 'success')
             return redirect(url_for('productos.gestionar_productos'))
             
+        except ImagenNoValidaError as e:
+            flash(str(e), 'error')
         except ValueError as e:
             flash('Error en los datos del producto. Verifica precio y stock.', 'error')
         except Exception as e:
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from app.models.receta import Receta
 from app.models.categoria import Categoria
 from app.utils.decorators import login_required, admin_or_vendedor_required
+from app.utils.imagenes import guardar_imagen, ImagenNoValidaError
 
 recetas_bp = Blueprint('recetas', __name__)
 
@@ -41,10 +42,17 @@ def crear_receta():
                 'imagen': request.form.get('imagen', '')
             }
             
+            # Una imagen subida reemplaza la URL; sus variantes se generan en segundo plano
+            archivo = request.files.get('imagen_archivo')
+            if archivo and archivo.filename:
+                data['imagen'] = guardar_imagen(archivo)
+            
             receta_id = Receta.create(data)
             flash(f'Receta "{data["nombre"]}" creada exitosamente.', 'success')
             return redirect(url_for('recetas.gestionar_recetas'))
             
+        except ImagenNoValidaError as e:
+            flash(str(e), 'error')
         except ValueError as e:
             flash('Error en los datos de la receta. Verifica los campos numéricos.', 'error')
         except Exception as e:
@@ -76,10 +84,17 @@ def editar_receta(receta_id):
                 'imagen': request.form.get('imagen', '')
             }
             
+            # Una imagen subida reemplaza la URL; sus variantes se generan en segundo plano
+            archivo = request.files.get('imagen_archivo')
+            if archivo and archivo.filename:
+                data['imagen'] = guardar_imagen(archivo)
+            
             receta.update(data)
             flash(f'Receta "{data["nombre"]}" actualizada exitosamente.', 'success')
             return redirect(url_for('recetas.gestionar_recetas'))
             
+        except ImagenNoValidaError as e:
+            flash(str(e), 'error')
         except ValueError as e:
             flash('Error en los datos de la receta. Verifica los campos numéricos.', 'error')
         except Exception as e:
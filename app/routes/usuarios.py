@@ -27,12 +27,12 @@ def personal():
     vendedores = Usuario.get_by_role('vendedor')
     chefs = Usuario.get_by_role('chef')
     
-    # Calcular estadísticas para vendedores
+    # Calcular estadísticas para vendedores (una consulta agregada para todos)
+    resumen = Venta.get_resumen_vendedores_mes(fecha_actual.year, fecha_actual.month)
     for vendedor in vendedores:
-        # Ventas del mes actual
-        ventas_mes = Venta.get_ventas_by_vendedor_mes(vendedor.id, fecha_actual.year, fecha_actual.month)
-        vendedor.ventas_mes = sum(venta.total for venta in ventas_mes)
-        vendedor.pedidos_mes = len(ventas_mes)
+        datos = resumen.get(vendedor.id, {'pedidos': 0, 'total': 0})
+        vendedor.ventas_mes = datos['total']
+        vendedor.pedidos_mes = datos['pedidos']
     
     # Calcular estadísticas para chefs
     for chef in chefs:
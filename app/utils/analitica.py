@@ -0,0 +1,165 @@
+"""
+Analítica de ventas para los reportes y el dashboard avanzado.
+
+Las cifras salen de ventas_diarias, pedidos, detalle_pedidos y usuarios con
+cuatro consultas agregadas por período. Las filas se guardan en cache_analitica por
+(período, granularidad) y se invalidan cuando se crea un pedido, cambia su
+estado o se registra un usuario.
+"""
+from datetime import date, timedelta
+from app.models import get_db_connection
+from app.models.venta import CONDICION_VENTAS_VENDEDOR
+from app.utils.cache import cache_analitica
+from app.utils.fechas import hoy_utc
+
+GRANULARIDADES = ('dia', 'mes')
+
+MESES_CORTOS = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Meses que se muestran como mínimo en el gráfico de nuevos clientes
+MESES_CLIENTES = 5
+
+def periodo_dias(dias=30, hasta=None):
+    """Retorna (desde, hasta) para los últimos 'dias' días, incluido hasta (hoy en UTC)"""
+    hasta = hasta or hoy_utc()
+    return hasta - timedelta(days=dias - 1), hasta
+
+def _primer_dia_mes(dia, meses_atras=0):
+    indice = dia.year * 12 + dia.month - 1 - meses_atras
+    return date(indice // 12, indice % 12 + 1, 1)
+
+def _buckets(desde, hasta, granularidad):
+    """Fechas de inicio de cada intervalo del período, con su clave en SQL"""
+    buckets = []
+    if granularidad == 'dia':
+        dia = desde
+        while dia <= hasta:
+            buckets.append((dia, dia.isoformat()))
+            dia += timedelta(days=1)
+    else:
+        mes = _primer_dia_mes(desde)
+        while mes <= hasta:
+            buckets.append((mes, mes.strftime('%Y-%m')))
+            mes = _primer_dia_mes(mes, -1)
+    return buckets
+
+def _consultar(desde, hasta, granularidad):
+    """Ejecuta las consultas agregadas del período; retorna solo tuplas (se guardan en caché)"""
+    inicio, fin = desde.isoformat(), (hasta + timedelta(days=1)).isoformat()
+    largo = 10 if granularidad == 'dia' else 7  # 'YYYY-MM-DD' o 'YYYY-MM'
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # Ingresos y pedidos por día o por mes, desde el resumen ventas_diarias
+    cursor.execute('''
+        SELECT substr(fecha, 1, ?) as periodo, SUM(pedidos), SUM(total)
+        FROM ventas_diarias
+        WHERE fecha >= ? AND fecha < ?
+        AND estado != 'cancelado'
+        GROUP BY periodo
+    ''', (largo, inicio, fin))
+    ventas = tuple(cursor.fetchall())
+
+    # Productos más vendidos por unidades
+    cursor.execute('''
+        SELECT pr.nombre, v.unidades
+        FROM (
+            SELECT dp.producto_id, SUM(dp.cantidad) as unidades
+            FROM pedidos pe
+            JOIN detalle_pedidos dp ON dp.pedido_id = pe.id
+            WHERE pe.fecha_pedido >= ? AND pe.fecha_pedido < ?
+            AND pe.estado != 'cancelado'
+            GROUP BY dp.producto_id
+        ) v
+        JOIN productos pr ON pr.id = v.producto_id
+        ORDER BY v.unidades DESC, pr.nombre
+        LIMIT 6
+    ''', (inicio, fin))
+    productos = tuple(cursor.fetchall())
+
+    # Ingresos por vendedor (criterio de CONDICION_VENTAS_VENDEDOR)
+    cursor.execute(f'''
+        SELECT u.nombre, COALESCE(SUM(p.total), 0) as total_ventas
+        FROM usuarios u
+        LEFT JOIN pedidos p ON {CONDICION_VENTAS_VENDEDOR}
+        WHERE u.rol = 'vendedor' AND u.activo = 1
+        GROUP BY u.id
+        ORDER BY total_ventas DESC, u.nombre
+        LIMIT 5
+    ''', (inicio, fin))
+    vendedores = tuple(cursor.fetchall())
+
+    # Nuevos clientes por mes (al menos MESES_CLIENTES meses) y dentro del período
+    inicio_clientes = min(_primer_dia_mes(hasta, MESES_CLIENTES - 1), desde).isoformat()
+    cursor.execute('''
+        SELECT strftime('%Y-%m', fecha_registro) as mes, COUNT(*),
+               SUM(CASE WHEN fecha_registro >= ? THEN 1 ELSE 0 END)
+        FROM usuarios
+        WHERE rol = 'cliente' AND fecha_registro >= ? AND fecha_registro < ?
+        GROUP BY mes
+    ''', (inicio, inicio_clientes, fin))
+    clientes = tuple(cursor.fetchall())
+
+    conn.close()
+
+    return ventas, productos, vendedores, clientes
+
+def obtener_analitica(desde, hasta, granularidad='dia'):
+    """
+    Datos de ventas del período [desde, hasta] (fechas UTC, ambos incluidos).
+    Los intervalos sin ventas aparecen con 0, así las listas de fechas y
+    ventas nunca quedan vacías.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f'Granularidad no válida: {granularidad}')
+    if desde > hasta:
+        raise ValueError('El período no es válido')
+
+    clave = ('analitica', desde.isoformat(), hasta.isoformat(), granularidad)
+    ventas, productos, vendedores, clientes = cache_analitica.obtener(
+        clave, lambda: _consultar(desde, hasta, granularidad))
+
+    por_periodo = {row[0]: row for row in ventas}
+    buckets = _buckets(desde, hasta, granularidad)
+
+    clientes_por_mes = {row[0]: row[1] for row in clientes}
+    meses = [mes for mes, _ in _buckets(_primer_dia_mes(hasta, MESES_CLIENTES - 1), hasta, 'mes')]
+    if desde < meses[0]:
+        meses = [mes for mes, _ in _buckets(desde, hasta, 'mes')]
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'granularidad': granularidad,
+        'fechas': [inicio for inicio, _ in buckets],
+        'ventas_diarias': [float(por_periodo[periodo][2]) if periodo in por_periodo else 0.0 for _, periodo in buckets],
+        'pedidos': [por_periodo[periodo][1] if periodo in por_periodo else 0 for _, periodo in buckets],
+        'productos': [row[0] for row in productos],
+        'ventas_productos': [row[1] for row in productos],
+        'vendedores': [row[0] for row in vendedores],
+        'ventas_vendedores': [float(row[1]) for row in vendedores],
+        'meses': [MESES_CORTOS[mes.month - 1] for mes in meses],
+        'nuevos_clientes': [clientes_por_mes.get(mes.strftime('%Y-%m'), 0) for mes in meses],
+        'clientes_periodo': sum(row[2] for row in clientes)
+    }
+
+def calcular_metricas(datos):
+    """Indicadores resumidos del período; tolera períodos sin ventas ni clientes"""
+    ventas = datos['ventas_diarias']
+    clientes = datos['nuevos_clientes']
+
+    if clientes and clientes[0]:
+        crecimiento_clientes = (clientes[-1] - clientes[0]) / clientes[0] * 100
+    else:
+        crecimiento_clientes = 100.0 if clientes and clientes[-1] else 0.0
+
+    return {
+        'total_ventas_mes': sum(ventas),
+        'total_pedidos': sum(datos['pedidos']),
+        'promedio_diario': sum(ventas) / len(ventas) if ventas else 0,
+        'mejor_dia': max(ventas) if ventas else 0,
+        'producto_estrella': datos['productos'][0] if datos['productos'] else 'Sin ventas',
+        'vendedor_mes': datos['vendedores'][0] if datos['vendedores'] else 'Sin vendedores',
+        'crecimiento_clientes': crecimiento_clientes
+    }
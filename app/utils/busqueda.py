@@ -0,0 +1,49 @@
+"""
+Búsqueda de texto completo sobre productos_fts y recetas_fts (migración 0009).
+
+El texto del usuario nunca se pasa tal cual a MATCH: se separa en palabras y
+cada una se busca como prefijo entre comillas, así "pan fran" encuentra
+"Pan Francés" y caracteres como comillas, guiones o asteriscos no rompen la
+consulta. Todas las palabras deben aparecer (AND implícito de FTS5).
+"""
+import math
+import re
+
+MAX_PALABRAS = 8
+_PALABRA = re.compile(r'\w+')
+
+def expresion_fts(texto):
+    """Expresión MATCH para el texto buscado, o None si no tiene palabras"""
+    palabras = _PALABRA.findall((texto or '').lower())[:MAX_PALABRAS]
+    if not palabras:
+        return None
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+class Paginacion:
+    """Datos de una página de resultados para las plantillas y la API"""
+
+    def __init__(self, pagina, por_pagina, total):
+        self.por_pagina = por_pagina
+        self.total = total
+        self.paginas = max(1, math.ceil(total / por_pagina))
+        self.pagina = min(max(1, pagina), self.paginas)
+
+    @property
+    def offset(self):
+        return (self.pagina - 1) * self.por_pagina
+
+    @property
+    def anterior(self):
+        return self.pagina - 1 if self.pagina > 1 else None
+
+    @property
+    def siguiente(self):
+        return self.pagina + 1 if self.pagina < self.paginas else None
+
+    def to_dict(self):
+        return {
+            'pagina': self.pagina,
+            'por_pagina': self.por_pagina,
+            'total': self.total,
+            'paginas': self.paginas
+        }
@@ -0,0 +1,207 @@
+"""
+Cachés en memoria: con expiración (TTL) para lecturas frecuentes y LRU de
+tamaño fijo para valores que no cambian
+"""
+import threading
+import time
+from collections import OrderedDict
+
+class CacheTTL:
+    """
+    Caché de lectura en memoria del proceso, segura entre hilos.
+
+    Las claves son tuplas cuyo primer elemento es el espacio de nombres
+    (por ejemplo ('productos', 'id', 5)), así se puede invalidar todo un
+    espacio de una vez cuando cambian los datos. Los valores deben ser
+    inmutables (filas de la base de datos, tuplas), nunca objetos de modelo
+    que el llamador pueda modificar.
+
+    Con ttl = 0 la caché queda desactivada y toda lectura va a la base de datos.
+    """
+
+    def __init__(self, nombre, ttl=60, max_entradas=2048):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidaciones = 0
+
+    def configurar(self, ttl=None, max_entradas=None):
+        """Ajusta la caché con los valores de config.py y la vacía"""
+        if ttl is not None:
+            self.ttl = ttl
+        if max_entradas is not None:
+            self.max_entradas = max_entradas
+        self.invalidar()
+
+    def obtener(self, clave, cargar):
+        """
+        Retorna el valor de la clave; si no está o expiró, lo obtiene con
+        cargar() y lo guarda.
+        """
+        if self.ttl <= 0:
+            return cargar()
+
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and entrada[0] > ahora:
+                self._hits += 1
+                return entrada[1]
+            self._misses += 1
+            version = self._invalidaciones
+
+        valor = cargar()
+
+        with self._lock:
+            # Si hubo una invalidación mientras se cargaba, el valor puede estar viejo
+            if version == self._invalidaciones:
+                if len(self._datos) >= self.max_entradas:
+                    self._purgar(ahora)
+                self._datos[clave] = (ahora + self.ttl, valor)
+        return valor
+
+    def obtener_varios(self, claves, cargar):
+        """
+        Igual que obtener() para varias claves: las que faltan se piden juntas
+        con cargar(faltantes), que debe retornar un diccionario {clave: valor}.
+        Las claves que cargar() no retorna quedan guardadas como None.
+        """
+        if self.ttl <= 0:
+            return cargar(list(claves))
+
+        ahora = time.monotonic()
+        resultado = {}
+        faltantes = []
+        with self._lock:
+            for clave in claves:
+                entrada = self._datos.get(clave)
+                if entrada and entrada[0] > ahora:
+                    self._hits += 1
+                    resultado[clave] = entrada[1]
+                else:
+                    self._misses += 1
+                    faltantes.append(clave)
+            version = self._invalidaciones
+
+        if not faltantes:
+            return resultado
+
+        cargados = cargar(faltantes)
+
+        with self._lock:
+            guardar = version == self._invalidaciones
+            for clave in faltantes:
+                valor = cargados.get(clave)
+                resultado[clave] = valor
+                if guardar:
+                    if len(self._datos) >= self.max_entradas:
+                        self._purgar(ahora)
+                    self._datos[clave] = (ahora + self.ttl, valor)
+        return resultado
+
+    def _purgar(self, ahora):
+        """Elimina las entradas vencidas; si no alcanza, vacía la caché"""
+        vencidas = [clave for clave, (expira, _) in self._datos.items() if expira <= ahora]
+        for clave in vencidas:
+            del self._datos[clave]
+        if len(self._datos) >= self.max_entradas:
+            self._datos.clear()
+
+    def invalidar(self, *espacios):
+        """Elimina las entradas de los espacios indicados, o todas si no se indica ninguno"""
+        with self._lock:
+            self._invalidaciones += 1
+            if not espacios:
+                self._datos.clear()
+                return
+            for clave in [clave for clave in self._datos if clave[0] in espacios]:
+                del self._datos[clave]
+
+    def stats(self):
+        """Contadores de uso de la caché"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'nombre': self.nombre,
+                'ttl': self.ttl,
+                'entradas': len(self._datos),
+                'hits': self._hits,
+                'misses': self._misses,
+                'invalidaciones': self._invalidaciones,
+                'hit_ratio': self._hits / total if total else 0
+            }
+
+# Catálogo de la tienda: productos y categorías
+cache_catalogo = CacheTTL('catalogo')
+
+# Configuración del sitio: system_settings e historia_images
+cache_configuracion = CacheTTL('configuracion', ttl=300)
+
+# Analítica de ventas: agregados por período, se invalida con cada pedido
+cache_analitica = CacheTTL('analitica', ttl=300, max_entradas=256)
+
+class CacheLRU:
+    """
+    Caché en memoria de tamaño fijo que descarta la entrada usada hace más
+    tiempo, segura entre hilos. Para valores que no vencen (dependen solo de
+    la clave), como los placeholders SVG.
+    """
+
+    def __init__(self, nombre, max_entradas=256):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._descartes = 0
+
+    def configurar(self, max_entradas=None):
+        """Ajusta la caché con los valores de config.py y la vacía"""
+        with self._lock:
+            if max_entradas is not None:
+                self.max_entradas = max_entradas
+            self._datos.clear()
+
+    def obtener(self, clave, cargar):
+        """
+        Retorna el valor de la clave; si no está, lo obtiene con cargar() y
+        lo guarda, descartando la entrada menos usada si la caché está llena.
+        """
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self._hits += 1
+                return self._datos[clave]
+            self._misses += 1
+
+        valor = cargar()
+
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self._descartes += 1
+        return valor
+
+    def stats(self):
+        """Contadores de uso de la caché"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'nombre': self.nombre,
+                'max_entradas': self.max_entradas,
+                'entradas': len(self._datos),
+                'hits': self._hits,
+                'misses': self._misses,
+                'descartes': self._descartes,
+                'hit_ratio': self._hits / total if total else 0
+            }
+
+# Placeholders SVG ya renderizados, por (ancho, alto, texto)
+cache_placeholders = CacheLRU('placeholders', max_entradas=256)
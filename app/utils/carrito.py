@@ -0,0 +1,62 @@
+"""
+Carrito de compras del usuario actual.
+
+El carrito vive en la base de datos (app/models/carrito.py) y la sesión solo
+guarda su clave: el id del usuario con sesión iniciada o un token aleatorio
+para visitantes. Al iniciar sesión el carrito del visitante se suma al de la
+cuenta.
+"""
+import secrets
+
+from flask import g, session
+
+from app.models.carrito import Carrito
+
+def clave_carrito(crear=False):
+    """
+    Clave del carrito del usuario actual, o None si el visitante todavía no
+    tiene carrito y crear es False (así contar o mostrar un carrito vacío no
+    crea sesiones).
+    """
+    if 'user_id' in session:
+        clave = f"u:{session['user_id']}"
+    else:
+        if 'carrito_id' not in session:
+            if not crear and 'carrito' not in session:
+                return None
+            session['carrito_id'] = secrets.token_urlsafe(16)
+            session.permanent = True
+        clave = f"s:{session['carrito_id']}"
+
+    # Carritos guardados en la cookie antes de pasar a la base de datos
+    if 'carrito' in session:
+        Carrito.importar(clave, session.pop('carrito'))
+    return clave
+
+def items_carrito():
+    """Productos del carrito actual como {producto_id: cantidad}"""
+    clave = clave_carrito()
+    return Carrito.get_items(clave) if clave else {}
+
+def contar_carrito():
+    """Cantidad de items del carrito actual (una vez por request)"""
+    if 'carrito_count' not in g:
+        clave = clave_carrito()
+        g.carrito_count = Carrito.get_count(clave) if clave else 0
+    return g.carrito_count
+
+def fusionar_carrito_anonimo(user_id):
+    """Pasa el carrito del visitante a la cuenta que acaba de iniciar sesión"""
+    g.pop('carrito_count', None)
+    carrito_id = session.pop('carrito_id', None)
+    if carrito_id:
+        Carrito.fusionar(f's:{carrito_id}', f'u:{user_id}')
+    if 'carrito' in session:
+        Carrito.importar(f'u:{user_id}', session.pop('carrito'))
+
+def init_carrito(app):
+    """Expone el contador a las plantillas y borra carritos de visitantes abandonados"""
+    app.context_processor(lambda: {'contar_carrito': contar_carrito})
+
+    with app.app_context():
+        Carrito.purgar_anonimos(app.config['CARRITO_ANONIMO_DIAS'])
@@ -0,0 +1,167 @@
+"""
+Cola local de trabajos para los reportes PDF del personal.
+
+Los trabajos se guardan en la tabla trabajos_reportes y se ejecutan en un
+pool de hilos de tamaño fijo (REPORTES_WORKERS), así una petición solo
+registra el trabajo y responde de inmediato. Si la cola ya tiene
+REPORTES_MAX_PENDIENTES trabajos activos, los nuevos se rechazan.
+Los PDF terminados quedan en REPORTES_DIR (app/static/reportes).
+
+Los trabajos pendientes de una ejecución anterior se retoman con la primera
+petición que atiende cada proceso, no al crear la aplicación: con
+preload_app gunicorn la crea en el proceso maestro, que no atiende peticiones
+y cuyos hilos no pasan a los workers.
+
+Un trabajo que sigue 'en_proceso' después de REPORTES_TIMEOUT segundos se da
+por huérfano (el worker que lo generaba murió: timeout de gunicorn, falta de
+memoria) y pasa a error. Se revisa al iniciar, con la primera petición de cada
+worker y antes de encolar, así un huérfano no bloquea para siempre el mismo
+reporte ni ocupa lugar en REPORTES_MAX_PENDIENTES. REPORTES_TIMEOUT no corta
+un reporte que tarda: si termina después, queda completado igual.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.trabajo_reporte import TrabajoReporte
+
+logger = logging.getLogger(__name__)
+
+class ColaLlenaError(Exception):
+    """Se lanza cuando hay demasiados trabajos pendientes"""
+
+_config = {
+    'directorio': os.path.join('app', 'static', 'reportes'),
+    'workers': 2,
+    'max_pendientes': 20,
+    'timeout': 300
+}
+_app = None
+_executor = None
+_retomados = False
+_lock = threading.Lock()
+
+def init_cola_reportes(app):
+    """Configura la cola y marca como interrumpidos los trabajos huérfanos"""
+    global _app
+    _app = app
+    _config['directorio'] = app.config['REPORTES_DIR']
+    _config['workers'] = app.config['REPORTES_WORKERS']
+    _config['max_pendientes'] = app.config['REPORTES_MAX_PENDIENTES']
+    _config['timeout'] = app.config['REPORTES_TIMEOUT']
+    os.makedirs(_config['directorio'], exist_ok=True)
+
+    with app.app_context():
+        # Un trabajo en proceso por más del límite quedó huérfano (proceso reiniciado)
+        TrabajoReporte.marcar_interrumpidos(_config['timeout'])
+
+    app.before_request(_retomar_pendientes)
+
+def reiniciar_tras_fork():
+    """
+    Olvida el pool de hilos heredado del proceso padre: en un proceso hijo
+    (worker de gunicorn) esos hilos no existen y se crean de nuevo al usarlo.
+    """
+    global _executor, _retomados, _lock
+    _executor = None
+    _retomados = False
+    _lock = threading.Lock()
+
+def _retomar_pendientes():
+    """
+    before_request: la primera petición del proceso marca los huérfanos y
+    envía al pool los trabajos que quedaron pendientes. Si varios workers los envían, tomar() deja que
+    solo uno genere cada reporte.
+    """
+    global _retomados
+    if _retomados:
+        return
+    with _lock:
+        if _retomados:
+            return
+        _retomados = True
+
+    try:
+        TrabajoReporte.marcar_interrumpidos(_config['timeout'])
+        pendientes = TrabajoReporte.get_pendientes()
+    except Exception:
+        logger.exception('No se pudieron retomar los reportes pendientes')
+        return
+    for trabajo in pendientes:
+        _get_executor().submit(_ejecutar, trabajo.id)
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_config['workers'],
+                                           thread_name_prefix='reportes')
+        return _executor
+
+def encolar(tipo, parametros, usuario_id=None):
+    """
+    Registra un trabajo y lo envía al pool. Si ya hay uno igual pendiente o
+    en proceso, retorna ese mismo. Retorna el id del trabajo.
+    """
+    from app.utils.reportes_pdf import GENERADORES
+
+    if tipo not in GENERADORES:
+        raise ValueError(f'Tipo de reporte desconocido: {tipo}')
+
+    # Un huérfano no debe contar como activo ni reemplazar al trabajo nuevo
+    TrabajoReporte.marcar_interrumpidos(_config['timeout'])
+
+    existente = TrabajoReporte.find_activo(tipo, parametros)
+    if existente:
+        return existente.id
+
+    if TrabajoReporte.contar_activos() >= _config['max_pendientes']:
+        raise ColaLlenaError('Hay demasiados reportes en cola, intenta en unos minutos')
+
+    trabajo_id = TrabajoReporte.create(tipo, parametros, usuario_id)
+    _get_executor().submit(_ejecutar, trabajo_id)
+    return trabajo_id
+
+def _ejecutar(trabajo_id):
+    """Tarea del pool: genera el PDF del trabajo y registra el resultado"""
+    with _app.app_context():
+        _ejecutar_trabajo(trabajo_id)
+
+def _ejecutar_trabajo(trabajo_id):
+    from app.utils.reportes_pdf import GENERADORES
+
+    trabajo = None
+    ruta = None
+    inicio = time.perf_counter()
+    try:
+        if not TrabajoReporte.tomar(trabajo_id):
+            return
+        trabajo = TrabajoReporte.find_by_id(trabajo_id)
+
+        # Nombre no adivinable: la carpeta se publica como estática
+        archivo = f'reporte_{trabajo.tipo}_{trabajo.id}_{secrets.token_hex(8)}.pdf'
+        ruta = os.path.join(_config['directorio'], archivo)
+        GENERADORES[trabajo.tipo](ruta, **trabajo.parametros)
+        TrabajoReporte.marcar_completado(trabajo_id, archivo, (time.perf_counter() - inicio) * 1000)
+    except Exception as e:
+        # También si falla tomar() o find_by_id(): el trabajo no puede quedar
+        # pendiente para siempre, find_activo() lo seguiría devolviendo
+        logger.exception('Error generando reporte', extra={'trabajo_id': trabajo_id,
+                                                           'tipo': trabajo.tipo if trabajo else None})
+        TrabajoReporte.marcar_error(trabajo_id, str(e), (time.perf_counter() - inicio) * 1000)
+        if ruta and os.path.exists(ruta):
+            os.remove(ruta)
+
+def ruta_archivo(trabajo):
+    """Ruta en disco del PDF de un trabajo completado"""
+    return os.path.join(_config['directorio'], trabajo.archivo)
+
+def metricas():
+    """Tiempos por tipo de reporte, trabajos por estado y configuración de la cola"""
+    datos = TrabajoReporte.get_metricas()
+    datos['workers'] = _config['workers']
+    datos['max_pendientes'] = _config['max_pendientes']
+    return datos
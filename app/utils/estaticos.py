@@ -0,0 +1,162 @@
+"""
+Archivos estáticos con el hash de su contenido en la URL, caché de larga
+duración y versiones precomprimidas.
+
+Al iniciar se recorre app/static (salvo ESTATICOS_EXCLUIDOS) y se arma un
+manifiesto {ruta: ruta con hash}, por ejemplo
+images/logo-panaderia.jpg -> images/logo-panaderia.3f9a0c1d2e4b.jpg; se
+guarda en ESTATICOS_MANIFIESTO para consultarlo desde fuera de la aplicación.
+
+- url_for('static', filename=...) devuelve la ruta con hash (url_defaults),
+  así que un archivo que cambia cambia de URL.
+- Las rutas con hash se sirven desde el archivo original con
+  Cache-Control: public, max-age=ESTATICOS_MAX_AGE, immutable: el navegador
+  no vuelve a pedirlas ni a revalidarlas. Lo mismo para ESTATICOS_INMUTABLES
+  (carpetas cuyos nombres ya son hashes, como las imágenes subidas).
+- Los archivos de texto (ESTATICOS_COMPRIMIR) tienen a su lado una copia
+  .gz y, si el paquete brotli está instalado, una .br; se sirven según el
+  Accept-Encoding del navegador.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # opcional: sin él solo se genera .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_config = {
+    'max_age': 365 * 24 * 3600,
+    'inmutables': ()
+}
+_manifiesto = {}
+_originales = {}
+_comprimidos = {}
+
+# Sufijo del archivo precomprimido por codificación, en orden de preferencia
+_CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+def _hash_archivo(ruta):
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(65536), b''):
+            sha.update(bloque)
+    return sha.hexdigest()[:12]
+
+def _ruta_con_hash(ruta, hash_contenido):
+    base, extension = os.path.splitext(ruta)
+    return f'{base}.{hash_contenido}{extension}'
+
+def _precomprimir(ruta):
+    """Escribe las copias .gz y .br junto al archivo si faltan o son más viejas"""
+    disponibles = []
+    with open(ruta, 'rb') as archivo:
+        datos = archivo.read()
+    for codificacion, sufijo in _CODIFICACIONES:
+        if codificacion == 'br' and brotli is None:
+            continue
+        destino = ruta + sufijo
+        if not os.path.exists(destino) or os.path.getmtime(destino) < os.path.getmtime(ruta):
+            comprimido = brotli.compress(datos) if codificacion == 'br' else gzip.compress(datos, 9, mtime=0)
+            # Si no achica, no vale la pena servirlo
+            if len(comprimido) >= len(datos):
+                continue
+            temporal = f'{destino}.{os.getpid()}.tmp'
+            with open(temporal, 'wb') as archivo:
+                archivo.write(comprimido)
+            os.replace(temporal, destino)
+        disponibles.append(codificacion)
+    return disponibles
+
+def construir_manifiesto(directorio, excluidos=(), comprimir=(), comprimir_min_bytes=0):
+    """
+    Recorre el directorio de estáticos y retorna (manifiesto, comprimidos):
+    la ruta con hash de cada archivo y las codificaciones precomprimidas
+    disponibles para los de texto. Las rutas usan '/' como separador.
+    """
+    manifiesto = {}
+    comprimidos = {}
+    for raiz, carpetas, archivos in os.walk(directorio):
+        carpetas.sort()
+        for nombre in sorted(archivos):
+            ruta = os.path.join(raiz, nombre)
+            relativa = os.path.relpath(ruta, directorio).replace(os.sep, '/')
+            if (relativa.startswith(tuple(excluidos)) or nombre.startswith('.')
+                    or nombre.endswith(('.gz', '.br', '.tmp'))):
+                continue
+            manifiesto[relativa] = _ruta_con_hash(relativa, _hash_archivo(ruta))
+            if nombre.lower().endswith(tuple(comprimir)) and os.path.getsize(ruta) >= comprimir_min_bytes:
+                disponibles = _precomprimir(ruta)
+                if disponibles:
+                    comprimidos[relativa] = disponibles
+    return manifiesto, comprimidos
+
+def _agregar_hash(endpoint, values):
+    """url_defaults: url_for('static', filename=...) apunta a la ruta con hash"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = _manifiesto.get(values['filename'], values['filename'])
+
+def _codificacion_aceptada(ruta):
+    for codificacion, sufijo in _CODIFICACIONES:
+        if codificacion in _comprimidos.get(ruta, ()) and request.accept_encodings[codificacion]:
+            return codificacion, sufijo
+    return None, None
+
+def _vista_estaticos(app):
+    """Vista de /static que resuelve las rutas con hash y elige la versión comprimida"""
+    def static(filename):
+        original = _originales.get(filename)
+        ruta = original or filename
+        codificacion, sufijo = _codificacion_aceptada(ruta)
+        if codificacion:
+            response = send_from_directory(app.static_folder, ruta + sufijo,
+                                           mimetype=mimetypes.guess_type(ruta)[0] or 'application/octet-stream')
+            response.headers['Content-Encoding'] = codificacion
+        else:
+            response = app.send_static_file(ruta)
+
+        if ruta in _comprimidos:
+            response.vary.add('Accept-Encoding')
+        if original or ruta.startswith(_config['inmutables']):
+            response.headers['Cache-Control'] = f"public, max-age={_config['max_age']}, immutable"
+        return response
+    return static
+
+def init_estaticos(app):
+    """Arma el manifiesto de estáticos y reemplaza la vista de /static"""
+    _config['max_age'] = app.config['ESTATICOS_MAX_AGE']
+    _config['inmutables'] = tuple(app.config['ESTATICOS_INMUTABLES'])
+
+    manifiesto, comprimidos = construir_manifiesto(app.static_folder,
+                                                   app.config['ESTATICOS_EXCLUIDOS'],
+                                                   app.config['ESTATICOS_COMPRIMIR'],
+                                                   app.config['ESTATICOS_COMPRIMIR_MIN_BYTES'])
+    _comprimidos.clear()
+    _comprimidos.update(comprimidos)
+    _manifiesto.clear()
+    _originales.clear()
+    if app.config['ESTATICOS_HASH']:
+        _manifiesto.update(manifiesto)
+        _originales.update({con_hash: ruta for ruta, con_hash in manifiesto.items()})
+
+    try:
+        os.makedirs(os.path.dirname(app.config['ESTATICOS_MANIFIESTO']), exist_ok=True)
+        temporal = f"{app.config['ESTATICOS_MANIFIESTO']}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({'archivos': manifiesto, 'comprimidos': comprimidos}, archivo, indent=2, sort_keys=True)
+        os.replace(temporal, app.config['ESTATICOS_MANIFIESTO'])
+    except OSError:
+        logger.exception('No se pudo escribir el manifiesto de estáticos')
+
+    logger.info('Manifiesto de estáticos: %d archivos, %d precomprimidos', len(manifiesto), len(comprimidos))
+
+    app.view_functions['static'] = _vista_estaticos(app)
+    app.url_defaults(_agregar_hash)
@@ -0,0 +1,44 @@
+"""
+Utilidades para construir rangos de fechas en las consultas
+"""
+from datetime import date, datetime, timedelta, timezone
+
+def rango_mes(año, mes):
+    """
+    Retorna los límites [inicio, fin) de un mes como cadenas 'YYYY-MM-DD'.
+    Se comparan directamente contra columnas TIMESTAMP ('YYYY-MM-DD HH:MM:SS'),
+    así la condición puede usar un índice sobre la columna.
+    Ejemplo: rango_mes(2024, 12) -> ('2024-12-01', '2025-01-01')
+    """
+    inicio = date(año, mes, 1)
+    if mes == 12:
+        fin = date(año + 1, 1, 1)
+    else:
+        fin = date(año, mes + 1, 1)
+    return inicio.isoformat(), fin.isoformat()
+
+def rango_dia(dia):
+    """
+    Retorna los límites [inicio, fin) de un día como cadenas 'YYYY-MM-DD'.
+    Ejemplo: rango_dia(date(2024, 12, 31)) -> ('2024-12-31', '2025-01-01')
+    """
+    return dia.isoformat(), (dia + timedelta(days=1)).isoformat()
+
+def hoy_utc():
+    """
+    Fecha actual en UTC, que es como SQLite guarda CURRENT_TIMESTAMP
+    """
+    return datetime.now(timezone.utc).date()
+
+def texto_a_fecha(valor):
+    """
+    Convierte un TIMESTAMP de SQLite ('YYYY-MM-DD HH:MM:SS[.ffffff]') a
+    datetime. Los valores que ya son fechas se retornan tal cual y los que no
+    se pueden leer como None.
+    """
+    if not isinstance(valor, str):
+        return valor
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        return None
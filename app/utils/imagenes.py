@@ -0,0 +1,233 @@
+"""
+Imágenes subidas por el personal (productos, recetas e historia) y sus
+variantes redimensionadas.
+
+Al subir una imagen se valida con Pillow y se guarda tal cual en
+IMAGENES_DIR con el hash de su contenido como nombre, así la misma imagen
+subida dos veces ocupa un solo archivo. La petición responde de inmediato y
+un pool de hilos (IMAGENES_WORKERS) genera las variantes de IMAGENES_VARIANTES
+(miniatura, tarjeta, hero) en WebP y JPEG dentro de IMAGENES_VARIANTES_DIR,
+con nombres <hash>-<variante>.<formato>; al terminar escribe <hash>.json con
+los anchos reales, que marca la imagen como lista.
+
+Mientras las variantes no estén listas se sirve la original. Después:
+- variante_url() da la URL de una variante (la tarjeta para el catálogo),
+- srcset() arma el atributo srcset con todas las variantes de un formato,
+  para que el navegador de un celular descargue la más chica que le sirve.
+Las URLs externas (http...) y los placeholders se devuelven sin cambios.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+class ImagenNoValidaError(Exception):
+    """Se lanza cuando el archivo subido no es una imagen aceptada"""
+
+_FORMATOS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+_RUTA_SUBIDA = re.compile(r'^/static/images/subidas/([0-9a-f]{16})\.(?:jpg|png|webp)$')
+
+_config = {
+    'directorio': os.path.join('app', 'static', 'images', 'subidas'),
+    'directorio_variantes': os.path.join('app', 'static', 'images', 'variantes'),
+    'variantes': {'miniatura': 160, 'tarjeta': 480, 'hero': 1200},
+    'calidad_webp': 80,
+    'calidad_jpeg': 82,
+    'max_pixeles': 40_000_000,
+    'workers': 1
+}
+_app = None
+_executor = None
+_en_proceso = set()
+_listas = {}
+_lock = threading.Lock()
+
+def init_imagenes(app):
+    """Configura las imágenes, retoma las variantes pendientes y expone los helpers en las plantillas"""
+    global _app
+    _app = app
+    _config['directorio'] = app.config['IMAGENES_DIR']
+    _config['directorio_variantes'] = app.config['IMAGENES_VARIANTES_DIR']
+    _config['variantes'] = dict(app.config['IMAGENES_VARIANTES'])
+    _config['calidad_webp'] = app.config['IMAGENES_CALIDAD_WEBP']
+    _config['calidad_jpeg'] = app.config['IMAGENES_CALIDAD_JPEG']
+    _config['max_pixeles'] = app.config['IMAGENES_MAX_PIXELES']
+    _config['workers'] = app.config['IMAGENES_WORKERS']
+    os.makedirs(_config['directorio'], exist_ok=True)
+    os.makedirs(_config['directorio_variantes'], exist_ok=True)
+    _listas.clear()
+
+    # Originales sin variantes (el proceso se detuvo antes de terminarlas)
+    for ruta in glob.glob(os.path.join(_config['directorio'], '*.*')):
+        coincidencia = _RUTA_SUBIDA.match(f'/static/images/subidas/{os.path.basename(ruta)}')
+        if coincidencia and not os.path.exists(_ruta_info(coincidencia.group(1))):
+            _encolar(coincidencia.group(1), ruta)
+
+    app.add_template_global(variante_url, 'imagen_variante')
+    app.add_template_global(srcset, 'imagen_srcset')
+
+def reiniciar_tras_fork():
+    """
+    Olvida el pool de hilos y las imágenes en proceso heredados del proceso
+    padre: en un proceso hijo (worker de gunicorn) esos hilos no existen.
+    """
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+    _en_proceso.clear()
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_config['workers'],
+                                           thread_name_prefix='imagenes')
+        return _executor
+
+def _ruta_info(clave):
+    return os.path.join(_config['directorio_variantes'], f'{clave}.json')
+
+def _nombre_variante(clave, nombre, formato):
+    return f'{clave}-{nombre}.{formato}'
+
+def guardar_imagen(archivo):
+    """
+    Guarda una imagen subida (FileStorage) y encola sus variantes.
+    Retorna la URL de la original, que es la que se guarda en la base de datos.
+    """
+    datos = archivo.read()
+    try:
+        with Image.open(BytesIO(datos)) as imagen:
+            formato = imagen.format
+            ancho, alto = imagen.size
+            imagen.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ImagenNoValidaError('El archivo no es una imagen válida')
+
+    if formato not in _FORMATOS:
+        raise ImagenNoValidaError('Formato no soportado, usa JPG, PNG o WebP')
+    if ancho * alto > _config['max_pixeles']:
+        raise ImagenNoValidaError('La imagen es demasiado grande')
+
+    clave = hashlib.sha256(datos).hexdigest()[:16]
+    nombre = f'{clave}.{_FORMATOS[formato]}'
+    ruta = os.path.join(_config['directorio'], nombre)
+    if not os.path.exists(ruta):
+        _escribir(ruta, datos)
+    if not os.path.exists(_ruta_info(clave)):
+        _encolar(clave, ruta)
+    return f'/static/images/subidas/{nombre}'
+
+def _escribir(ruta, datos):
+    temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(datos)
+    os.replace(temporal, ruta)
+
+def _encolar(clave, ruta):
+    with _lock:
+        if clave in _en_proceso:
+            return
+        _en_proceso.add(clave)
+    _get_executor().submit(_procesar, clave, ruta)
+
+def _procesar(clave, ruta):
+    """Tarea del pool: genera las variantes de una imagen"""
+    try:
+        with _app.app_context():
+            _generar_variantes(clave, ruta)
+    finally:
+        with _lock:
+            _en_proceso.discard(clave)
+
+def _generar_variantes(clave, ruta):
+    """Genera las variantes WebP y JPEG de una imagen"""
+    inicio = time.perf_counter()
+    try:
+        with Image.open(ruta) as original:
+            imagen = ImageOps.exif_transpose(original)
+            imagen.load()
+
+        # JPEG no tiene transparencia: se aplana sobre blanco
+        if imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info):
+            imagen = imagen.convert('RGBA')
+            opaca = Image.new('RGB', imagen.size, (255, 255, 255))
+            opaca.paste(imagen, mask=imagen.getchannel('A'))
+        else:
+            imagen = opaca = imagen.convert('RGB')
+
+        anchos = {}
+        for nombre, ancho_max in sorted(_config['variantes'].items(), key=lambda variante: variante[1]):
+            # Nunca se agranda: si la original es más chica, la variante queda de su tamaño
+            ancho = min(ancho_max, imagen.width)
+            alto = max(1, round(imagen.height * ancho / imagen.width))
+            for formato, fuente in (('webp', imagen), ('jpg', opaca)):
+                variante = fuente.resize((ancho, alto), Image.LANCZOS, reducing_gap=3.0)
+                salida = BytesIO()
+                if formato == 'webp':
+                    variante.save(salida, 'WEBP', quality=_config['calidad_webp'], method=4)
+                else:
+                    variante.save(salida, 'JPEG', quality=_config['calidad_jpeg'], optimize=True, progressive=True)
+                _escribir(os.path.join(_config['directorio_variantes'], _nombre_variante(clave, nombre, formato)),
+                          salida.getvalue())
+            anchos[nombre] = ancho
+
+        info = {'ancho': imagen.width, 'alto': imagen.height, 'variantes': anchos}
+        _escribir(_ruta_info(clave), json.dumps(info).encode('utf-8'))
+        logger.info('Variantes generadas para la imagen %s', clave, extra={
+            'imagen': clave,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        })
+    except Exception:
+        logger.exception('Error al generar las variantes de la imagen %s', clave)
+
+def _info(url):
+    """Anchos de las variantes si la URL es una imagen subida ya procesada, si no None"""
+    coincidencia = _RUTA_SUBIDA.match(url or '')
+    if not coincidencia:
+        return None
+    clave = coincidencia.group(1)
+    info = _listas.get(clave)
+    if info is None:
+        # Solo se recuerdan las listas: las demás se vuelven a buscar en disco
+        try:
+            with open(_ruta_info(clave), encoding='utf-8') as archivo:
+                info = json.load(archivo)
+        except (OSError, ValueError):
+            return None
+        info['clave'] = clave
+        _listas[clave] = info
+    return info
+
+def es_subida(url):
+    """Indica si la URL es de una imagen subida (y no externa o placeholder)"""
+    return bool(_RUTA_SUBIDA.match(url or ''))
+
+def variante_url(url, nombre='tarjeta', formato='jpg'):
+    """URL de una variante de la imagen, o la URL original si no tiene o aún no está lista"""
+    info = _info(url)
+    if info is None or nombre not in info['variantes']:
+        return url
+    return f"/static/images/variantes/{_nombre_variante(info['clave'], nombre, formato)}"
+
+def srcset(url, formato='webp'):
+    """Valor del atributo srcset con las variantes de la imagen ('' si no tiene)"""
+    info = _info(url)
+    if info is None:
+        return ''
+    anchos = {}
+    for nombre, ancho in info['variantes'].items():
+        # Variantes del mismo ancho (original chica): basta con una
+        anchos.setdefault(ancho, nombre)
+    return ', '.join(f"/static/images/variantes/{_nombre_variante(info['clave'], nombre, formato)} {ancho}w"
+                     for ancho, nombre in sorted(anchos.items()))
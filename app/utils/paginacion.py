@@ -0,0 +1,96 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+En lugar de OFFSET, que obliga a SQLite a recorrer todas las filas saltadas,
+cada página continúa desde la última fila de la anterior con una condición
+sobre las columnas del orden, por ejemplo (fecha_pedido, id) < (?, ?). Con un
+índice sobre esas columnas cualquier página cuesta lo mismo que la primera.
+
+El cursor que viaja en la URL es opaco: los valores de la última fila en JSON
+y base64. Las búsquedas ordenadas por relevancia usan Paginacion de
+app/utils/busqueda.py, porque el ranking no sirve de clave para un cursor.
+"""
+import base64
+import binascii
+import json
+import math
+
+from flask import current_app, request
+
+def codificar_cursor(valores):
+    """Cursor para la URL a partir de los valores de orden de la última fila"""
+    datos = json.dumps(list(valores), separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+# Rango de INTEGER en SQLite (64 bits con signo)
+_ENTERO_MIN = -2 ** 63
+_ENTERO_MAX = 2 ** 63 - 1
+
+def _valor_valido(valor):
+    """Indica si SQLite puede recibir el valor como parámetro (no listas, objetos ni números fuera de rango)"""
+    if valor is None or isinstance(valor, str):
+        return True
+    if isinstance(valor, int):
+        return _ENTERO_MIN <= valor <= _ENTERO_MAX
+    if isinstance(valor, float):
+        return math.isfinite(valor)
+    return False
+
+def decodificar_cursor(cursor, largo):
+    """
+    Valores de orden guardados en el cursor, o None para la primera página.
+    Lanza ValueError si el cursor no es válido.
+    """
+    if not cursor:
+        return None
+    try:
+        datos = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(datos)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Cursor de paginación inválido')
+    if not isinstance(valores, list) or len(valores) != largo:
+        raise ValueError('Cursor de paginación inválido')
+    if not all(_valor_valido(valor) for valor in valores):
+        raise ValueError('Cursor de paginación inválido')
+    return valores
+
+def condicion_cursor(columnas, descendente=True):
+    """Condición SQL que deja solo las filas posteriores al cursor"""
+    operador = '<' if descendente else '>'
+    return f"({', '.join(columnas)}) {operador} ({', '.join('?' * len(columnas))})"
+
+class Pagina:
+    """Una página de un listado y el cursor de la siguiente (None si es la última)"""
+
+    def __init__(self, items, siguiente=None):
+        self.items = items
+        self.siguiente = siguiente
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @classmethod
+    def desde_filas(cls, filas, limite, clave, construir):
+        """
+        Arma la página a partir de una consulta hecha con LIMIT limite + 1: la
+        fila de más solo indica que hay otra página. clave(fila) retorna los
+        valores de orden y construir(filas) la lista de objetos del listado
+        (por ejemplo Modelo.from_rows).
+        """
+        siguiente = None
+        if len(filas) > limite:
+            filas = filas[:limite]
+            siguiente = codificar_cursor(clave(filas[-1]))
+        return cls(construir(filas), siguiente)
+
+def parametros_pagina(por_defecto):
+    """
+    (limite, cursor) de la petición actual: ?limite= acotado a
+    LISTADOS_MAX_POR_PAGINA y ?cursor= tal como llegó.
+    """
+    limite = request.args.get('limite', por_defecto, type=int)
+    limite = min(max(1, limite), current_app.config['LISTADOS_MAX_POR_PAGINA'])
+    return limite, request.args.get('cursor') or None
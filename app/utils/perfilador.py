@@ -0,0 +1,218 @@
+"""
+Perfil de las consultas SQL de cada petición.
+
+RetryingCursor (app/models/__init__.py) avisa al perfilador de cada sentencia
+que ejecuta, con su tiempo de ejecución más el de leer sus filas. Durante una
+petición las sentencias se acumulan en g y al terminar:
+
+- la respuesta lleva X-DB-Queries, X-DB-Time-ms y Server-Timing (si
+  PERFIL_CONSULTAS_CABECERAS está activo),
+- las sentencias que superan PERFIL_CONSULTAS_LENTA_MS se registran en el log
+  'app.consultas' con los tipos de sus parámetros, nunca con los valores,
+- una misma sentencia repetida PERFIL_CONSULTAS_REPETICIONES_N1 veces o más con
+  parámetros distintos se registra como posible N+1 (una consulta por fila en
+  lugar de una sola para todas),
+- el resumen queda en un historial en memoria que muestra /debug/queries.
+
+Fuera de una petición (hilos de la cola de reportes, scripts) solo se
+registran las sentencias lentas.
+"""
+import logging
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, has_app_context, request
+
+logger = logging.getLogger('app.consultas')
+
+_config = {
+    'lenta_ms': 100.0,
+    'repeticiones_n1': 5,
+    'cabeceras': True
+}
+_historial = deque(maxlen=100)
+_lentas = deque(maxlen=50)
+
+# Peticiones que no se guardan en el historial
+_ENDPOINTS_EXCLUIDOS = {'static', 'debug.consultas', 'debug.limpiar_consultas'}
+
+def _normalizar(sql):
+    """La sentencia en una sola línea, para agrupar y mostrar"""
+    return ' '.join(sql.split())
+
+def _describir_parametros(parametros, largo=120):
+    """
+    Tipos de los parámetros sin sus valores: pueden traer hashes de
+    contraseñas, correos o direcciones, y terminan en el log y en /debug/queries
+    """
+    if isinstance(parametros, dict):
+        texto = ', '.join(f'{nombre}: {type(valor).__name__}' for nombre, valor in parametros.items())
+    elif isinstance(parametros, (list, tuple)):
+        texto = ', '.join(type(valor).__name__ for valor in parametros)
+    else:
+        texto = type(parametros).__name__
+    texto = f'({texto})'
+    return texto if len(texto) <= largo else texto[:largo] + '...'
+
+def _clave_parametros(parametros):
+    """Valor comparable de los parámetros, para contar combinaciones distintas"""
+    try:
+        clave = tuple(sorted(parametros.items())) if isinstance(parametros, dict) else tuple(parametros)
+        hash(clave)
+        return clave
+    except TypeError:
+        return repr(parametros)
+
+class PerfilPeticion:
+    """Sentencias ejecutadas durante una petición: [sql, parámetros, ms]"""
+
+    def __init__(self):
+        self.consultas = []
+        self.inicio = time.perf_counter()
+
+    @property
+    def tiempo_db_ms(self):
+        return sum(consulta[2] for consulta in self.consultas)
+
+    def agrupar(self):
+        """Sentencias distintas con sus repeticiones, de la más costosa a la menos"""
+        grupos = {}
+        for sql, parametros, ms in self.consultas:
+            grupo = grupos.get(sql)
+            if grupo is None:
+                grupo = grupos[sql] = {'sql': _normalizar(sql), 'veces': 0, 'total_ms': 0.0,
+                                       'max_ms': 0.0, 'parametros': set()}
+            grupo['veces'] += 1
+            grupo['total_ms'] += ms
+            grupo['max_ms'] = max(grupo['max_ms'], ms)
+            grupo['parametros'].add(_clave_parametros(parametros))
+
+        resultado = []
+        for grupo in grupos.values():
+            grupo['distintos'] = len(grupo.pop('parametros'))
+            resultado.append(grupo)
+        resultado.sort(key=lambda grupo: grupo['total_ms'], reverse=True)
+        return resultado
+
+class Perfilador:
+    """Recibe las sentencias del cursor (ver registrar_perfilador)"""
+
+    def registrar(self, sql, parametros, segundos):
+        """
+        Anota una sentencia recién ejecutada. Retorna la entrada a la que se
+        suma el tiempo de leer las filas, o None si no hay petición en curso.
+        """
+        ms = segundos * 1000
+        perfil = g.get('perfil_consultas') if has_app_context() else None
+        if perfil is None:
+            if ms >= _config['lenta_ms']:
+                _registrar_lenta(sql, parametros, ms, None)
+            return None
+
+        consulta = [sql, parametros, ms]
+        perfil.consultas.append(consulta)
+        return consulta
+
+    def sumar(self, consulta, segundos):
+        """Suma a la sentencia el tiempo de leer sus filas"""
+        consulta[2] += segundos * 1000
+
+def _registrar_lenta(sql, parametros, ms, ruta):
+    entrada = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'ruta': ruta,
+        'sql': _normalizar(sql),
+        'parametros': _describir_parametros(parametros),
+        'ms': round(ms, 2)
+    }
+    _lentas.append(entrada)
+    logger.warning('Consulta lenta (%.1f ms) en %s: %s %s',
+                   ms, ruta or 'segundo plano', entrada['sql'], entrada['parametros'])
+
+def _iniciar_perfil():
+    g.perfil_consultas = PerfilPeticion()
+
+def _cerrar_perfil(response):
+    perfil = g.pop('perfil_consultas', None)
+    if perfil is None:
+        return response
+
+    tiempo_db_ms = perfil.tiempo_db_ms
+    g.resumen_db = {'consultas': len(perfil.consultas), 'tiempo_db_ms': round(tiempo_db_ms, 2)}
+    if _config['cabeceras']:
+        response.headers['X-DB-Queries'] = str(len(perfil.consultas))
+        response.headers['X-DB-Time-ms'] = f'{tiempo_db_ms:.2f}'
+        response.headers.add('Server-Timing', f'db;dur={tiempo_db_ms:.2f};desc="{len(perfil.consultas)} consultas"')
+
+    if request.endpoint in _ENDPOINTS_EXCLUIDOS:
+        return response
+
+    ruta = f'{request.method} {request.path}'
+    for sql, parametros, ms in perfil.consultas:
+        if ms >= _config['lenta_ms']:
+            _registrar_lenta(sql, parametros, ms, ruta)
+
+    sentencias = perfil.agrupar()
+    repetidas = [sentencia for sentencia in sentencias
+                 if sentencia['veces'] >= _config['repeticiones_n1'] and sentencia['distintos'] > 1]
+    for sentencia in repetidas:
+        logger.warning('Posible N+1 en %s: sentencia ejecutada %d veces con %d parámetros distintos (%.1f ms): %s',
+                       ruta, sentencia['veces'], sentencia['distintos'], sentencia['total_ms'], sentencia['sql'])
+
+    _historial.append({
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'ruta': ruta,
+        'endpoint': request.endpoint,
+        'estado': response.status_code,
+        'consultas': len(perfil.consultas),
+        'tiempo_db_ms': round(tiempo_db_ms, 2),
+        'tiempo_total_ms': round((time.perf_counter() - perfil.inicio) * 1000, 2),
+        'sentencias': sentencias[:10],
+        'repetidas': repetidas
+    })
+    return response
+
+def resumen():
+    """Historial de peticiones, consultas lentas y sentencias más costosas para /debug/queries"""
+    peticiones = list(_historial)
+    sentencias = {}
+    for peticion in peticiones:
+        for sentencia in peticion['sentencias']:
+            total = sentencias.setdefault(sentencia['sql'], {'sql': sentencia['sql'], 'veces': 0,
+                                                              'total_ms': 0.0, 'max_ms': 0.0})
+            total['veces'] += sentencia['veces']
+            total['total_ms'] += sentencia['total_ms']
+            total['max_ms'] = max(total['max_ms'], sentencia['max_ms'])
+
+    return {
+        'configuracion': dict(_config),
+        'peticiones': list(reversed(peticiones)),
+        'lentas': list(reversed(_lentas)),
+        'repetidas': [dict(sentencia, ruta=peticion['ruta'])
+                      for peticion in reversed(peticiones) for sentencia in peticion['repetidas']],
+        'sentencias': sorted(sentencias.values(), key=lambda total: total['total_ms'], reverse=True)[:20]
+    }
+
+def limpiar():
+    """Vacía el historial y las consultas lentas"""
+    _historial.clear()
+    _lentas.clear()
+
+def init_perfilador(app):
+    """Instala el perfilador en el cursor y lo liga a cada petición"""
+    from app.models import registrar_perfilador
+
+    if not app.config['PERFIL_CONSULTAS']:
+        registrar_perfilador(None)
+        return
+
+    global _historial
+    _config['lenta_ms'] = app.config['PERFIL_CONSULTAS_LENTA_MS']
+    _config['repeticiones_n1'] = app.config['PERFIL_CONSULTAS_REPETICIONES_N1']
+    _config['cabeceras'] = app.config['PERFIL_CONSULTAS_CABECERAS']
+    _historial = deque(_historial, maxlen=app.config['PERFIL_CONSULTAS_HISTORIAL'])
+
+    registrar_perfilador(Perfilador())
+    app.before_request(_iniciar_perfil)
+    app.after_request(_cerrar_perfil)
@@ -0,0 +1,133 @@
+"""
+Imágenes placeholder en SVG para productos, recetas e historia sin imagen.
+
+El SVG depende solo del tamaño y del texto pedidos, así que cada combinación
+se renderiza una vez y queda en una caché LRU acotada (cache_placeholders);
+el contenido se sirve con un ETag fuerte (su hash) y Cache-Control de larga
+duración, así el navegador lo pide una sola vez.
+
+- Ancho y alto se limitan a PLACEHOLDER_LADO_MIN..PLACEHOLDER_LADO_MAX y el
+  texto a PLACEHOLDER_TEXTO_MAX caracteres (escapado), para que un parámetro
+  arbitrario no genere imágenes enormes ni llene la caché con textos largos.
+- Al iniciar se renderizan los tamaños de PLACEHOLDER_TAMANOS y se escriben
+  como archivos estáticos en PLACEHOLDER_DIR; placeholder_url() (disponible
+  en las plantillas) apunta a esos archivos cuando existen.
+"""
+import hashlib
+import os
+from xml.sax.saxutils import escape
+
+from flask import url_for
+
+from app.utils.cache import cache_placeholders
+
+_config = {
+    'lado_min': 10,
+    'lado_max': 2000,
+    'texto_max': 60,
+    'max_age': 30 * 24 * 3600
+}
+_ANCHO_DEFECTO = 300
+_ALTO_DEFECTO = 200
+
+# Tamaños (ancho, alto) con archivo estático generado al iniciar
+_pregenerados = set()
+
+def _lado(valor, defecto):
+    try:
+        lado = int(float(valor))
+    except (TypeError, ValueError, OverflowError):
+        # No numérico, nan o infinito
+        lado = defecto
+    return max(_config['lado_min'], min(_config['lado_max'], lado))
+
+def normalizar(ancho, alto, texto=None):
+    """Ancho, alto y texto ya validados y acotados, tal como se usan de clave"""
+    texto = ' '.join((texto or '').split())[:_config['texto_max']]
+    return _lado(ancho, _ANCHO_DEFECTO), _lado(alto, _ALTO_DEFECTO), texto
+
+def _renderizar(ancho, alto, texto):
+    if texto:
+        tamano_letra = max(8, min(16, alto // 12, ancho * 2 // max(len(texto), 1)))
+        pie = (f'<text x="50%" y="84%" font-family="Arial, sans-serif" font-size="{tamano_letra}" '
+               f'text-anchor="middle" dominant-baseline="middle" fill="#9ca3af">{escape(texto)}</text>')
+    else:
+        pie = ('<rect x="25%" y="75%" width="50%" height="4" fill="#d1d5db" rx="2"/>'
+               '<rect x="30%" y="85%" width="40%" height="3" fill="#e5e7eb" rx="1.5"/>')
+
+    return (
+        f'<svg width="{ancho}" height="{alto}" viewBox="0 0 {ancho} {alto}" xmlns="http://www.w3.org/2000/svg">'
+        '<defs><linearGradient id="bg" x1="0%" y1="0%" x2="100%" y2="100%">'
+        '<stop offset="0%" style="stop-color:#f9fafb;stop-opacity:1"/>'
+        '<stop offset="100%" style="stop-color:#f3f4f6;stop-opacity:1"/>'
+        '</linearGradient></defs>'
+        '<rect width="100%" height="100%" fill="url(#bg)" stroke="#e5e7eb" stroke-width="1"/>'
+        f'<circle cx="50%" cy="35%" r="{min(25, ancho // 4, alto // 4)}" fill="#d1d5db"/>'
+        f'<path d="M{ancho * 0.4:g} {alto * 0.5:g} Q{ancho * 0.5:g} {alto * 0.45:g} {ancho * 0.6:g} {alto * 0.5:g} '
+        f'L{ancho * 0.65:g} {alto * 0.7:g} L{ancho * 0.35:g} {alto * 0.7:g} Z" fill="#d1d5db"/>'
+        f'{pie}</svg>'
+    ).encode('utf-8')
+
+def _generar(ancho, alto, texto):
+    contenido = _renderizar(ancho, alto, texto)
+    return contenido, hashlib.sha1(contenido).hexdigest()
+
+def obtener_placeholder(ancho, alto, texto=''):
+    """
+    SVG (bytes) y ETag del placeholder; recibe valores ya normalizados.
+    Se renderiza solo la primera vez, después sale de la caché LRU.
+    """
+    return cache_placeholders.obtener((ancho, alto, texto), lambda: _generar(ancho, alto, texto))
+
+def max_age():
+    """Segundos que el navegador puede guardar un placeholder"""
+    return _config['max_age']
+
+def _nombre_archivo(ancho, alto):
+    return f'{ancho}x{alto}.svg'
+
+def pregenerar(tamanos, directorio):
+    """
+    Renderiza los tamaños indicados (quedan en la caché) y los escribe en el
+    directorio; un archivo solo se reescribe si su contenido cambió.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    for ancho, alto in tamanos:
+        ancho, alto, _ = normalizar(ancho, alto)
+        contenido, _ = obtener_placeholder(ancho, alto)
+        ruta = os.path.join(directorio, _nombre_archivo(ancho, alto))
+        try:
+            with open(ruta, 'rb') as archivo:
+                igual = archivo.read() == contenido
+        except OSError:
+            igual = False
+        if not igual:
+            temporal = f'{ruta}.{os.getpid()}.tmp'
+            with open(temporal, 'wb') as archivo:
+                archivo.write(contenido)
+            os.replace(temporal, ruta)
+        _pregenerados.add((ancho, alto))
+
+def placeholder_url(ancho, alto, texto=None):
+    """URL del placeholder: el archivo estático si se pregeneró, si no /placeholder.svg"""
+    ancho, alto, texto = normalizar(ancho, alto, texto)
+    if not texto and (ancho, alto) in _pregenerados:
+        return url_for('static', filename=f'placeholders/{_nombre_archivo(ancho, alto)}')
+    parametros = {'width': ancho, 'height': alto}
+    if texto:
+        parametros['query'] = texto
+    return url_for('main.placeholder_svg', **parametros)
+
+def init_placeholders(app):
+    """Configura los placeholders, pregenera los tamaños comunes y expone placeholder_url"""
+    _config['lado_min'] = app.config['PLACEHOLDER_LADO_MIN']
+    _config['lado_max'] = app.config['PLACEHOLDER_LADO_MAX']
+    _config['texto_max'] = app.config['PLACEHOLDER_TEXTO_MAX']
+    _config['max_age'] = app.config['PLACEHOLDER_MAX_AGE']
+    cache_placeholders.configurar(max_entradas=app.config['PLACEHOLDER_CACHE_MAX_ENTRADAS'])
+
+    _pregenerados.clear()
+    if app.config['PLACEHOLDER_TAMANOS']:
+        pregenerar(app.config['PLACEHOLDER_TAMANOS'], app.config['PLACEHOLDER_DIR'])
+
+    app.add_template_global(placeholder_url)
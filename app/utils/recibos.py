@@ -0,0 +1,276 @@
+"""
+Recibos PDF de pedidos: renderizado en un pool de hilos y caché en disco.
+
+El recibo depende solo de los datos del pedido (estado, productos, precios,
+cliente...). Esos datos se resumen en un hash que sirve a la vez de nombre de
+archivo y de ETag: mientras el pedido no cambie, el PDF se genera una sola vez
+y las descargas siguientes se sirven desde disco (o con 304 Not Modified).
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from reportlab.lib.colors import HexColor
+
+_config = {
+    'directorio': os.path.join('instance', 'recibos'),
+    'workers': 2,
+    'timeout': 30
+}
+_app = None
+_executor = None
+_en_proceso = {}
+_lock = threading.Lock()
+
+def init_recibos(app):
+    """Configura la caché de recibos con los valores de la aplicación"""
+    global _app
+    _app = app
+    _config['directorio'] = app.config['RECIBOS_DIR']
+    _config['workers'] = app.config['RECIBOS_WORKERS']
+    _config['timeout'] = app.config['RECIBOS_RENDER_TIMEOUT']
+    os.makedirs(_config['directorio'], exist_ok=True)
+
+def reiniciar_tras_fork():
+    """
+    Olvida el pool de hilos y los recibos en curso heredados del proceso
+    padre: en un proceso hijo (worker de gunicorn) esos hilos no existen.
+    """
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+    _en_proceso.clear()
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_config['workers'],
+                                           thread_name_prefix='recibos')
+        return _executor
+
+def datos_recibo(venta, cliente_nombre):
+    """Reúne todo lo que se imprime en el recibo en un diccionario simple"""
+    from app.models.detalle_venta import DetalleVenta
+    from app.models.producto import Producto
+
+    detalles = DetalleVenta.get_by_pedido(venta.id)
+    productos = Producto.find_many(detalle.producto_id for detalle in detalles)
+
+    items = []
+    for detalle in detalles:
+        producto = productos.get(detalle.producto_id)
+        if producto:
+            items.append([producto.nombre, detalle.cantidad, detalle.precio_unitario])
+
+    return {
+        'pedido_id': venta.id,
+        'fecha': venta.fecha_pedido.strftime('%d/%m/%Y %H:%M') if venta.fecha_pedido else 'N/A',
+        'estado': venta.estado,
+        'cliente': cliente_nombre or 'N/A',
+        'telefono': venta.telefono_contacto,
+        'direccion': venta.direccion_entrega,
+        'items': items,
+        'total': venta.total,
+        'metodo_pago': venta.metodo_pago,
+        'notas': venta.notas
+    }
+
+def clave_recibo(datos):
+    """Hash del contenido del recibo; cambia si cambia cualquier dato impreso"""
+    contenido = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:32]
+
+def ruta_recibo(datos, clave=None):
+    clave = clave or clave_recibo(datos)
+    return os.path.join(_config['directorio'], f"recibo-{datos['pedido_id']}-{clave}.pdf")
+
+def renderizar_recibo(datos):
+    """Dibuja el recibo con ReportLab y retorna los bytes del PDF"""
+    buffer = BytesIO()
+    # invariant: sin fecha de creación ni ID aleatorio, mismo contenido -> mismos bytes
+    p = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+    width, height = letter
+
+    # Colores
+    gold_color = HexColor('#d4af37')
+    dark_color = HexColor('#1a1a1a')
+
+    # Header con logo igual al de la página principal
+    p.setFillColor(gold_color)
+    p.setFont("Helvetica-Bold", 28)
+    p.drawCentredString(width/2, height-40, "🍞 Migas de oro Dorè")
+
+    p.setFillColor(dark_color)
+    p.setFont("Helvetica-Oblique", 14)
+    p.drawCentredString(width/2, height-65, "Panadería Artesanal")
+    p.setFont("Helvetica", 10)
+    p.drawCentredString(width/2, height-80, "NIT: 123.456.789-0 | Reg. Sanitario: RS-2024-001")
+
+    # Línea separadora
+    p.setStrokeColor(gold_color)
+    p.setLineWidth(2)
+    p.line(50, height-95, width-50, height-95)
+
+    # Información del pedido
+    y_pos = height - 125
+    p.setFillColor(dark_color)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(50, y_pos, f"RECIBO - Pedido #{datos['pedido_id']}")
+
+    y_pos -= 30
+    p.setFont("Helvetica", 11)
+    p.drawString(50, y_pos, f"Fecha: {datos['fecha']}")
+    p.drawString(300, y_pos, f"Estado: {datos['estado'].upper()}")
+
+    y_pos -= 20
+    p.drawString(50, y_pos, f"Cliente: {datos['cliente']}")
+    p.drawString(300, y_pos, f"Teléfono: {datos['telefono'] or 'N/A'}")
+
+    y_pos -= 20
+    p.drawString(50, y_pos, f"Dirección: {datos['direccion'] or 'N/A'}")
+
+    # Línea separadora
+    y_pos -= 30
+    p.setStrokeColor(gold_color)
+    p.line(50, y_pos, width-50, y_pos)
+
+    # Detalles de productos
+    y_pos -= 30
+    p.setFillColor(gold_color)
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(50, y_pos, "DETALLE DE PRODUCTOS")
+
+    y_pos -= 25
+    p.setFillColor(dark_color)
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(50, y_pos, "Producto")
+    p.drawString(250, y_pos, "Cantidad")
+    p.drawString(320, y_pos, "Precio Unit.")
+    p.drawString(420, y_pos, "Subtotal")
+
+    y_pos -= 5
+    p.setStrokeColor(dark_color)
+    p.line(50, y_pos, width-50, y_pos)
+
+    def format_cop(amount):
+        """Formatear cantidad en pesos colombianos"""
+        return f"${amount:,.0f}".replace(",", ".")
+
+    # Productos
+    y_pos -= 20
+    p.setFont("Helvetica", 10)
+
+    for nombre, cantidad, precio_unitario in datos['items']:
+        if y_pos < 100:  # Nueva página si es necesario
+            p.showPage()
+            y_pos = height - 50
+
+        subtotal = cantidad * precio_unitario
+
+        p.drawString(50, y_pos, nombre[:30])
+        p.drawString(250, y_pos, str(cantidad))
+        p.drawString(320, y_pos, format_cop(precio_unitario))
+        p.drawString(420, y_pos, format_cop(subtotal))
+        y_pos -= 15
+
+    # Total
+    y_pos -= 20
+    p.setStrokeColor(gold_color)
+    p.setLineWidth(2)
+    p.line(300, y_pos, width-50, y_pos)
+
+    y_pos -= 25
+    p.setFillColor(gold_color)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(320, y_pos, f"TOTAL: {format_cop(datos['total'])}")
+
+    # Método de pago
+    y_pos -= 30
+    p.setFillColor(dark_color)
+    p.setFont("Helvetica", 11)
+    metodo_pago = datos['metodo_pago']
+    metodo_pago_display = "Nequi" if metodo_pago == "nequi" else "Efectivo" if metodo_pago == "efectivo" else metodo_pago.title()
+    p.drawString(50, y_pos, f"Método de pago: {metodo_pago_display}")
+
+    if datos['notas']:
+        y_pos -= 20
+        p.drawString(50, y_pos, f"Notas: {datos['notas']}")
+
+    # Footer
+    y_pos = 80
+    p.setFillColor(gold_color)
+    p.setFont("Helvetica-Bold", 12)
+    p.drawCentredString(width/2, y_pos, "¡Gracias por tu pedido!")
+
+    y_pos -= 20
+    p.setFillColor(dark_color)
+    p.setFont("Helvetica", 9)
+    p.drawCentredString(width/2, y_pos, "Contacto: +57 300 123 4567 | info@migasdeorodoré.com")
+
+    # Finalizar PDF
+    p.save()
+    return buffer.getvalue()
+
+def _renderizar_y_guardar(datos, clave):
+    """Tarea del pool: genera el PDF y lo deja en disco de forma atómica"""
+    ruta = ruta_recibo(datos, clave)
+    try:
+        with _app.app_context():
+            _guardar_recibo(datos, ruta)
+        return ruta
+    finally:
+        with _lock:
+            _en_proceso.pop(clave, None)
+
+def _guardar_recibo(datos, ruta):
+    if os.path.exists(ruta):
+        return
+    contenido = renderizar_recibo(datos)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.{threading.get_ident()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+    # Las versiones anteriores del mismo pedido (otro estado) ya no sirven
+    patron = os.path.join(os.path.dirname(ruta), f"recibo-{datos['pedido_id']}-*.pdf")
+    for anterior in glob.glob(patron):
+        if anterior != ruta:
+            try:
+                os.remove(anterior)
+            except OSError:
+                pass
+
+def encolar_recibo(datos):
+    """
+    Programa el renderizado del recibo si no está en disco ni en proceso.
+    Retorna (clave, future); future es None si el archivo ya existe.
+    """
+    clave = clave_recibo(datos)
+    if os.path.exists(ruta_recibo(datos, clave)):
+        return clave, None
+
+    executor = _get_executor()
+    with _lock:
+        future = _en_proceso.get(clave)
+        if future is None:
+            future = executor.submit(_renderizar_y_guardar, datos, clave)
+            _en_proceso[clave] = future
+    return clave, future
+
+def obtener_recibo(datos):
+    """
+    Retorna (ruta, clave) del recibo en disco, esperando al pool si todavía
+    hay que generarlo.
+    """
+    clave, future = encolar_recibo(datos)
+    if future is None:
+        return ruta_recibo(datos, clave), clave
+    return future.result(timeout=_config['timeout']), clave
@@ -0,0 +1,182 @@
+"""
+Registro (logging) de la aplicación en JSON, escrito por un hilo aparte.
+
+Los módulos usan logging.getLogger(__name__) como siempre. El root logger
+tiene un solo handler, ColaHandler, que arma el mensaje y agrega los datos de
+la petición en curso (id de petición, ruta, endpoint, rol y usuario) y deja el
+registro en una cola; un QueueListener lo formatea como una línea JSON y lo
+escribe en stdout. Así las peticiones nunca esperan por la escritura del log.
+Si la cola se llena (el destino no da abasto) los registros se descartan y se
+cuentan en lugar de bloquear.
+
+- Cada petición recibe un id (o usa el de la cabecera X-Request-ID) que se
+  devuelve en la respuesta y aparece en todos sus registros.
+- Al terminar cada petición se registra una línea en 'app.peticiones' con el
+  estado, la duración y las consultas a la base de datos.
+- Los registros DEBUG se muestrean por petición: con LOG_MUESTREO_DEBUG = 0.1
+  solo una de cada diez peticiones registra sus DEBUG (todos o ninguno).
+- LOG_NIVEL es el nivel general y LOG_NIVELES ajusta el de cada módulo.
+
+Los campos que se pasan con extra={...} se incluyen en el JSON.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request, session
+
+logger_peticiones = logging.getLogger('app.peticiones')
+
+_listener = None
+_descartados = 0
+_config = {'muestreo_debug': 1.0}
+
+# Atributos propios de LogRecord; el resto vino en extra={...}
+_ATRIBUTOS_ESTANDAR = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+_CAMPOS_PETICION = ('request_id', 'metodo', 'ruta', 'endpoint', 'rol', 'usuario_id')
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage()
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_ESTANDAR and valor is not None:
+                datos[clave] = valor
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+class FormatoTexto(logging.Formatter):
+    """Formato legible para desarrollo, con el id de petición si lo hay"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        texto = super().format(record)
+        if getattr(record, 'request_id', None):
+            texto += f" [{record.request_id} {record.metodo} {record.ruta}]"
+        return texto
+
+class ColaHandler(QueueHandler):
+    """
+    Deja los registros en la cola sin bloquear. Antes de encolar les agrega el
+    contexto de la petición (que el hilo escritor ya no tiene) y convierte el
+    mensaje y la excepción a texto.
+    """
+
+    def emit(self, record):
+        if has_request_context():
+            for campo, valor in zip(_CAMPOS_PETICION, _contexto_peticion()):
+                if not hasattr(record, campo):
+                    setattr(record, campo, valor)
+        try:
+            # Como texto: el hilo escritor no debe evaluar argumentos ni tracebacks
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.message = record.getMessage()
+            record.msg, record.args, record.exc_info = record.message, None, None
+            self.queue.put_nowait(record)
+        except queue.Full:
+            global _descartados
+            _descartados += 1
+        except Exception:
+            self.handleError(record)
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar los DEBUG solo de las peticiones muestreadas"""
+
+    def __init__(self, proporcion):
+        super().__init__()
+        self.proporcion = proporcion
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.proporcion >= 1:
+            return True
+        if has_request_context():
+            return g.get('log_muestreado', False)
+        return random.random() < self.proporcion
+
+def _contexto_peticion():
+    return (g.get('request_id'), request.method, request.path, request.endpoint,
+            session.get('user_role'), session.get('user_id'))
+
+def _iniciar_peticion():
+    g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex[:16]
+    g.inicio_peticion = time.perf_counter()
+    g.log_muestreado = random.random() < _config['muestreo_debug']
+
+def _cerrar_peticion(response):
+    request_id = g.get('request_id')
+    if request_id is None:
+        return response
+    response.headers['X-Request-ID'] = request_id
+
+    if request.endpoint != 'static':
+        resumen_db = g.get('resumen_db') or {}
+        logger_peticiones.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'estado': response.status_code,
+            'duracion_ms': round((time.perf_counter() - g.inicio_peticion) * 1000, 2),
+            'consultas_db': resumen_db.get('consultas'),
+            'tiempo_db_ms': resumen_db.get('tiempo_db_ms')
+        })
+    return response
+
+def registros_descartados():
+    """Registros perdidos porque la cola estaba llena"""
+    return _descartados
+
+def detener_registro():
+    """Escribe lo que quede en la cola y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def iniciar_registro(config):
+    """
+    Configura el root logger con la cola y arranca el hilo escritor. Se puede
+    volver a llamar (por ejemplo en cada worker después de un fork).
+    """
+    global _listener
+    detener_registro()
+
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(FormatoJSON() if config['LOG_FORMATO'] == 'json' else FormatoTexto())
+
+    cola = queue.Queue(maxsize=config['LOG_COLA_MAX'])
+    handler = ColaHandler(cola)
+    handler.addFilter(FiltroMuestreo(config['LOG_MUESTREO_DEBUG']))
+    _config['muestreo_debug'] = config['LOG_MUESTREO_DEBUG']
+
+    raiz = logging.getLogger()
+    for anterior in list(raiz.handlers):
+        raiz.removeHandler(anterior)
+    raiz.addHandler(handler)
+    raiz.setLevel(config['LOG_NIVEL'])
+    for nombre, nivel in config['LOG_NIVELES'].items():
+        logging.getLogger(nombre).setLevel(nivel)
+
+    _listener = QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+
+def init_registro(app):
+    """Configura el registro con los valores de la aplicación y lo liga a cada petición"""
+    iniciar_registro(app.config)
+    app.before_request(_iniciar_peticion)
+    app.after_request(_cerrar_peticion)
+
+atexit.register(detener_registro)
@@ -8,7 +8,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 import os
-import random
+from app.utils.analitica import periodo_dias, obtener_analitica, calcular_metricas
 
 class GeneradorReportes:
     def __init__(self):
@@ -22,51 +22,20 @@ class GeneradorReportes:
             'morado': '#9C27B0'
         }
         
-    def generar_datos_ejemplo(self):
-        """Genera datos de ejemplo para los reportes"""
-        # Datos de ventas por día (último mes)
-        fechas = []
-        fecha_inicio = datetime(2024, 11, 17)
-        for i in range(30):
-            fechas.append(fecha_inicio + timedelta(days=i))
-        
-        # Generar ventas diarias con random
-        ventas_diarias = []
-        for _ in range(len(fechas)):
-            venta = random.normalvariate(20000, 5000)
-            ventas_diarias.append(max(venta, 5000))  # Mínimo 5000
-        
-        # Datos de productos más vendidos
-        productos = ['Pan Francés', 'Croissant', 'Torta de Chocolate', 'Pan Integral', 'Empanadas', 'Galletas']
-        ventas_productos = [850, 720, 450, 380, 320, 280]
-        
-        # Datos de ventas por vendedor
-        vendedores = ['María González', 'Carlos Ruiz', 'Ana Martínez', 'Luis Herrera']
-        ventas_vendedores = [85000, 72000, 68000, 55000]
-        
-        # Datos de clientes por mes
-        meses = ['Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-        nuevos_clientes = [15, 22, 18, 25, 31]
-        
-        return {
-            'fechas': fechas,
-            'ventas_diarias': ventas_diarias,
-            'productos': productos,
-            'ventas_productos': ventas_productos,
-            'vendedores': vendedores,
-            'ventas_vendedores': ventas_vendedores,
-            'meses': meses,
-            'nuevos_clientes': nuevos_clientes
-        }
+    def generar_datos(self, dias=30, granularidad='dia'):
+        """Datos reales de ventas de los últimos 'dias' días (ver app/utils/analitica.py)"""
+        desde, hasta = periodo_dias(dias)
+        return obtener_analitica(desde, hasta, granularidad)
     
-    def generar_datos_graficos(self):
+    def generar_datos_graficos(self, dias=30, granularidad='dia'):
         """Genera datos para gráficos sin matplotlib"""
-        datos = self.generar_datos_ejemplo()
+        datos = self.generar_datos(dias, granularidad)
+        formato_fecha = '%d/%m' if granularidad == 'dia' else '%m/%Y'
         
         # Convertir datos para uso en templates HTML
         graficos_data = {
             'ventas_diarias': {
-                'labels': [fecha.strftime('%d/%m') for fecha in datos['fechas']],
+                'labels': [fecha.strftime(formato_fecha) for fecha in datos['fechas']],
                 'data': [float(venta) for venta in datos['ventas_diarias']]
             },
             'productos_vendidos': {
@@ -113,14 +82,14 @@ class GeneradorReportes:
         story.append(Spacer(1, 20))
         
         # Resumen ejecutivo
-        promedio_ventas = sum(datos['ventas_diarias']) / len(datos['ventas_diarias'])
+        metricas = calcular_metricas(datos)
         resumen_data = [
             ['Métrica', 'Valor'],
-            ['Ventas Totales del Mes', f"${sum(datos['ventas_diarias']):,.0f}"],
-            ['Promedio Diario', f"${promedio_ventas:,.0f}"],
-            ['Producto Más Vendido', datos['productos'][0]],
-            ['Mejor Vendedor', datos['vendedores'][0]],
-            ['Nuevos Clientes', f"{sum(datos['nuevos_clientes'])} clientes"]
+            ['Ventas Totales del Período', f"${metricas['total_ventas_mes']:,.0f}"],
+            ['Promedio Diario', f"${metricas['promedio_diario']:,.0f}"],
+            ['Producto Más Vendido', metricas['producto_estrella']],
+            ['Mejor Vendedor', metricas['vendedor_mes']],
+            ['Nuevos Clientes', f"{datos['clientes_periodo']} clientes"]
         ]
         
         resumen_table = Table(resumen_data, colWidths=[3*inch, 2*inch])
@@ -144,7 +113,7 @@ class GeneradorReportes:
         total_productos = sum(datos['ventas_productos'])
         
         for producto, ventas in zip(datos['productos'], datos['ventas_productos']):
-            porcentaje = (ventas / total_productos) * 100
+            porcentaje = (ventas / total_productos) * 100 if total_productos else 0
             productos_data.append([producto, f"{ventas}", f"{porcentaje:.1f}%"])
         
         productos_table = Table(productos_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
@@ -168,8 +137,8 @@ class GeneradorReportes:
         total_ventas_vendedores = sum(datos['ventas_vendedores'])
         
         for vendedor, ventas in zip(datos['vendedores'], datos['ventas_vendedores']):
-            porcentaje = (ventas / total_ventas_vendedores) * 100
-            vendedores_data.append([vendedor, f"${ventas:,}", f"{porcentaje:.1f}%"])
+            porcentaje = (ventas / total_ventas_vendedores) * 100 if total_ventas_vendedores else 0
+            vendedores_data.append([vendedor, f"${ventas:,.0f}", f"{porcentaje:.1f}%"])
         
         vendedores_table = Table(vendedores_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
         vendedores_table.setStyle(TableStyle([
@@ -190,9 +159,9 @@ class GeneradorReportes:
         doc.build(story)
         return nombre_archivo
     
-    def generar_todos_los_graficos(self):
+    def generar_todos_los_graficos(self, dias=30, granularidad='dia'):
         """Genera todos los datos para gráficos sin matplotlib"""
-        return self.generar_datos_graficos()
+        return self.generar_datos_graficos(dias, granularidad)
 
 # Instancia global del generador
 generador_reportes = GeneradorReportes()
@@ -0,0 +1,251 @@
+"""
+Reportes PDF del personal (por vendedor y general).
+Los genera la cola de reportes (app/utils/cola_reportes.py) fuera de la petición.
+"""
+from datetime import datetime
+import calendar
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.units import inch
+from app.models.usuario import Usuario
+from app.models.venta import Venta
+
+def generar_reporte_vendedor(ruta, vendedor_id, año, mes):
+    """Genera en ruta el reporte PDF de ventas de un vendedor en el mes indicado"""
+    vendedor = Usuario.find_by_id(vendedor_id)
+    if not vendedor or vendedor.rol != 'vendedor':
+        raise ValueError('Vendedor no encontrado')
+    
+    fecha_actual = datetime.now()
+    
+    # Ventas del vendedor en el mes con el nombre del cliente ya resuelto (una sola consulta)
+    ventas_mes = Venta.get_reporte_ventas_mes(vendedor_id, año, mes)
+    
+    # Crear PDF
+    doc = SimpleDocTemplate(ruta, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Título del reporte
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        textColor=colors.darkblue,
+        alignment=1  # Center alignment
+    )
+    
+    story.append(Paragraph(f"Reporte de Ventas - {vendedor.nombre}", title_style))
+    story.append(Paragraph(f"Período: {calendar.month_name[mes]} {año}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Resumen estadístico
+    total_ventas = sum(venta.total for venta in ventas_mes)
+    total_pedidos = len(ventas_mes)
+    promedio_venta = total_ventas / total_pedidos if total_pedidos > 0 else 0
+    
+    resumen_data = [
+        ['Métrica', 'Valor'],
+        ['Total de Pedidos', str(total_pedidos)],
+        ['Total Vendido', f'${total_ventas:.2f} COP'],
+        ['Promedio por Pedido', f'${promedio_venta:.2f} COP'],
+        ['Período', f"{calendar.month_name[mes]} {año}"]
+    ]
+    
+    resumen_table = Table(resumen_data, colWidths=[2*inch, 2*inch])
+    resumen_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(resumen_table)
+    story.append(Spacer(1, 30))
+    
+    # Detalle de ventas
+    story.append(Paragraph("Detalle de Ventas", styles['Heading2']))
+    story.append(Spacer(1, 10))
+    
+    if ventas_mes:
+        ventas_data = [['Fecha', 'Pedido #', 'Cliente', 'Total', 'Estado']]
+        
+        for venta in ventas_mes:
+            ventas_data.append([
+                venta.fecha_pedido.strftime('%d/%m/%Y'),
+                str(venta.id),
+                venta.cliente_nombre,
+                f'${venta.total:.2f}',
+                venta.estado.title()
+            ])
+        
+        ventas_table = Table(ventas_data, colWidths=[1.2*inch, 0.8*inch, 2*inch, 1*inch, 1*inch])
+        ventas_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ]))
+        
+        story.append(ventas_table)
+    else:
+        story.append(Paragraph("No hay ventas registradas en este período.", styles['Normal']))
+    
+    # Pie de página
+    story.append(Spacer(1, 50))
+    story.append(Paragraph(f"Reporte generado el {fecha_actual.strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    story.append(Paragraph("Migas de oro Dorè - Sistema de Gestión", styles['Normal']))
+    
+    # Construir PDF
+    doc.build(story)
+
+def generar_reporte_personal(ruta, año, mes):
+    """Genera en ruta el reporte PDF general del personal para el mes indicado"""
+    fecha_actual = datetime.now()
+    
+    # Obtener personal activo
+    vendedores = Usuario.get_by_role('vendedor')
+    chefs = Usuario.get_by_role('chef')
+    
+    # Calcular estadísticas (una consulta agregada para todos los vendedores)
+    resumen = Venta.get_resumen_vendedores_mes(año, mes)
+    for vendedor in vendedores:
+        datos = resumen.get(vendedor.id, {'pedidos': 0, 'total': 0})
+        vendedor.ventas_mes = datos['total']
+        vendedor.pedidos_mes = datos['pedidos']
+    
+    # Crear PDF
+    doc = SimpleDocTemplate(ruta, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Título
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        textColor=colors.darkblue,
+        alignment=1
+    )
+    
+    story.append(Paragraph("Reporte General de Personal", title_style))
+    story.append(Paragraph(f"Período: {calendar.month_name[mes]} {año}", styles['Normal']))
+    story.append(Spacer(1, 30))
+    
+    # Resumen vendedores
+    story.append(Paragraph("Rendimiento de Vendedores", styles['Heading2']))
+    story.append(Spacer(1, 10))
+    
+    vendedores_data = [['Vendedor', 'Email', 'Pedidos', 'Total Vendido', 'Estado']]
+    
+    for vendedor in vendedores:
+        vendedores_data.append([
+            vendedor.nombre,
+            vendedor.email,
+            str(vendedor.pedidos_mes),
+            f'${vendedor.ventas_mes:.2f}',
+            'Activo' if vendedor.activo else 'Inactivo'
+        ])
+    
+    vendedores_table = Table(vendedores_data, colWidths=[1.5*inch, 2*inch, 0.8*inch, 1.2*inch, 0.8*inch])
+    vendedores_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8)
+    ]))
+    
+    story.append(vendedores_table)
+    story.append(Spacer(1, 30))
+    
+    # Resumen chefs
+    story.append(Paragraph("Personal de Cocina", styles['Heading2']))
+    story.append(Spacer(1, 10))
+    
+    chefs_data = [['Chef', 'Email', 'Teléfono', 'Estado']]
+    
+    for chef in chefs:
+        chefs_data.append([
+            chef.nombre,
+            chef.email,
+            chef.telefono or 'No registrado',
+            'Activo' if chef.activo else 'Inactivo'
+        ])
+    
+    chefs_table = Table(chefs_data, colWidths=[1.5*inch, 2*inch, 1.5*inch, 1*inch])
+    chefs_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkorange),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8)
+    ]))
+    
+    story.append(chefs_table)
+    
+    # Estadísticas generales
+    story.append(Spacer(1, 30))
+    story.append(Paragraph("Estadísticas Generales", styles['Heading2']))
+    
+    total_vendedores_activos = len([v for v in vendedores if v.activo])
+    total_chefs_activos = len([c for c in chefs if c.activo])
+    total_ventas_mes = sum(v.ventas_mes for v in vendedores)
+    total_pedidos_mes = sum(v.pedidos_mes for v in vendedores)
+    
+    stats_data = [
+        ['Métrica', 'Valor'],
+        ['Vendedores Activos', str(total_vendedores_activos)],
+        ['Chefs Activos', str(total_chefs_activos)],
+        ['Total Ventas del Mes', f'${total_ventas_mes:.2f} COP'],
+        ['Total Pedidos del Mes', str(total_pedidos_mes)]
+    ]
+    
+    stats_table = Table(stats_data, colWidths=[2.5*inch, 2*inch])
+    stats_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(stats_table)
+    
+    # Pie de página
+    story.append(Spacer(1, 50))
+    story.append(Paragraph(f"Reporte generado el {fecha_actual.strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    story.append(Paragraph("Migas de oro Dorè - Sistema de Gestión", styles['Normal']))
+    
+    # Construir PDF
+    doc.build(story)
+
+# Tipos de reporte que acepta la cola: tipo -> función(ruta, **parametros)
+GENERADORES = {
+    'vendedor': generar_reporte_vendedor,
+    'personal': generar_reporte_personal
+}
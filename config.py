@@ -14,22 +14,130 @@ class Config:
     # Configuración de paginación
     POSTS_PER_PAGE = 12
     USERS_PER_PAGE = 20
+    
+    # Pool de conexiones SQLite
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # segundos esperando una conexión libre
+    DB_POOL_HEALTHCHECK_INTERVAL = 30  # segundos de inactividad antes de verificar con SELECT 1
+    
+    # Ajustes de almacenamiento SQLite (se aplican al abrir cada conexión)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',         # lectores y escritor concurrentes
+        'synchronous': 'NORMAL',       # seguro con WAL, un fsync por checkpoint
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,          # en KiB (negativo), ~16 MB por conexión
+        'temp_store': 'MEMORY'
+    }
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_LOCK_RETRIES = 3            # reintentos ante 'database is locked'
+    SQLITE_LOCK_RETRY_BACKOFF = 0.05   # segundos, se duplica en cada reintento
+    
+    # Caché en memoria del catálogo (productos y categorías)
+    CATALOGO_CACHE_TTL = int(os.environ.get('CATALOGO_CACHE_TTL', 60))  # segundos, 0 la desactiva
+    CATALOGO_CACHE_MAX_ENTRADAS = 2048
+    CONFIGURACION_CACHE_TTL = 300  # system_settings e historia_images, se refresca al guardar
+    ANALITICA_CACHE_TTL = 300  # agregados de ventas del dashboard, se refrescan con cada pedido
+    
+    # Búsqueda de productos y recetas (FTS5)
+    BUSQUEDA_POR_PAGINA = 24
+    BUSQUEDA_MAX_POR_PAGINA = 100  # límite de ?por_pagina en /api/buscar
+    
+    # Listados paginados por cursor (catálogo, pedidos, clientes, inventario)
+    CATALOGO_POR_PAGINA = 24
+    LISTADOS_POR_PAGINA = 50
+    LISTADOS_MAX_POR_PAGINA = 100  # límite de ?limite en las APIs de listados
+    
+    # Recibos PDF (caché en disco y pool de renderizado)
+    RECIBOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'recibos')
+    RECIBOS_WORKERS = int(os.environ.get('RECIBOS_WORKERS', 2))
+    RECIBOS_RENDER_TIMEOUT = 30  # segundos esperando un recibo que se está generando
+    
+    # Cola de reportes PDF del personal
+    REPORTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'reportes')
+    REPORTES_WORKERS = int(os.environ.get('REPORTES_WORKERS', 2))  # reportes generándose a la vez
+    REPORTES_MAX_PENDIENTES = 20  # trabajos en cola antes de rechazar nuevos
+    REPORTES_TIMEOUT = 300  # segundos en proceso tras los que un trabajo se da por huérfano (no corta reportes lentos)
+    
+    # Carritos de visitantes sin sesión iniciada
+    CARRITO_ANONIMO_DIAS = 30  # días sin cambios tras los que se borran al iniciar
+    
+    # Imágenes subidas de productos, recetas e historia (app/utils/imagenes.py)
+    IMAGENES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'images', 'subidas')
+    IMAGENES_VARIANTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'images', 'variantes')
+    IMAGENES_VARIANTES = {'miniatura': 160, 'tarjeta': 480, 'hero': 1200}  # ancho máximo en píxeles
+    IMAGENES_CALIDAD_WEBP = 80
+    IMAGENES_CALIDAD_JPEG = 82
+    IMAGENES_MAX_PIXELES = 40_000_000  # ancho x alto, rechaza imágenes más grandes
+    IMAGENES_WORKERS = int(os.environ.get('IMAGENES_WORKERS', 1))  # imágenes procesándose a la vez
+    
+    # Placeholders SVG (/placeholder.svg y app/utils/placeholders.py)
+    PLACEHOLDER_LADO_MIN = 10     # píxeles, ancho y alto se acotan a este rango
+    PLACEHOLDER_LADO_MAX = 2000
+    PLACEHOLDER_TEXTO_MAX = 60    # caracteres de ?query
+    PLACEHOLDER_CACHE_MAX_ENTRADAS = 256
+    PLACEHOLDER_MAX_AGE = 30 * 24 * 3600  # segundos de Cache-Control
+    PLACEHOLDER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'placeholders')
+    PLACEHOLDER_TAMANOS = [  # (ancho, alto) que se generan como archivos al iniciar
+        (1200, 600), (1200, 500), (800, 400), (600, 400), (500, 500), (500, 400),
+        (400, 400), (400, 250), (300, 250), (300, 200), (250, 200), (200, 150),
+        (100, 100), (80, 80), (50, 50)
+    ]
+    
+    # Archivos estáticos: hash en la URL, caché de larga duración y .gz/.br (app/utils/estaticos.py)
+    ESTATICOS_HASH = True  # url_for('static') con el hash del contenido
+    ESTATICOS_MAX_AGE = 365 * 24 * 3600  # segundos, para rutas con hash (immutable)
+    ESTATICOS_MANIFIESTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'estaticos.json')
+    ESTATICOS_EXCLUIDOS = ('reportes/', 'images/uploads/', 'images/subidas/', 'images/variantes/')
+    ESTATICOS_INMUTABLES = ('images/subidas/', 'images/variantes/')  # ya tienen el hash en el nombre
+    ESTATICOS_COMPRIMIR = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map')
+    ESTATICOS_COMPRIMIR_MIN_BYTES = 256
+    
+    # Perfil de consultas SQL por petición (app/utils/perfilador.py y /debug/queries)
+    PERFIL_CONSULTAS = os.environ.get('PERFIL_CONSULTAS', '1') == '1'
+    PERFIL_CONSULTAS_LENTA_MS = float(os.environ.get('PERFIL_CONSULTAS_LENTA_MS', 100))  # se registran en el log
+    PERFIL_CONSULTAS_REPETICIONES_N1 = 5  # misma sentencia con parámetros distintos en una petición
+    PERFIL_CONSULTAS_HISTORIAL = 100  # peticiones que se guardan para /debug/queries
+    PERFIL_CONSULTAS_CABECERAS = True  # X-DB-Queries, X-DB-Time-ms y Server-Timing en cada respuesta
+    
+    # Registro (app/utils/registro.py): JSON por stdout escrito desde un hilo aparte
+    LOG_FORMATO = os.environ.get('LOG_FORMATO', 'json')  # 'json' o 'texto'
+    LOG_NIVEL = os.environ.get('LOG_NIVEL', 'INFO')
+    LOG_NIVELES = {  # nivel por módulo
+        'app': 'INFO',
+        'app.consultas': 'WARNING',
+        'werkzeug': 'WARNING'  # app.peticiones ya registra cada petición
+    }
+    LOG_MUESTREO_DEBUG = float(os.environ.get('LOG_MUESTREO_DEBUG', 0.1))  # peticiones que registran sus DEBUG
+    LOG_COLA_MAX = 10000  # registros en espera antes de descartar
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
     DEBUG = True
+    LOG_FORMATO = os.environ.get('LOG_FORMATO', 'texto')
+    LOG_NIVELES = dict(Config.LOG_NIVELES, app='DEBUG')
+    LOG_MUESTREO_DEBUG = 1.0
+    ESTATICOS_HASH = False  # los cambios en static/ se ven sin reiniciar
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///instance/panaderia.db'
 
 class ProductionConfig(Config):
     """Configuración para producción"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///instance/panaderia.db'
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 20))
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, mmap_size=256 * 1024 * 1024, cache_size=-64000)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    SQLITE_LOCK_RETRIES = 5
+    PERFIL_CONSULTAS_CABECERAS = False  # no exponer los tiempos internos a los clientes
 
 class TestingConfig(Config):
     """Configuración para testing"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    DB_POOL_SIZE = 5
+    DB_POOL_TIMEOUT = 1
+    SQLITE_BUSY_TIMEOUT_MS = 1000
+    SQLITE_LOCK_RETRIES = 0
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,46 @@
+"""
+Configuración de gunicorn para producción (ver wsgi.py).
+
+Cada worker es un proceso con WEB_THREADS hilos (worker gthread): los hilos
+atienden peticiones mientras otros esperan a SQLite o a la red, y los procesos
+reparten el trabajo de Python entre varios núcleos. Todos los valores se
+pueden cambiar con variables de entorno.
+
+- preload_app: la aplicación se carga una vez en el maestro y los workers la
+  heredan (menos memoria y arranque más rápido).
+- max_requests (+ jitter): cada worker se recicla tras atender esa cantidad de
+  peticiones, para acotar cualquier crecimiento de memoria; el jitter evita
+  que todos se reinicien a la vez.
+- Reinicio sin cortar peticiones: kill -HUP <pid del maestro> crea workers
+  nuevos y los viejos terminan lo que tienen en curso (hasta graceful_timeout).
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5093')
+
+workers = int(os.environ.get('WEB_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+preload_app = True
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))  # segundos sin respuesta antes de matar un worker
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# La aplicación registra cada petición en app.peticiones (app/utils/registro.py)
+accesslog = None
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOGLEVEL', 'info')
+
+def when_ready(server):
+    # El maestro no atiende peticiones: cierra las conexiones que abrió al cargar la aplicación
+    from app.models import dispose_pool
+    dispose_pool()
+
+def post_fork(server, worker):
+    from wsgi import reiniciar_worker
+    reiniciar_worker()
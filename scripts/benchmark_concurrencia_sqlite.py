@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia lectores/escritores sobre SQLite.
+
+Compara la configuración por defecto de sqlite3 (journal en modo rollback,
+synchronous=FULL) contra los PRAGMA de config.py (WAL, synchronous=NORMAL,
+mmap, cache_size, temp_store) usando una base de datos temporal con la forma
+de la tabla pedidos. Los lectores simulan el dashboard y los escritores
+simulan checkouts (INSERT + commit).
+
+Uso:
+    python scripts/benchmark_concurrencia_sqlite.py [--lectores 8] [--escritores 4] [--segundos 5]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+
+ESQUEMA = '''
+    CREATE TABLE pedidos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER,
+        total DECIMAL(10,2) NOT NULL,
+        estado TEXT DEFAULT 'pendiente',
+        fecha_pedido TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+def preparar_base(ruta, filas=20000):
+    """Crea la tabla y la llena con pedidos de ejemplo"""
+    conn = sqlite3.connect(ruta)
+    conn.execute(ESQUEMA)
+    conn.executemany('INSERT INTO pedidos (usuario_id, total, estado) VALUES (?, ?, ?)',
+                     [(i % 50, 1000 + i % 300, 'pendiente') for i in range(filas)])
+    conn.commit()
+    conn.close()
+
+def abrir(ruta, pragmas, busy_timeout_ms):
+    conn = sqlite3.connect(ruta, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+    for nombre, valor in sorted(pragmas.items(), key=lambda item: item[0] != 'journal_mode'):
+        conn.execute(f'PRAGMA {nombre} = {valor}').fetchall()
+    return conn
+
+def ejecutar(nombre, pragmas, busy_timeout_ms, lectores, escritores, segundos):
+    directorio = tempfile.mkdtemp(prefix='bench_sqlite_')
+    ruta = os.path.join(directorio, 'bench.db')
+    preparar_base(ruta)
+
+    contadores = {'lecturas': 0, 'escrituras': 0, 'bloqueos': 0}
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def lector():
+        conn = abrir(ruta, pragmas, busy_timeout_ms)
+        hechas = bloqueos = 0
+        while time.perf_counter() < fin:
+            try:
+                conn.execute('SELECT estado, COUNT(*), SUM(total) FROM pedidos GROUP BY estado').fetchall()
+                hechas += 1
+            except sqlite3.OperationalError:
+                bloqueos += 1
+        conn.close()
+        with lock:
+            contadores['lecturas'] += hechas
+            contadores['bloqueos'] += bloqueos
+
+    def escritor():
+        conn = abrir(ruta, pragmas, busy_timeout_ms)
+        hechas = bloqueos = 0
+        while time.perf_counter() < fin:
+            try:
+                conn.execute('INSERT INTO pedidos (usuario_id, total) VALUES (?, ?)', (1, 2500))
+                conn.commit()
+                hechas += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                bloqueos += 1
+        conn.close()
+        with lock:
+            contadores['escrituras'] += hechas
+            contadores['bloqueos'] += bloqueos
+
+    hilos = [threading.Thread(target=lector) for _ in range(lectores)]
+    hilos += [threading.Thread(target=escritor) for _ in range(escritores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    print(f"{nombre:<12} lecturas/s: {contadores['lecturas'] / segundos:>9.1f}   "
+          f"escrituras/s: {contadores['escrituras'] / segundos:>8.1f}   "
+          f"errores 'locked': {contadores['bloqueos']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia SQLite')
+    parser.add_argument('--lectores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--config', default='production')
+    args = parser.parse_args()
+
+    cfg = config[args.config]
+    print(f"📊 {args.lectores} lectores, {args.escritores} escritores, {args.segundos}s por escenario\n")
+
+    # Valores por defecto de sqlite3: journal rollback, synchronous FULL, timeout de 5s
+    ejecutar('por defecto', {}, 5000, args.lectores, args.escritores, args.segundos)
+    ejecutar('ajustado', cfg.SQLITE_PRAGMAS, cfg.SQLITE_BUSY_TIMEOUT_MS,
+             args.lectores, args.escritores, args.segundos)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark de construcción de modelos desde filas de SQLite.
+
+Compara la forma anterior de armar los pedidos (tuplas, cls(*row) sobre una
+clase con __dict__ y datetime.strptime por fila) contra Venta.from_rows
+(sqlite3.Row, __slots__ y fecha convertida al leerla, ver app/models/filas.py)
+sobre una base de datos temporal con la tabla pedidos. Mide el tiempo de
+leer y construir el listado, el de leer además la fecha de cada pedido, y la
+memoria que ocupan los objetos.
+
+Uso:
+    python scripts/benchmark_modelos.py [--filas 50000] [--repeticiones 5]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.filas import cursor_filas
+from app.models.venta import Venta
+
+ESQUEMA = '''
+    CREATE TABLE pedidos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER,
+        total DECIMAL(10,2) NOT NULL,
+        estado TEXT DEFAULT 'pendiente',
+        fecha_pedido TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        direccion_entrega TEXT,
+        telefono_contacto TEXT,
+        notas TEXT,
+        metodo_pago TEXT DEFAULT 'efectivo',
+        fecha_entrega TEXT,
+        hora_entrega TEXT,
+        comprobante_pago TEXT
+    )
+'''
+
+class VentaAnterior:
+    """Venta como se construía antes: atributos en __dict__ y strptime en __init__"""
+
+    def __init__(self, id=None, usuario_id=None, total=None, estado='pendiente', fecha_pedido=None, direccion_entrega=None, telefono_contacto=None, notas=None, metodo_pago='efectivo', fecha_entrega=None, hora_entrega=None, comprobante_pago=None):
+        self.id = id
+        self.usuario_id = usuario_id
+        self.total = total
+        self.estado = estado
+        if isinstance(fecha_pedido, str):
+            try:
+                self.fecha_pedido = datetime.strptime(fecha_pedido, '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                try:
+                    self.fecha_pedido = datetime.strptime(fecha_pedido, '%Y-%m-%d %H:%M:%S.%f')
+                except ValueError:
+                    self.fecha_pedido = datetime.now()
+        else:
+            self.fecha_pedido = fecha_pedido or datetime.now()
+        self.direccion_entrega = direccion_entrega
+        self.telefono_contacto = telefono_contacto
+        self.notas = notas
+        self.metodo_pago = metodo_pago
+        self.fecha_entrega = fecha_entrega
+        self.hora_entrega = hora_entrega
+        self.comprobante_pago = comprobante_pago
+
+def preparar_base(ruta, filas):
+    """Crea la tabla y la llena con pedidos de ejemplo"""
+    conn = sqlite3.connect(ruta)
+    conn.execute(ESQUEMA)
+    conn.executemany('''
+        INSERT INTO pedidos (usuario_id, total, estado, fecha_pedido, direccion_entrega, telefono_contacto)
+        VALUES (?, ?, ?, datetime('now', ?), ?, ?)
+    ''', [(i % 50, 1000 + i % 300, 'entregado', f'-{i} minutes', 'Calle 1 # 2-3', '3001234567')
+          for i in range(filas)])
+    conn.commit()
+    conn.close()
+
+def leer_anterior(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM pedidos ORDER BY fecha_pedido DESC')
+    return [VentaAnterior(*row) for row in cursor.fetchall()]
+
+def leer_filas(conn):
+    cursor = cursor_filas(conn)
+    cursor.execute('SELECT * FROM pedidos ORDER BY fecha_pedido DESC')
+    return Venta.from_rows(cursor.fetchall())
+
+def medir(leer, conn, repeticiones, con_fechas):
+    """Mejor tiempo en ms de leer el listado (y opcionalmente todas sus fechas)"""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ventas = leer(conn)
+        if con_fechas:
+            for venta in ventas:
+                venta.fecha_pedido
+        transcurrido = (time.perf_counter() - inicio) * 1000
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+def memoria(leer, conn):
+    """KB que ocupan los objetos del listado (sin las filas ya liberadas)"""
+    tracemalloc.start()
+    ventas = leer(conn)
+    usada, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del ventas
+    return usada / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=50000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='bench_modelos_')
+    ruta = os.path.join(directorio, 'bench.db')
+    preparar_base(ruta, args.filas)
+    conn = sqlite3.connect(ruta)
+
+    print(f'{args.filas} pedidos, mejor de {args.repeticiones} repeticiones\n')
+    print(f"{'':28}{'listado':>12}{'con fechas':>14}{'memoria':>14}")
+    for nombre, leer in (('cls(*row) + strptime', leer_anterior), ('from_rows + __slots__', leer_filas)):
+        listado = medir(leer, conn, args.repeticiones, False)
+        fechas = medir(leer, conn, args.repeticiones, True)
+        print(f'{nombre:28}{listado:>10.1f}ms{fechas:>12.1f}ms{memoria(leer, conn):>11.0f} KB')
+
+    conn.close()
+    os.remove(ruta)
+    os.rmdir(directorio)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Aplica las migraciones pendientes de app/models/migraciones y muestra el
+estado del esquema. La aplicación también las aplica al iniciar, así que
+este script sirve para migrar antes de un despliegue o revisar la versión:
+
+    python scripts/migrar_base_datos.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from app.models import get_db_connection
+from app.models.migraciones import listar_migraciones, migrar, version_actual
+
+def main():
+    print("🗄️ Migrando base de datos...")
+
+    with app.app_context():
+        aplicadas = migrar()
+        for nombre in aplicadas:
+            print(f"   ✓ {nombre}")
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        version = version_actual(cursor)
+        cursor.execute('SELECT version, nombre, fecha_aplicacion FROM schema_version ORDER BY version')
+        historial = cursor.fetchall()
+        conn.close()
+
+    print(f"\n📋 Migraciones aplicadas (versión {version}):")
+    for numero, nombre, fecha in historial:
+        print(f"   {numero:04d}  {nombre:<35} {fecha}")
+
+    pendientes = [nombre for numero, nombre in listar_migraciones() if numero > version]
+    if pendientes:
+        print(f"\n❌ Migraciones pendientes: {', '.join(pendientes)}")
+        sys.exit(1)
+
+    print("\n✅ El esquema está al día")
+
+if __name__ == "__main__":
+    main()
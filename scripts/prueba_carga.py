@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga HTTP contra un servidor en marcha.
+
+Varios hilos piden en bucle las páginas públicas más visitadas (inicio,
+catálogo, búsqueda, detalle de producto y APIs) durante un tiempo fijo y se
+reportan peticiones por segundo, latencias (p50, p95, p99) y errores. Sirve
+para comparar el servidor de desarrollo (python app.py) con gunicorn
+(gunicorn -c gunicorn.conf.py wsgi:application) sobre la misma máquina.
+
+Uso:
+    python scripts/prueba_carga.py [--url http://127.0.0.1:5093] [--concurrencia 16] [--segundos 20]
+"""
+
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+
+RUTAS = [
+    '/',
+    '/productos',
+    '/productos?q=pan',
+    '/producto/1',
+    '/api/productos?limite=24',
+    '/api/buscar?q=croissant',
+    '/api/carrito/count'
+]
+
+def trabajador(base, fin, resultados, lock, indice):
+    latencias = []
+    errores = 0
+    i = indice
+    while time.perf_counter() < fin:
+        ruta = RUTAS[i % len(RUTAS)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base + ruta, timeout=30) as respuesta:
+                respuesta.read()
+            latencias.append(time.perf_counter() - inicio)
+        except (urllib.error.URLError, OSError):
+            errores += 1
+    with lock:
+        resultados['latencias'].extend(latencias)
+        resultados['errores'] += errores
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5093')
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=20)
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/')
+    # Calentar cachés y conexiones antes de medir
+    for ruta in RUTAS:
+        urllib.request.urlopen(base + ruta, timeout=30).read()
+
+    resultados = {'latencias': [], 'errores': 0}
+    lock = threading.Lock()
+    fin = time.perf_counter() + args.segundos
+    hilos = [threading.Thread(target=trabajador, args=(base, fin, resultados, lock, i))
+             for i in range(args.concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias = sorted(resultados['latencias'])
+    print(f'{base}: {args.concurrencia} clientes durante {duracion:.1f} s')
+    print(f'  peticiones: {len(latencias)}  errores: {resultados["errores"]}')
+    print(f'  req/s: {len(latencias) / duracion:.1f}')
+    print(f'  latencia p50: {percentil(latencias, 50) * 1000:.1f} ms  '
+          f'p95: {percentil(latencias, 95) * 1000:.1f} ms  '
+          f'p99: {percentil(latencias, 99) * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Reconstruye los resúmenes de ventas (ventas_diarias y
+producto_ventas_mensuales) a partir de pedidos y detalle_pedidos.
+Las migraciones 0006 y 0007 los llenan al crearlos y luego el modelo Venta
+los mantiene al día; este script sirve para cargar historial importado por
+fuera de la aplicación o para revisar que coincidan con los pedidos:
+
+    python scripts/recalcular_resumenes_ventas.py             # reconstruir
+    python scripts/recalcular_resumenes_ventas.py --verificar # solo comparar
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from app.models import get_db_connection
+from app.models.venta import Venta
+
+# resumen -> (consulta sobre los pedidos, consulta sobre el resumen); ambas
+# retornan (clave1, clave2, contadores...) y el último contador es un importe
+COMPARACIONES = {
+    'ventas_diarias': (
+        '''
+        SELECT DATE(p.fecha_pedido), p.estado, COUNT(*), COALESCE(SUM(d.items), 0), COALESCE(SUM(p.total), 0)
+        FROM pedidos p
+        LEFT JOIN (
+            SELECT pedido_id, SUM(cantidad) as items
+            FROM detalle_pedidos
+            GROUP BY pedido_id
+        ) d ON d.pedido_id = p.id
+        WHERE p.fecha_pedido IS NOT NULL
+        GROUP BY DATE(p.fecha_pedido), p.estado
+        ''',
+        'SELECT fecha, estado, pedidos, items, total FROM ventas_diarias WHERE pedidos != 0 OR items != 0'
+    ),
+    'producto_ventas_mensuales': (
+        '''
+        SELECT strftime('%Y-%m', p.fecha_pedido), dp.producto_id,
+               SUM(dp.cantidad), SUM(dp.cantidad * dp.precio_unitario)
+        FROM pedidos p
+        JOIN detalle_pedidos dp ON dp.pedido_id = p.id
+        WHERE p.fecha_pedido IS NOT NULL AND p.estado != 'cancelado'
+        GROUP BY strftime('%Y-%m', p.fecha_pedido), dp.producto_id
+        ''',
+        'SELECT mes, producto_id, unidades, ingresos FROM producto_ventas_mensuales WHERE unidades != 0'
+    )
+}
+
+def diferencias(cursor, consulta_pedidos, consulta_resumen):
+    """Claves donde el resumen no coincide con los pedidos"""
+    cursor.execute(consulta_pedidos)
+    esperado = {row[:2]: row[2:] for row in cursor.fetchall()}
+    cursor.execute(consulta_resumen)
+    actual = {row[:2]: row[2:] for row in cursor.fetchall()}
+
+    resultado = []
+    for clave in sorted(set(esperado) | set(actual), key=str):
+        fila_esperada = esperado.get(clave)
+        fila_actual = actual.get(clave)
+        ceros = (0,) * len(fila_esperada or fila_actual)
+        fila_esperada, fila_actual = fila_esperada or ceros, fila_actual or ceros
+        if fila_esperada[:-1] != fila_actual[:-1] or abs(fila_esperada[-1] - fila_actual[-1]) > 0.005:
+            resultado.append((clave, fila_esperada, fila_actual))
+    return resultado
+
+def main():
+    solo_verificar = '--verificar' in sys.argv
+
+    with app.app_context():
+        if not solo_verificar:
+            print("🔄 Reconstruyendo resúmenes de ventas...")
+            for tabla, filas in Venta.recalcular_resumenes().items():
+                print(f"   ✓ {tabla}: {filas} filas")
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        errores = {tabla: diferencias(cursor, *consultas) for tabla, consultas in COMPARACIONES.items()}
+        conn.close()
+
+    hay_errores = False
+    for tabla, filas in errores.items():
+        if filas:
+            hay_errores = True
+            print(f"\n❌ {tabla}: {len(filas)} filas no coinciden con los pedidos")
+            for clave, esperado, actual in filas:
+                print(f"   {clave}  pedidos: {esperado}  resumen: {actual}")
+
+    if hay_errores:
+        sys.exit(1)
+
+    print("\n✅ Los resúmenes coinciden con los pedidos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Verifica con EXPLAIN QUERY PLAN que las consultas más frecuentes usen índices.
+
+Crea una base de datos temporal con el esquema de init_db, llama a los
+métodos de los modelos capturando las sentencias que ejecutan (con el gancho
+del perfilador de consultas) y falla (código de salida 1) si alguna recorre
+completa (SCAN) una de las tablas que debería buscar por índice. Ejecutar
+después de cambiar consultas o índices:
+
+    python scripts/verificar_planes_consulta.py
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instance.config import InstanceConfig
+
+# Usar una base de datos temporal para no tocar instance/panaderia.db
+InstanceConfig.DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix='planes_'), 'panaderia.db')
+
+from app import create_app
+from app.models import get_db_connection, registrar_perfilador
+from app.models.carrito import Carrito
+from app.models.detalle_venta import DetalleVenta
+from app.models.favorito import Favorito
+from app.models.movimientos_inventario import MovimientoInventario
+from app.models.producto import Producto
+from app.models.usuario import Usuario
+from app.models.venta import Venta
+from app.utils.cache import cache_analitica, cache_catalogo
+from app.utils.paginacion import codificar_cursor
+
+# (descripción, llamada al modelo, tablas que puede recorrer completas)
+# Se verifican las sentencias que ejecuta cada llamada, no una copia del SQL.
+CONSULTAS = [
+    ('Venta.get_all(usuario_id=...)', lambda: Venta.get_all(usuario_id=1), ()),
+    ('Venta.get_all(estado=...)', lambda: Venta.get_all(estado='pendiente'), ()),
+    ('DetalleVenta.get_by_pedido', lambda: DetalleVenta.get_by_pedido(1), ()),
+    ('Venta.get_detalles', lambda: Venta(id=1).get_detalles(), ()),
+    ('Favorito.find_by_user_and_product', lambda: Favorito.find_by_user_and_product(1, 1), ()),
+    ('MovimientoInventario.get_all(insumo_id=...)', lambda: MovimientoInventario.get_all(insumo_id=1), ()),
+    ('Carrito.get_count', lambda: Carrito.get_count('u:1'), ()),
+    ('Carrito.get_items', lambda: Carrito.get_items('u:1'), ()),
+    ('Producto.get_average_rating', lambda: Producto(id=1).get_average_rating(), ()),
+    ('Venta.get_ventas_diarias_mes', lambda: Venta.get_ventas_diarias_mes(2024, 12), ()),
+    ('Venta.get_reporte_ventas_mes', lambda: Venta.get_reporte_ventas_mes(2, 2024, 12), ()),
+    ('Venta.get_resumen_vendedores_mes', lambda: Venta.get_resumen_vendedores_mes(2024, 12), ()),
+    ('Usuario.get_vendedores_top_mes', lambda: Usuario.get_vendedores_top_mes(2024, 12), ()),
+    # Pedidos por estado agrupa todo el resumen, que tiene una fila por día y estado
+    ('Venta.get_estadisticas', Venta.get_estadisticas, ('ventas_diarias',)),
+    ('Venta.get_pedidos_preparados_by_chef_mes', lambda: Venta.get_pedidos_preparados_by_chef_mes(3, 2024, 12), ()),
+    ('Producto.get_mas_vendidos_mes', lambda: Producto.get_mas_vendidos_mes(2024, 12), ()),
+    ('Producto.get_pagina (página siguiente)',
+     lambda: Producto.get_pagina(cursor=codificar_cursor(['2025-01-01 00:00:00', 10])), ()),
+    ('Venta.get_pagina(estado=...) (página siguiente)',
+     lambda: Venta.get_pagina(estado='pendiente', cursor=codificar_cursor(['2025-01-01 00:00:00', 10])), ()),
+    ('Usuario.get_pagina(role=...) (página siguiente)',
+     lambda: Usuario.get_pagina(role='cliente', cursor=codificar_cursor(['Ana', 3])), ()),
+    ('MovimientoInventario.get_pagina (página siguiente)',
+     lambda: MovimientoInventario.get_pagina(cursor=codificar_cursor(['2025-01-01 00:00:00', 10])), ()),
+    ('Producto.search', lambda: Producto.search('pan'), ())
+]
+
+class CapturadorSentencias:
+    """Perfilador que guarda las sentencias que ejecutan los modelos (ver registrar_perfilador)"""
+
+    def __init__(self):
+        self.sentencias = []
+
+    def registrar(self, sql, parametros, segundos):
+        self.sentencias.append((sql, parametros))
+        return None
+
+    def sumar(self, consulta, segundos):
+        pass
+
+def capturar(llamada):
+    """Sentencias distintas que ejecuta la llamada, en orden, con sus parámetros"""
+    capturador = CapturadorSentencias()
+    registrar_perfilador(capturador)
+    try:
+        llamada()
+    finally:
+        registrar_perfilador(None)
+
+    sentencias = {}
+    for sql, parametros in capturador.sentencias:
+        if sql.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE')):
+            sentencias.setdefault(' '.join(sql.split()), parametros)
+    return list(sentencias.items())
+
+def plan_de(cursor, consulta, parametros):
+    cursor.execute('EXPLAIN QUERY PLAN ' + consulta, parametros)
+    return [fila[3] for fila in cursor.fetchall()]
+
+def es_recorrido_completo(detalle, permitidos=()):
+    """
+    SCAN sobre una tabla (no sobre un subquery ni una fila constante). En las
+    tablas FTS5 el plan siempre dice SCAN; una búsqueda con MATCH usa el
+    índice de texto y se reconoce por la 'M' en el idxStr ('INDEX 0:M2').
+    Las tablas de permitidos pueden recorrerse.
+    """
+    if re.search(r'VIRTUAL TABLE INDEX \d+:\S*M', detalle):
+        return False
+    if detalle.startswith('SCAN ') and detalle.split()[1] in permitidos:
+        return False
+    return detalle.startswith('SCAN ') and not detalle.startswith(('SCAN CONSTANT', 'SCAN SUBQUERY'))
+
+def main():
+    print("🔍 Verificando planes de consulta...")
+    app = create_app('testing')
+    fallas = 0
+
+    with app.app_context():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        for descripcion, llamada, permitidos in CONSULTAS:
+            # Sin caché, para que la llamada llegue a la base de datos
+            cache_catalogo.invalidar()
+            cache_analitica.invalidar()
+            sentencias = capturar(llamada)
+            if not sentencias:
+                fallas += 1
+                print(f"   ❌ {descripcion}: no ejecutó ninguna consulta")
+                continue
+
+            for sql, parametros in sentencias:
+                plan = plan_de(cursor, sql, parametros)
+                recorridos = [detalle for detalle in plan if es_recorrido_completo(detalle, permitidos)]
+                if recorridos:
+                    fallas += 1
+                    print(f"   ❌ {descripcion}: {sql}")
+                    for detalle in plan:
+                        print(f"      {detalle}")
+                else:
+                    print(f"   ✅ {descripcion}: {' | '.join(plan)}")
+
+        conn.close()
+
+    if fallas:
+        print(f"\n❌ {fallas} consulta(s) recorren tablas completas")
+        sys.exit(1)
+
+    print("\n✅ Todas las consultas usan índices")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Punto de entrada WSGI para producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+El paquete app ya crea la aplicación al importarse (con FLASK_CONFIG, que la
+imagen de Docker fija en 'production'); aquí solo se expone para el servidor.
+Con preload_app gunicorn la importa una vez en el proceso maestro y los
+workers la heredan al hacer fork, compartiendo la memoria (copy-on-write).
+reiniciar_worker() rehace en cada worker lo que no sobrevive al fork.
+"""
+from app import app as application
+
+def reiniciar_worker():
+    """Conexiones, hilo del registro y pools de hilos propios del worker recién creado"""
+    from app.models import dispose_pool
+    from app.utils import cola_reportes, imagenes, recibos
+    from app.utils.registro import iniciar_registro
+
+    # Las conexiones SQLite no se deben usar a través de un fork
+    dispose_pool()
+    iniciar_registro(application.config)
+    recibos.reiniciar_tras_fork()
+    cola_reportes.reiniciar_tras_fork()
+    imagenes.reiniciar_tras_fork()